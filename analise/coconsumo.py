@@ -0,0 +1,185 @@
+import random
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from entidades.armazenamento import CODIGO_TIPO
+
+# primo de Mersenne 2^61 - 1, módulo das funções de hash do MinHash
+_PRIMO_MINHASH = (1 << 61) - 1
+
+_VAZIO = array('q')
+
+
+class MotorCoconsumo:
+    """
+    Matriz de incidência usuário × conteúdo guardada de forma esparsa: para
+    cada conteúdo, um array ordenado com as posições dos seus usuários
+    distintos (memória proporcional aos pares usuário–conteúdo, não a
+    conteúdos × usuários). Cada consulta monta um conjunto só para o
+    conteúdo comparado e conta a interseção com os arrays dos demais em C
+    (set.intersection), sem percorrer usuário a usuário em Python.
+
+    O motor é um retrato dos dados no momento da construção; interações
+    registradas depois exigem construir outro.
+    """
+    def __init__(self, audiencias: Dict[int, Iterable[int]]):
+        """audiencias: {id_conteudo: ids de usuários que interagiram (com repetição)}."""
+        self._posicao_usuario: Dict[int, int] = {}
+        self._posicoes: Dict[int, array] = {}
+        for id_conteudo, usuarios in audiencias.items():
+            vistas = set()
+            for id_usuario in usuarios:
+                posicao = self._posicao_usuario.get(id_usuario)
+                if posicao is None:
+                    posicao = self._posicao_usuario[id_usuario] = len(self._posicao_usuario)
+                vistas.add(posicao)
+            self._posicoes[id_conteudo] = array('q', sorted(vistas))
+        self._ids_usuarios = list(self._posicao_usuario)
+
+    @classmethod
+    def de_sistema(cls, sistema, tipos: Optional[Iterable[str]] = None) -> "MotorCoconsumo":
+        """
+        Constrói a partir das interações do sistema. Com tipos, só interações
+        desses tipos contam como audiência (ex.: ("view_start",)).
+        """
+        tipos = frozenset(tipos) if tipos is not None else None
+        armazenamento = sistema.armazenamento
+        audiencias: Dict[int, List[int]] = {c.id_conteudo: [] for c in sistema.listar_conteudos()}
+        if armazenamento is not None:
+            codigos = None if tipos is None else frozenset(CODIGO_TIPO[t] for t in tipos if t in CODIGO_TIPO)
+            for id_conteudo, id_usuario, codigo in zip(armazenamento._conteudos, armazenamento._usuarios,
+                                                      armazenamento._tipos):
+                if codigos is None or codigo in codigos:
+                    audiencias[id_conteudo].append(id_usuario)
+        else:
+            for conteudo in sistema.listar_conteudos():
+                audiencias[conteudo.id_conteudo] = [
+                    i.id_usuario for i in conteudo._interacoes
+                    if tipos is None or i.tipo_interacao in tipos
+                ]
+        return cls(audiencias)
+
+    @property
+    def qtd_usuarios(self) -> int:
+        return len(self._ids_usuarios)
+
+    def conteudos(self) -> List[int]:
+        return list(self._posicoes)
+
+    def _posicoes_de(self, id_conteudo: int) -> array:
+        return self._posicoes.get(id_conteudo, _VAZIO)
+
+    def audiencia(self, id_conteudo: int) -> int:
+        """Quantidade de usuários distintos do conteúdo."""
+        return len(self._posicoes_de(id_conteudo))
+
+    def usuarios(self, id_conteudo: int) -> Iterator[int]:
+        """IDs dos usuários do conteúdo, na ordem em que foram vistos."""
+        return map(self._ids_usuarios.__getitem__, self._posicoes_de(id_conteudo))
+
+    def sobreposicao(self, id_a: int, id_b: int) -> int:
+        """Usuários que interagiram com os dois conteúdos."""
+        a, b = self._posicoes_de(id_a), self._posicoes_de(id_b)
+        if len(a) > len(b):
+            a, b = b, a
+        return len(set(a).intersection(b)) if a else 0
+
+    def jaccard(self, id_a: int, id_b: int) -> float:
+        """|A ∩ B| / |A ∪ B| das audiências (0.0 se ambas vazias)."""
+        intersecao = self.sobreposicao(id_a, id_b)
+        uniao = self.audiencia(id_a) + self.audiencia(id_b) - intersecao
+        return intersecao / uniao if uniao else 0.0
+
+    def percentual_tambem(self, id_a: int, id_b: int) -> float:
+        """Percentual da audiência de id_a que também interagiu com id_b."""
+        audiencia = self.audiencia(id_a)
+        return round(self.sobreposicao(id_a, id_b) / audiencia * 100, 2) if audiencia else 0.0
+
+    def tambem_assistiram(self, id_conteudo: int, top_n: int = 10) -> List[Tuple[int, int, float]]:
+        """
+        "Quem consumiu X também consumiu": [(id_conteudo, usuários em comum,
+        jaccard)] dos outros conteúdos, por usuários em comum decrescente.
+        """
+        alvo = set(self._posicoes_de(id_conteudo))
+        resultado = []
+        if not alvo:
+            return resultado
+        for outro, posicoes in self._posicoes.items():
+            if outro == id_conteudo:
+                continue
+            comum = len(alvo.intersection(posicoes))
+            if comum:
+                uniao = len(alvo) + len(posicoes) - comum
+                resultado.append((outro, comum, comum / uniao))
+        resultado.sort(key=lambda r: r[1], reverse=True)
+        return resultado[:top_n]
+
+    def matriz_sobreposicao(self, ids_conteudos: Optional[Iterable[int]] = None) -> Dict[Tuple[int, int], int]:
+        """{(id_a, id_b): usuários em comum} para cada par id_a < id_b com interseção não vazia."""
+        ids = sorted(ids_conteudos if ids_conteudos is not None else self._posicoes)
+        matriz = {}
+        for n, id_a in enumerate(ids):
+            conjunto_a = set(self._posicoes_de(id_a))
+            if not conjunto_a:
+                continue
+            for id_b in ids[n + 1:]:
+                comum = len(conjunto_a.intersection(self._posicoes_de(id_b)))
+                if comum:
+                    matriz[(id_a, id_b)] = comum
+        return matriz
+
+    def assinaturas_minhash(self, qtd_hashes: int = 64, semente: int = 42) -> "AssinaturasMinHash":
+        """Assinaturas MinHash das audiências, para Jaccard aproximado (ver AssinaturasMinHash)."""
+        assinaturas = AssinaturasMinHash(qtd_hashes, semente)
+        for id_conteudo in self._posicoes:
+            assinaturas.adicionar(id_conteudo, self.usuarios(id_conteudo))
+        return assinaturas
+
+
+class AssinaturasMinHash:
+    """
+    Assinaturas MinHash de conjuntos de usuários: qtd_hashes mínimos de
+    funções h(x) = (a·x + b) mod (2^61 − 1). A fração de posições iguais
+    entre duas assinaturas estima o Jaccard J com erro padrão
+    √(J·(1 − J) / qtd_hashes), no máximo 1 / (2·√qtd_hashes) (0,0625 com
+    64 hashes). Cada assinatura tem tamanho fixo, e adicionar outra parte
+    da audiência a uma chave existente combina as assinaturas (mínimo
+    posição a posição), como se o conjunto inteiro tivesse sido visto.
+    """
+    def __init__(self, qtd_hashes: int = 64, semente: int = 42):
+        if qtd_hashes < 1:
+            raise ValueError("qtd_hashes deve ser ≥ 1.")
+        rnd = random.Random(semente)
+        self._coeficientes = [(rnd.randrange(1, _PRIMO_MINHASH), rnd.randrange(0, _PRIMO_MINHASH))
+                              for _ in range(qtd_hashes)]
+        self._assinaturas: Dict[int, array] = {}
+
+    def _assinatura(self, ids_usuarios: Iterable[int]) -> array:
+        usuarios = set(ids_usuarios)
+        assinatura = array('q', [_PRIMO_MINHASH] * len(self._coeficientes))
+        if usuarios:
+            for n, (a, b) in enumerate(self._coeficientes):
+                assinatura[n] = min((a * u + b) % _PRIMO_MINHASH for u in usuarios)
+        return assinatura
+
+    def adicionar(self, chave: int, ids_usuarios: Iterable[int]) -> None:
+        """Calcula (ou mescla, se a chave já existir) a assinatura de um conjunto."""
+        assinatura = self._assinatura(ids_usuarios)
+        existente = self._assinaturas.get(chave)
+        if existente is not None:
+            assinatura = array('q', map(min, existente, assinatura))
+        self._assinaturas[chave] = assinatura
+
+    def jaccard(self, chave_a: int, chave_b: int) -> float:
+        a, b = self._assinaturas.get(chave_a), self._assinaturas.get(chave_b)
+        # assinatura vazia: todos os mínimos ficaram no valor inicial
+        if a is None or b is None or a[0] == _PRIMO_MINHASH or b[0] == _PRIMO_MINHASH:
+            return 0.0
+        return sum(x == y for x, y in zip(a, b)) / len(a)
+
+    def semelhantes(self, chave: int, top_n: int = 10) -> List[Tuple[int, float]]:
+        """[(chave, jaccard estimado)] mais semelhantes, em ordem decrescente."""
+        resultado = [(outra, self.jaccard(chave, outra)) for outra in self._assinaturas if outra != chave]
+        resultado = [r for r in resultado if r[1] > 0]
+        resultado.sort(key=lambda r: r[1], reverse=True)
+        return resultado[:top_n]
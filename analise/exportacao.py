@@ -0,0 +1,160 @@
+import csv
+import json
+import os
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from entidades.armazenamento import TIPOS_INTERACAO
+from analise.rejeicoes import ColetorRejeicoes
+
+# Formatos de saída e a extensão dos arquivos gerados
+FORMATOS = {"jsonl": ".jsonl", "csv": ".csv", "colunar": ".json"}
+# Buffer dos arquivos de saída: as linhas são gravadas em blocos grandes
+TAMANHO_BUFFER = 1 << 20
+
+# Um relatório é (colunas, linhas); cada linha é uma tupla na ordem das colunas
+Relatorio = Tuple[Sequence[str], Iterable[tuple]]
+
+
+def _metricas_conteudos(sistema, top_n: int, processos: int, rejeicoes) -> Relatorio:
+    colunas = (("id_conteudo", "nome_conteudo", "tipo_conteudo", "total_engajamento")
+               + tuple(f"qtd_{tipo}" for tipo in TIPOS_INTERACAO)
+               + ("tempo_total", "media_tempo", "percentual_medio_assistido"))
+    relatorio = sistema.gerar_relatorio_metricas(
+        ("total_engajamento", "contagem_por_tipo", "tempo_total", "media_tempo",
+         "percentual_medio_assistido"), processos)
+    linhas = ((r.id_conteudo, r.nome_conteudo, r.tipo_conteudo, r.total_engajamento,
+               *(r.contagem_por_tipo.get(tipo, 0) for tipo in TIPOS_INTERACAO),
+               r.tempo_total, round(r.media_tempo, 2), r.percentual_medio_assistido)
+              for r in relatorio)
+    return colunas, linhas
+
+
+def _comentarios(sistema, top_n: int, processos: int, rejeicoes) -> Relatorio:
+    relatorio = sistema.gerar_relatorio_metricas(("comentarios",), processos)
+    linhas = ((r.id_conteudo, r.nome_conteudo, texto) for r in relatorio for texto in r.comentarios)
+    return ("id_conteudo", "nome_conteudo", "comentario"), linhas
+
+
+def _top_conteudos(sistema, top_n: int, processos: int, rejeicoes) -> Relatorio:
+    linhas = ((posicao, c.id_conteudo, c.nome_conteudo, total)
+              for posicao, (c, total) in enumerate(sistema.ranking_conteudos(top_n), 1))
+    return ("posicao", "id_conteudo", "nome_conteudo", "total_engajamento"), linhas
+
+
+def _top_usuarios(sistema, top_n: int, processos: int, rejeicoes) -> Relatorio:
+    linhas = ((posicao, u.id_usuario, total)
+              for posicao, (u, total) in enumerate(sistema.ranking_usuarios(top_n), 1))
+    return ("posicao", "id_usuario", "total_interacoes"), linhas
+
+
+def _plataformas(sistema, top_n: int, processos: int, rejeicoes) -> Relatorio:
+    linhas = ((p.id_plataforma, p.nome_plataforma) for p in sistema.listar_plataformas())
+    return ("id_plataforma", "nome_plataforma"), linhas
+
+
+def _comparacao_plataformas(sistema, top_n: int, processos: int, rejeicoes) -> Relatorio:
+    colunas = (("id_plataforma", "nome_plataforma", "total_interacoes")
+               + tuple(f"qtd_{tipo}" for tipo in TIPOS_INTERACAO)
+               + ("total_engajamento", "taxa_engajamento", "tempo_total", "media_tempo", "usuarios_unicos",
+                  "conteudos_unicos", "tempo_por_usuario", "participacao_interacoes", "participacao_tempo"))
+    linhas = ((p.id_plataforma, p.nome_plataforma, p.total_interacoes,
+               *(p.contagem_por_tipo.get(tipo, 0) for tipo in TIPOS_INTERACAO),
+               p.total_engajamento, p.taxa_engajamento, p.tempo_total, p.media_tempo, p.usuarios_unicos,
+               p.conteudos_unicos, p.tempo_por_usuario, p.participacao_interacoes, p.participacao_tempo)
+              for p in sistema.comparar_plataformas(ordenar_por="tempo_total"))
+    return colunas, linhas
+
+
+def _rejeicoes(sistema, top_n: int, processos: int, rejeicoes: ColetorRejeicoes) -> Relatorio:
+    linhas = sorted(rejeicoes.contagem.items(), key=lambda c: -c[1]) if rejeicoes is not None else []
+    return ("categoria", "quantidade"), linhas
+
+
+# {nome: função(sistema, top_n, processos, rejeicoes) -> (colunas, linhas)}
+RELATORIOS: Dict[str, Callable[..., Relatorio]] = {
+    "metricas_conteudos": _metricas_conteudos,
+    "comentarios": _comentarios,
+    "top_conteudos": _top_conteudos,
+    "top_usuarios": _top_usuarios,
+    "plataformas": _plataformas,
+    "comparacao_plataformas": _comparacao_plataformas,
+    "rejeicoes": _rejeicoes,
+}
+
+
+class _Contador:
+    """Itera as linhas contando quantas passaram (para escritores em bloco)."""
+    def __init__(self, linhas: Iterable[tuple]):
+        self._linhas = linhas
+        self.total = 0
+
+    def __iter__(self) -> Iterator[tuple]:
+        for linha in self._linhas:
+            self.total += 1
+            yield linha
+
+
+def escrever_jsonl(arquivo, colunas: Sequence[str], linhas: Iterable[tuple]) -> int:
+    """Um objeto JSON por linha. Retorna a quantidade de linhas gravadas."""
+    total = 0
+    codificar = json.JSONEncoder(ensure_ascii=False).encode
+    bloco: List[str] = []
+    for linha in linhas:
+        bloco.append(codificar(dict(zip(colunas, linha))))
+        bloco.append("\n")
+        total += 1
+        if len(bloco) >= 20_000:
+            arquivo.write("".join(bloco))
+            bloco.clear()
+    arquivo.write("".join(bloco))
+    return total
+
+
+def escrever_csv(arquivo, colunas: Sequence[str], linhas: Iterable[tuple]) -> int:
+    """CSV com cabeçalho; None vira campo vazio. Retorna a quantidade de linhas gravadas."""
+    contador = _Contador(linhas)
+    escritor = csv.writer(arquivo, lineterminator="\n")
+    escritor.writerow(colunas)
+    escritor.writerows(contador)
+    return contador.total
+
+
+def escrever_colunar(arquivo, colunas: Sequence[str], linhas: Iterable[tuple]) -> int:
+    """
+    Um único objeto JSON {"colunas": [...], "qtd_linhas": n, "dados":
+    {coluna: [valores]}}: cada coluna em uma lista contígua, como em
+    formatos colunares, legível sem dependências externas.
+    """
+    valores = [list(coluna) for coluna in zip(*linhas)] or [[] for _ in colunas]
+    json.dump({"colunas": list(colunas), "qtd_linhas": len(valores[0]) if valores else 0,
+               "dados": dict(zip(colunas, valores))}, arquivo, ensure_ascii=False)
+    arquivo.write("\n")
+    return len(valores[0]) if valores else 0
+
+
+_ESCRITORES = {"jsonl": escrever_jsonl, "csv": escrever_csv, "colunar": escrever_colunar}
+
+
+def exportar_relatorios(sistema, nomes: Iterable[str], diretorio: str, formato: str = "jsonl",
+                        top_n: int = 10, processos: int = 1,
+                        rejeicoes: ColetorRejeicoes = None) -> Dict[str, dict]:
+    """
+    Gera os relatórios nomeados (ver RELATORIOS) em diretorio, um arquivo
+    por relatório no formato pedido, gravados com buffer de TAMANHO_BUFFER.
+    Retorna {relatorio: {"arquivo", "linhas"}}.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato inválido: {formato}. Use um de: {', '.join(FORMATOS)}")
+    nomes = list(nomes)
+    desconhecidos = [n for n in nomes if n not in RELATORIOS]
+    if desconhecidos:
+        raise ValueError(f"Relatórios desconhecidos: {', '.join(desconhecidos)}")
+    os.makedirs(diretorio, exist_ok=True)
+    escrever = _ESCRITORES[formato]
+    resultado = {}
+    for nome in nomes:
+        colunas, linhas = RELATORIOS[nome](sistema, top_n, processos, rejeicoes)
+        caminho = os.path.join(diretorio, nome + FORMATOS[formato])
+        with open(caminho, "w", encoding="utf-8", newline="", buffering=TAMANHO_BUFFER) as arquivo:
+            resultado[nome] = {"arquivo": caminho, "linhas": escrever(arquivo, colunas, linhas)}
+    return resultado
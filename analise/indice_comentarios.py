@@ -0,0 +1,237 @@
+import re
+import shlex
+import unicodedata
+from array import array
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from entidades.armazenamento import para_epoch, de_epoch
+
+_PALAVRA = re.compile(r"\w+")
+
+
+@lru_cache(maxsize=65536)
+def _sem_acentos(texto: str) -> str:
+    decomposto = unicodedata.normalize("NFKD", texto.casefold())
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def tokenizar(texto: str) -> Tuple[str, ...]:
+    """
+    Termos do texto em minúsculas e sem acentos ("Ótima atuação!" ->
+    ("otima", "atuacao")), na ordem em que aparecem.
+    """
+    return tuple(_PALAVRA.findall(_sem_acentos(texto)))
+
+
+def interpretar_consulta(consulta: str) -> List[Tuple[str, ...]]:
+    """
+    Divide a consulta em cláusulas: cada trecho entre aspas é uma frase
+    (termos consecutivos) e cada palavra solta, uma cláusula de um termo.
+    """
+    try:
+        partes = shlex.split(consulta)
+    except ValueError:
+        # aspas sem par: trata tudo como palavras soltas
+        partes = consulta.replace('"', " ").split()
+    clausulas = []
+    for parte in partes:
+        termos = tokenizar(parte)
+        if termos:
+            clausulas.append(termos)
+    return clausulas
+
+
+class ComentarioEncontrado(NamedTuple):
+    id_interacao: int
+    id_conteudo: int
+    id_plataforma: int
+    id_usuario: int
+    timestamp: datetime
+    comentario: str
+
+
+class ResultadoBusca(NamedTuple):
+    """Uma página de resultados e as contagens de todos os que casaram com a busca."""
+    total: int
+    pagina: int
+    tamanho_pagina: int
+    por_conteudo: Dict[int, int]
+    por_plataforma: Dict[int, int]
+    comentarios: List[ComentarioEncontrado]
+
+
+class IndiceComentarios:
+    """
+    Índice invertido dos comment_text não vazios. Cada texto distinto é
+    tokenizado uma única vez (comentários repetidos são comuns) e os
+    termos apontam para os textos que os contêm; as ocorrências de cada
+    texto (interação, conteúdo, plataforma, usuário e instante) ficam em
+    colunas array, na ordem de registro.
+
+    Uma busca intersecta as listas dos termos, confirma as frases na
+    sequência de termos de cada texto candidato e só então percorre as
+    ocorrências, aplicando os filtros de conteúdo, plataforma e intervalo.
+    """
+    def __init__(self):
+        self._id_texto: Dict[str, int] = {}
+        self._textos: List[str] = []
+        self._termos_texto: List[Tuple[str, ...]] = []
+        self._postings: Dict[str, array] = {}          # termo -> ids de texto, crescentes
+        self._ocorrencias: List[array] = []            # id de texto -> linhas abaixo
+        self._texto_linha = array('q')                 # linha -> id de texto
+        self._interacoes = array('q')
+        self._conteudos = array('q')
+        self._plataformas = array('q')
+        self._usuarios = array('q')
+        self._timestamps = array('q')                  # epoch em microssegundos
+
+    def _obter_texto(self, texto: str) -> int:
+        id_texto = self._id_texto.get(texto)
+        if id_texto is None:
+            id_texto = self._id_texto[texto] = len(self._textos)
+            termos = tokenizar(texto)
+            self._textos.append(texto)
+            self._termos_texto.append(termos)
+            self._ocorrencias.append(array('q'))
+            for termo in dict.fromkeys(termos):
+                lista = self._postings.get(termo)
+                if lista is None:
+                    lista = self._postings[termo] = array('q')
+                lista.append(id_texto)
+        return id_texto
+
+    def registrar_valores(self, texto: str, id_interacao: int, id_conteudo: int, id_plataforma: int,
+                          id_usuario: int, instante: int) -> None:
+        if not texto:
+            return
+        id_texto = self._obter_texto(texto)
+        self._ocorrencias[id_texto].append(len(self._interacoes))
+        self._texto_linha.append(id_texto)
+        self._interacoes.append(id_interacao)
+        self._conteudos.append(id_conteudo)
+        self._plataformas.append(id_plataforma)
+        self._usuarios.append(id_usuario)
+        self._timestamps.append(instante)
+
+    def registrar(self, interacao) -> None:
+        """Indexa o comentário de uma interação (Interacao ou visão colunar), se houver."""
+        texto = interacao.comment_text
+        if texto:
+            self.registrar_valores(texto, interacao.id_interacao, interacao.conteudo_associado.id_conteudo,
+                                   interacao.plataforma_interacao.id_plataforma, interacao.id_usuario,
+                                   para_epoch(interacao.timestamp_interacao))
+
+    @classmethod
+    def de_armazenamento(cls, armazenamento) -> "IndiceComentarios":
+        """Constrói o índice percorrendo diretamente as colunas do armazenamento."""
+        indice = cls()
+        pool = armazenamento._pool_comentarios
+        ids_plataforma = [p.id_plataforma for p in armazenamento._lista_plataformas]
+        for linha in zip(armazenamento._comentarios, armazenamento._ids, armazenamento._conteudos,
+                         armazenamento._plataformas, armazenamento._usuarios, armazenamento._timestamps):
+            if linha[0]:    # posição 0 do pool é o texto vazio
+                codigo_texto, id_interacao, id_conteudo, codigo_plataforma, id_usuario, instante = linha
+                indice.registrar_valores(pool[codigo_texto], id_interacao, id_conteudo,
+                                         ids_plataforma[codigo_plataforma], id_usuario, instante)
+        return indice
+
+    @classmethod
+    def de_interacoes(cls, interacoes: Iterable) -> "IndiceComentarios":
+        indice = cls()
+        for interacao in interacoes:
+            indice.registrar(interacao)
+        return indice
+
+    def _textos_candidatos(self, clausulas: Sequence[Tuple[str, ...]]) -> List[int]:
+        termos = {termo for clausula in clausulas for termo in clausula}
+        listas = [self._postings.get(termo) for termo in termos]
+        if not listas or any(lista is None for lista in listas):
+            return []
+        listas.sort(key=len)
+        candidatos = set(listas[0])
+        for lista in listas[1:]:
+            candidatos.intersection_update(lista)
+            if not candidatos:
+                return []
+        frases = [clausula for clausula in clausulas if len(clausula) > 1]
+        if frases:
+            candidatos = {t for t in candidatos
+                          if all(_contem_frase(self._termos_texto[t], frase) for frase in frases)}
+        return sorted(candidatos)
+
+    def buscar(self, consulta: str,
+               ids_conteudos: Iterable[int] = None,
+               ids_plataformas: Iterable[int] = None,
+               inicio: Optional[datetime] = None,
+               fim: Optional[datetime] = None,
+               pagina: int = 1,
+               tamanho_pagina: int = 20) -> ResultadoBusca:
+        """
+        Comentários que contêm todas as palavras e frases (entre aspas) da
+        consulta, sem diferenciar maiúsculas nem acentos, opcionalmente
+        restritos a conteúdos, plataformas e ao intervalo [inicio, fim).
+        Resultados do mais recente ao mais antigo, paginados a partir de 1.
+        """
+        if pagina < 1 or tamanho_pagina < 1:
+            raise ValueError("pagina e tamanho_pagina devem ser ≥ 1.")
+        clausulas = interpretar_consulta(consulta)
+        if not clausulas:
+            raise ValueError("Consulta sem termos pesquisáveis.")
+        conteudos = frozenset(ids_conteudos) if ids_conteudos is not None else None
+        plataformas = frozenset(ids_plataformas) if ids_plataformas is not None else None
+        t0 = para_epoch(inicio) if inicio is not None else None
+        t1 = para_epoch(fim) if fim is not None else None
+
+        linhas = []
+        for id_texto in self._textos_candidatos(clausulas):
+            for linha in self._ocorrencias[id_texto]:
+                if conteudos is not None and self._conteudos[linha] not in conteudos:
+                    continue
+                if plataformas is not None and self._plataformas[linha] not in plataformas:
+                    continue
+                instante = self._timestamps[linha]
+                if (t0 is not None and instante < t0) or (t1 is not None and instante >= t1):
+                    continue
+                linhas.append(linha)
+
+        por_conteudo: Dict[int, int] = {}
+        por_plataforma: Dict[int, int] = {}
+        for linha in linhas:
+            id_conteudo, id_plataforma = self._conteudos[linha], self._plataformas[linha]
+            por_conteudo[id_conteudo] = por_conteudo.get(id_conteudo, 0) + 1
+            por_plataforma[id_plataforma] = por_plataforma.get(id_plataforma, 0) + 1
+
+        # mais recentes primeiro; empates na ordem inversa de registro
+        timestamps = self._timestamps
+        linhas.sort(key=lambda linha: (timestamps[linha], linha), reverse=True)
+        inicio_pagina = (pagina - 1) * tamanho_pagina
+        comentarios = [self._encontrado(linha) for linha in linhas[inicio_pagina:inicio_pagina + tamanho_pagina]]
+        return ResultadoBusca(len(linhas), pagina, tamanho_pagina, por_conteudo, por_plataforma, comentarios)
+
+    def _encontrado(self, linha: int) -> ComentarioEncontrado:
+        return ComentarioEncontrado(self._interacoes[linha], self._conteudos[linha], self._plataformas[linha],
+                                    self._usuarios[linha], de_epoch(self._timestamps[linha]),
+                                    self._textos[self._texto_linha[linha]])
+
+    def __len__(self) -> int:
+        """Quantidade de comentários indexados."""
+        return len(self._interacoes)
+
+    @property
+    def qtd_textos(self) -> int:
+        return len(self._textos)
+
+    @property
+    def qtd_termos(self) -> int:
+        return len(self._postings)
+
+
+def _contem_frase(termos: Tuple[str, ...], frase: Tuple[str, ...]) -> bool:
+    tamanho = len(frase)
+    primeiro = frase[0]
+    for posicao in range(len(termos) - tamanho + 1):
+        if termos[posicao] == primeiro and termos[posicao:posicao + tamanho] == frase:
+            return True
+    return False
@@ -0,0 +1,147 @@
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from entidades.armazenamento import TIPOS_INTERACAO, para_epoch, de_epoch
+from entidades.metricas import TIPOS_ENGAJAMENTO
+
+_ENGAJAMENTO_POR_CODIGO = tuple(int(t in TIPOS_ENGAJAMENTO) for t in TIPOS_INTERACAO)
+_HORA_US = 3600 * 1_000_000
+
+
+class SerieTemporal:
+    """
+    Instantes (epoch em microssegundos) ordenados de um conjunto de interações,
+    com somas prefixadas de engajamento e de tempo assistido. Uma consulta
+    [inicio, fim) custa duas buscas binárias.
+
+    Interações que chegam fora de ordem ficam pendentes e são intercaladas
+    na próxima consulta.
+    """
+    __slots__ = ("_instantes", "_engajamento_acumulado", "_tempo_acumulado", "_pendentes")
+
+    def __init__(self):
+        self._instantes = array('q')
+        self._engajamento_acumulado = array('q', [0])
+        self._tempo_acumulado = array('q', [0])
+        self._pendentes: List[Tuple[int, int, int]] = []
+
+    def adicionar(self, instante: int, engajamento: int, duracao: int) -> None:
+        if self._pendentes or (self._instantes and instante < self._instantes[-1]):
+            self._pendentes.append((instante, engajamento, duracao))
+            return
+        self._instantes.append(instante)
+        self._engajamento_acumulado.append(self._engajamento_acumulado[-1] + engajamento)
+        self._tempo_acumulado.append(self._tempo_acumulado[-1] + (duracao if duracao > 0 else 0))
+
+    def _consolidar(self) -> None:
+        eng, tempo = self._engajamento_acumulado, self._tempo_acumulado
+        eventos = [(self._instantes[n], eng[n + 1] - eng[n], tempo[n + 1] - tempo[n])
+                   for n in range(len(self._instantes))]
+        eventos.extend(self._pendentes)
+        eventos.sort(key=lambda e: e[0])
+        self.__init__()
+        for instante, engajamento, duracao in eventos:
+            self.adicionar(instante, engajamento, duracao)
+
+    def intervalo(self, inicio: int, fim: int) -> Tuple[int, int, int]:
+        """(interações, engajamento, tempo assistido) com inicio ≤ instante < fim."""
+        if self._pendentes:
+            self._consolidar()
+        i = bisect_left(self._instantes, inicio)
+        j = bisect_left(self._instantes, fim)
+        if j <= i:
+            return 0, 0, 0
+        return (j - i,
+                self._engajamento_acumulado[j] - self._engajamento_acumulado[i],
+                self._tempo_acumulado[j] - self._tempo_acumulado[i])
+
+    def __len__(self) -> int:
+        return len(self._instantes) + len(self._pendentes)
+
+
+class IndiceTemporal:
+    """
+    Séries temporais por conteúdo, por usuário e por plataforma (id_plataforma),
+    alimentadas a cada interação registrada.
+    """
+    def __init__(self):
+        self.por_conteudo: Dict[int, SerieTemporal] = {}
+        self.por_usuario: Dict[int, SerieTemporal] = {}
+        self.por_plataforma: Dict[int, SerieTemporal] = {}
+
+    @staticmethod
+    def _serie(mapa: dict, chave) -> SerieTemporal:
+        serie = mapa.get(chave)
+        if serie is None:
+            serie = mapa[chave] = SerieTemporal()
+        return serie
+
+    def registrar_valores(self, id_conteudo: int, id_usuario: int, id_plataforma: int,
+                          instante: int, engajamento: int, duracao: int) -> None:
+        self._serie(self.por_conteudo, id_conteudo).adicionar(instante, engajamento, duracao)
+        self._serie(self.por_usuario, id_usuario).adicionar(instante, engajamento, duracao)
+        self._serie(self.por_plataforma, id_plataforma).adicionar(instante, engajamento, duracao)
+
+    def registrar(self, interacao) -> None:
+        """Indexa uma interação (Interacao ou visão colunar)."""
+        self.registrar_valores(
+            interacao.conteudo_associado.id_conteudo,
+            interacao.id_usuario,
+            interacao.plataforma_interacao.id_plataforma,
+            para_epoch(interacao.timestamp_interacao),
+            int(interacao.tipo_interacao in TIPOS_ENGAJAMENTO),
+            interacao.watch_duration_seconds,
+        )
+
+    @classmethod
+    def de_armazenamento(cls, armazenamento) -> "IndiceTemporal":
+        """Constrói o índice percorrendo diretamente as colunas do armazenamento."""
+        indice = cls()
+        ids_plataforma = [p.id_plataforma for p in armazenamento._lista_plataformas]
+        for id_conteudo, id_usuario, codigo_plataforma, instante, codigo_tipo, duracao in zip(
+                armazenamento._conteudos, armazenamento._usuarios, armazenamento._plataformas,
+                armazenamento._timestamps, armazenamento._tipos, armazenamento._duracoes):
+            indice.registrar_valores(id_conteudo, id_usuario, ids_plataforma[codigo_plataforma],
+                                     instante, _ENGAJAMENTO_POR_CODIGO[codigo_tipo], duracao)
+        return indice
+
+    @classmethod
+    def de_interacoes(cls, interacoes) -> "IndiceTemporal":
+        indice = cls()
+        for interacao in interacoes:
+            indice.registrar(interacao)
+        return indice
+
+    @staticmethod
+    def _consultar(mapa: dict, chave, inicio: datetime, fim: datetime) -> Tuple[int, int, int]:
+        serie = mapa.get(chave)
+        if serie is None:
+            return 0, 0, 0
+        return serie.intervalo(para_epoch(inicio), para_epoch(fim))
+
+    def conteudo(self, id_conteudo: int, inicio: datetime, fim: datetime) -> Tuple[int, int, int]:
+        return self._consultar(self.por_conteudo, id_conteudo, inicio, fim)
+
+    def usuario(self, id_usuario: int, inicio: datetime, fim: datetime) -> Tuple[int, int, int]:
+        return self._consultar(self.por_usuario, id_usuario, inicio, fim)
+
+    def plataforma(self, id_plataforma: int, inicio: datetime, fim: datetime) -> Tuple[int, int, int]:
+        return self._consultar(self.por_plataforma, id_plataforma, inicio, fim)
+
+    def plataforma_por_hora(self, id_plataforma: int,
+                            inicio: datetime, fim: datetime) -> List[Tuple[datetime, int]]:
+        """
+        [(hora, tempo assistido)] para cada hora cheia que intersecta [inicio, fim);
+        a primeira e a última hora são recortadas pelo intervalo.
+        """
+        serie = self.por_plataforma.get(id_plataforma)
+        t0, t1 = para_epoch(inicio), para_epoch(fim)
+        baldes = []
+        hora = t0 - t0 % _HORA_US
+        while hora < t1:
+            tempo = serie.intervalo(max(hora, t0), min(hora + _HORA_US, t1))[2] if serie else 0
+            baldes.append((de_epoch(hora), tempo))
+            hora += _HORA_US
+        return baldes
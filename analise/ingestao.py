@@ -0,0 +1,192 @@
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Sequence
+
+from entidades.interacao import Interacao
+
+# Etapas do processamento de uma linha, na ordem em que o sistema as executa.
+# Uma LinhaPreparada com erro guarda a etapa em que a exceção ocorreu, para que
+# o registro reproduza exatamente os efeitos (plataforma, conteúdo, usuário
+# cadastrados) que o processamento linha a linha teria antes de falhar.
+ETAPA_PLATAFORMA = 1
+ETAPA_ID_CONTEUDO = 2
+ETAPA_NOME_CONTEUDO = 3
+ETAPA_ID_USUARIO = 4
+ETAPA_INTERACAO = 5
+
+# Colunas lidas por preparar_linha; as duas últimas são opcionais no cabeçalho
+COLUNAS_CSV = ("plataforma", "id_conteudo", "nome_conteudo", "id_usuario",
+               "timestamp_interacao", "tipo_interacao", "watch_duration_seconds", "comment_text")
+_VALORES_PADRAO = {"watch_duration_seconds": 0, "comment_text": ""}
+# limite dos caches de PreparadorPosicional por valor bruto
+_MAX_CACHE = 4096
+
+
+class LinhaPreparada(NamedTuple):
+    """Campos de uma linha do CSV já convertidos, sem depender do estado do sistema."""
+    nome_plataforma: Optional[str] = None
+    id_conteudo: Optional[int] = None
+    nome_conteudo: Optional[str] = None
+    id_usuario: Optional[int] = None
+    timestamp: Optional[datetime] = None
+    tipo_interacao: Optional[str] = None
+    duracao: int = 0
+    comentario: str = ""
+    etapa_erro: int = 0
+    erro: Optional[Exception] = None
+    original: Optional[dict] = None    # linha como dict, só quando há erro (quarentena)
+
+
+def _linha_incompleta(colunas: Sequence[str]) -> ValueError:
+    return ValueError(f"Linha incompleta: sem valor para {', '.join(colunas)}.")
+
+
+def preparar_linha(linha: dict) -> LinhaPreparada:
+    """
+    Executa a parte sem estado do processamento de uma linha (leitura das
+    colunas, conversões e validações de Interacao). Erros de ValueError e
+    KeyError são capturados e devolvidos junto com a etapa em que ocorreram.
+    Linhas curtas (colunas lidas como None pelo DictReader) são rejeitadas
+    antes de qualquer cadastro.
+    """
+    faltantes = [coluna for coluna in COLUNAS_CSV if coluna in linha and linha[coluna] is None]
+    if faltantes:
+        return LinhaPreparada(etapa_erro=ETAPA_PLATAFORMA, erro=_linha_incompleta(faltantes))
+    campos = {}
+    etapa = ETAPA_PLATAFORMA
+    try:
+        campos["nome_plataforma"] = linha["plataforma"]
+        etapa = ETAPA_ID_CONTEUDO
+        campos["id_conteudo"] = int(linha["id_conteudo"])
+        etapa = ETAPA_NOME_CONTEUDO
+        campos["nome_conteudo"] = linha["nome_conteudo"]
+        etapa = ETAPA_ID_USUARIO
+        campos["id_usuario"] = int(linha["id_usuario"])
+        etapa = ETAPA_INTERACAO
+        _, timestamp, tipo, duracao, comentario = Interacao.validar_campos(
+            campos["id_usuario"],
+            linha["timestamp_interacao"],
+            linha["tipo_interacao"],
+            linha.get("watch_duration_seconds", 0),
+            linha.get("comment_text", "")
+        )
+    except (ValueError, KeyError) as e:
+        return LinhaPreparada(etapa_erro=etapa, erro=e, **campos)
+    return LinhaPreparada(timestamp=timestamp, tipo_interacao=tipo, duracao=duracao,
+                          comentario=comentario, **campos)
+
+
+class PreparadorPosicional:
+    """
+    Equivalente a csv.DictReader + preparar_linha sobre as listas de
+    csv.reader: as posições das colunas são resolvidas uma vez a partir do
+    cabeçalho e cada campo é convertido uma única vez. Aceita e rejeita
+    exatamente as mesmas linhas, com os mesmos erros e etapas:
+    colunas repetidas no cabeçalho valem pela última ocorrência, linhas
+    curtas são rejeitadas se lhes falta alguma coluna lida e colunas
+    opcionais ausentes do cabeçalho assumem os valores padrão de
+    preparar_linha.
+
+    Tipos de interação, durações e o último timestamp são guardados por
+    valor bruto, evitando refazer a normalização de valores repetidos.
+    """
+    def __init__(self, cabecalho: Sequence[str]):
+        self._cabecalho = list(cabecalho)
+        self._largura = len(self._cabecalho)
+        posicoes = {}
+        for posicao, nome in enumerate(self._cabecalho):
+            posicoes[nome] = posicao
+        # colunas opcionais ausentes apontam para valores padrão acrescentados à linha
+        self._padroes = []
+        for coluna, padrao in _VALORES_PADRAO.items():
+            if coluna not in posicoes:
+                posicoes[coluna] = self._largura + len(self._padroes)
+                self._padroes.append(padrao)
+        # sem uma coluna obrigatória toda linha falha com KeyError; esse caso
+        # raro segue pelo caminho de referência (dict + preparar_linha)
+        self._completo = all(coluna in posicoes for coluna in COLUNAS_CSV)
+        # (coluna, posição) das colunas lidas presentes no cabeçalho, para rejeitar linhas curtas
+        self._posicoes_lidas = [(coluna, posicoes[coluna]) for coluna in COLUNAS_CSV
+                                if posicoes.get(coluna, self._largura) < self._largura]
+        (self._p_plataforma, self._p_id_conteudo, self._p_nome_conteudo, self._p_id_usuario,
+         self._p_timestamp, self._p_tipo, self._p_duracao, self._p_comentario) = (
+            posicoes.get(coluna) for coluna in COLUNAS_CSV)
+        self._tipos = {}
+        self._duracoes = {}
+        self._ultimo_timestamp = (None, None)
+
+    def posicoes_diretas(self) -> Optional[tuple]:
+        """
+        Posições das colunas de COLUNAS_CSV quando todas estão no cabeçalho, ou
+        None se alguma falta (esses casos dependem do tratamento de __call__).
+        """
+        if not self._completo or self._padroes:
+            return None
+        return (self._p_plataforma, self._p_id_conteudo, self._p_nome_conteudo, self._p_id_usuario,
+                self._p_timestamp, self._p_tipo, self._p_duracao, self._p_comentario)
+
+    def _como_dict(self, valores: List[str]) -> dict:
+        """A linha como csv.DictReader a entregaria."""
+        linha = dict(zip(self._cabecalho, valores))
+        if len(valores) < self._largura:
+            for coluna in self._cabecalho[len(valores):]:
+                linha[coluna] = None
+        elif len(valores) > self._largura:
+            linha[None] = valores[self._largura:]
+        return linha
+
+    def __call__(self, valores: List[str]) -> LinhaPreparada:
+        if not self._completo:
+            linha = preparar_linha(self._como_dict(valores))
+            return linha._replace(original=self._como_dict(valores)) if linha.erro else linha
+        original = valores
+        if len(valores) < self._largura:
+            faltantes = [coluna for coluna, posicao in self._posicoes_lidas if posicao >= len(valores)]
+            if faltantes:
+                return LinhaPreparada(etapa_erro=ETAPA_PLATAFORMA, erro=_linha_incompleta(faltantes),
+                                      original=self._como_dict(original))
+            valores = valores + [None] * (self._largura - len(valores))
+        if self._padroes:
+            valores = valores[:self._largura] + self._padroes
+        campos = {}
+        etapa = ETAPA_PLATAFORMA
+        try:
+            campos["nome_plataforma"] = valores[self._p_plataforma]
+            etapa = ETAPA_ID_CONTEUDO
+            campos["id_conteudo"] = int(valores[self._p_id_conteudo])
+            etapa = ETAPA_NOME_CONTEUDO
+            campos["nome_conteudo"] = valores[self._p_nome_conteudo]
+            etapa = ETAPA_ID_USUARIO
+            campos["id_usuario"] = int(valores[self._p_id_usuario])
+            etapa = ETAPA_INTERACAO
+            timestamp = self._timestamp(valores[self._p_timestamp])
+            tipo = self._tipo(valores[self._p_tipo])
+            duracao = self._duracao(valores[self._p_duracao])
+            comentario = valores[self._p_comentario].strip()
+        except ValueError as e:
+            return LinhaPreparada(etapa_erro=etapa, erro=e, original=self._como_dict(original), **campos)
+        return LinhaPreparada(timestamp=timestamp, tipo_interacao=tipo, duracao=duracao,
+                              comentario=comentario, **campos)
+
+    def _timestamp(self, bruto) -> datetime:
+        ultimo_bruto, ultimo = self._ultimo_timestamp
+        if bruto == ultimo_bruto and ultimo is not None:
+            return ultimo
+        timestamp = Interacao._validar_timestamp(bruto)
+        self._ultimo_timestamp = (bruto, timestamp)
+        return timestamp
+
+    def _tipo(self, bruto) -> str:
+        tipo = self._tipos.get(bruto)
+        if tipo is None:
+            tipo = Interacao._validar_tipo(bruto)
+            if len(self._tipos) < _MAX_CACHE:
+                self._tipos[bruto] = tipo
+        return tipo
+
+    def _duracao(self, bruto) -> int:
+        duracao = self._duracoes.get(bruto)
+        if duracao is None:
+            duracao = Interacao._validar_duracao(bruto)
+            if len(self._duracoes) < _MAX_CACHE:
+                self._duracoes[bruto] = duracao
+        return duracao
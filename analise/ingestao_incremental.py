@@ -0,0 +1,209 @@
+import csv
+import glob
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from analise.ingestao import LinhaPreparada
+from analise.ingestao_paralela import dividir_trecho, numerar_fatia, preparar_fatia
+from analise.rejeicoes import ColetorRejeicoes
+from analise import snapshot
+
+VERSAO_CHECKPOINT = 1
+# bytes do início de cada arquivo usados para detectar que ele foi reescrito
+_TAMANHO_ASSINATURA = 64 * 1024
+
+
+def expandir_entradas(entradas: Iterable[str], padrao_diretorio: str = "*.csv") -> List[str]:
+    """
+    Caminhos absolutos dos arquivos indicados por entradas: arquivos,
+    diretórios (os arquivos que casam com padrao_diretorio) ou padrões glob.
+    Cada grupo é ordenado por nome; repetições são descartadas.
+    """
+    arquivos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            encontrados = sorted(glob.glob(os.path.join(entrada, padrao_diretorio)))
+        elif glob.has_magic(entrada):
+            encontrados = sorted(glob.glob(entrada))
+        else:
+            encontrados = [entrada]
+        arquivos.extend(os.path.abspath(c) for c in encontrados if os.path.isfile(c))
+    return list(dict.fromkeys(arquivos))
+
+
+def _assinatura(f, tamanho: int) -> str:
+    f.seek(0)
+    return hashlib.sha256(f.read(tamanho)).hexdigest()
+
+
+def _contar_linhas(f, fim: int) -> int:
+    """Quebras de linha em [0, fim) (checkpoints antigos não guardam a contagem)."""
+    f.seek(0)
+    linhas = 0
+    while f.tell() < fim:
+        linhas += f.read(min(1024 * 1024, fim - f.tell())).count(b"\n")
+    return linhas
+
+
+def _fim_ultima_linha(f, inicio: int, tamanho: int) -> int:
+    """Posição logo após a última quebra de linha em [inicio, tamanho), ou inicio se não houver."""
+    fim = tamanho
+    while fim > inicio:
+        bloco = max(inicio, fim - 64 * 1024)
+        f.seek(bloco)
+        posicao = f.read(fim - bloco).rfind(b"\n")
+        if posicao >= 0:
+            return bloco + posicao + 1
+        fim = bloco
+    return inicio
+
+
+class GerenciadorIngestao:
+    """
+    Ingestão incremental de vários CSVs (ex.: exportações horárias que
+    crescem só por acréscimo). Um checkpoint guarda, por arquivo, o
+    cabeçalho, até que byte (e linha) já foi processado e uma assinatura do
+    início do arquivo; cada execução de ingerir processa apenas arquivos novos e
+    os trechos acrescentados desde a anterior, atualizando os agregados do
+    sistema como qualquer outra ingestão.
+
+    Só linhas completas (terminadas em quebra de linha) são consumidas: a
+    última linha de um arquivo ainda em gravação fica para a execução
+    seguinte. Arquivos encolhidos ou com o início alterado são reportados
+    como "reescrito" e não são reprocessados, pois as interações já
+    registradas não podem ser desfeitas. Campos entre aspas com quebra de
+    linha não são suportados (como na ingestão paralela).
+
+    Com diretorio_estado, o sistema (snapshot) e o checkpoint são gravados
+    juntos ao fim de cada ingerir e recarregados na criação do gerenciador;
+    sem ele, o estado vive apenas na instância.
+    """
+    ARQUIVO_CHECKPOINT = "checkpoint.json"
+    ARQUIVO_SNAPSHOT = "sistema.snapshot"
+
+    def __init__(self, diretorio_estado: Optional[str] = None, classe_sistema=None):
+        if classe_sistema is None:
+            from analise.sistema import SistemaAnaliseEngajamento
+            classe_sistema = SistemaAnaliseEngajamento
+        self.diretorio_estado = diretorio_estado
+        self.arquivos: Dict[str, dict] = {}
+        self.sistema = None
+        if diretorio_estado is not None:
+            os.makedirs(diretorio_estado, exist_ok=True)
+            self._carregar_estado(classe_sistema)
+        if self.sistema is None:
+            self.sistema = classe_sistema(armazenamento_colunar=True)
+
+    def _caminho(self, nome: str) -> str:
+        return os.path.join(self.diretorio_estado, nome)
+
+    def _carregar_estado(self, classe_sistema) -> None:
+        try:
+            with open(self._caminho(self.ARQUIVO_CHECKPOINT), encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except FileNotFoundError:
+            return
+        if checkpoint.get("versao") != VERSAO_CHECKPOINT:
+            raise ValueError("Checkpoint de versão incompatível.")
+        caminho_snapshot = self._caminho(self.ARQUIVO_SNAPSHOT)
+        gravada = checkpoint.get("snapshot")
+        # o checkpoint só vale junto do snapshot gravado na mesma execução
+        if gravada is None or not os.path.exists(caminho_snapshot):
+            raise ValueError("Checkpoint sem o snapshot correspondente; apague o diretório de estado "
+                             "para reprocessar do início.")
+        atual = snapshot.impressao_digital(caminho_snapshot)
+        if (atual["tamanho"], atual["mtime_ns"]) != (gravada["tamanho"], gravada["mtime_ns"]):
+            raise ValueError("Snapshot alterado depois do checkpoint; estado inconsistente.")
+        self.sistema = classe_sistema.carregar_snapshot(caminho_snapshot)
+        self.arquivos = checkpoint["arquivos"]
+
+    def salvar(self) -> None:
+        """Grava o snapshot do sistema e, em seguida, o checkpoint que o referencia."""
+        if self.diretorio_estado is None:
+            return
+        caminho_snapshot = self._caminho(self.ARQUIVO_SNAPSHOT)
+        self.sistema.salvar_snapshot(caminho_snapshot)
+        checkpoint = {
+            "versao": VERSAO_CHECKPOINT,
+            "snapshot": snapshot.impressao_digital(caminho_snapshot),
+            "arquivos": self.arquivos,
+        }
+        temporario = self._caminho(self.ARQUIVO_CHECKPOINT + ".tmp")
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f, ensure_ascii=False, indent=1)
+        os.replace(temporario, self._caminho(self.ARQUIVO_CHECKPOINT))
+
+    def _lotes(self, caminho: str, cabecalho: List[str], inicio: int, fim: int,
+               tamanho_fatia_bytes: int, contagem: dict) -> Iterator[List[Tuple[int, LinhaPreparada]]]:
+        """
+        Lotes de pares (linha do arquivo, linha preparada) do trecho [inicio, fim).
+        contagem["linhas"] (linhas antes de inicio) avança a cada fatia consumida.
+        """
+        with open(caminho, "rb") as f:
+            fatias = dividir_trecho(f, inicio, fim, tamanho_fatia_bytes)
+        for ini, fim_fatia in fatias:
+            fatia = preparar_fatia(caminho, ini, fim_fatia, cabecalho)
+            yield numerar_fatia(fatia, contagem["linhas"])
+            contagem["linhas"] += fatia[0]
+
+    def _pendente(self, caminho: str) -> dict:
+        """Situação do arquivo frente ao checkpoint e o trecho ainda não processado."""
+        with open(caminho, "rb") as f:
+            tamanho = os.fstat(f.fileno()).st_size
+            estado = self.arquivos.get(caminho)
+            if estado is None:
+                primeira = f.readline()
+                if not primeira.endswith(b"\n"):
+                    # vazio ou cabeçalho ainda incompleto
+                    return {"situacao": "sem_mudancas", "inicio": 0, "fim": 0}
+                cabecalho = next(csv.reader([primeira.decode("utf-8")]))
+                inicio = f.tell()
+                return {"situacao": "novo", "cabecalho": cabecalho, "inicio": inicio, "linhas": 1,
+                        "fim": _fim_ultima_linha(f, inicio, tamanho)}
+
+            inicio = estado["offset"]
+            tamanho_assinatura = min(inicio, _TAMANHO_ASSINATURA)
+            if tamanho < inicio or _assinatura(f, tamanho_assinatura) != estado["assinatura"]:
+                return {"situacao": "reescrito", "inicio": inicio, "fim": inicio}
+            fim = _fim_ultima_linha(f, inicio, tamanho)
+            linhas = estado.get("linhas")
+            if linhas is None and fim > inicio:
+                linhas = _contar_linhas(f, inicio)
+            return {"situacao": "acrescimo" if fim > inicio else "sem_mudancas",
+                    "cabecalho": estado["cabecalho"], "inicio": inicio, "linhas": linhas, "fim": fim}
+
+    def ingerir(self, entradas: Iterable[str],
+                rejeicoes: ColetorRejeicoes = None,
+                exibir_progresso: bool = False,
+                tamanho_fatia_bytes: int = 16 * 1024 * 1024) -> List[dict]:
+        """
+        Processa o que ainda não foi ingerido dos arquivos indicados por
+        entradas (arquivos, diretórios ou padrões glob, ver expandir_entradas)
+        e grava o estado, se houver diretorio_estado.
+
+        Retorna, por arquivo, {"arquivo", "situacao" ("novo", "acrescimo",
+        "sem_mudancas" ou "reescrito"), "bytes", "linhas", "rejeitadas"}.
+        """
+        if rejeicoes is None:
+            rejeicoes = ColetorRejeicoes()
+        resultado = []
+        for caminho in expandir_entradas(entradas):
+            pendente = self._pendente(caminho)
+            resumo = {"arquivo": caminho, "situacao": pendente["situacao"],
+                      "bytes": pendente["fim"] - pendente["inicio"], "linhas": 0, "rejeitadas": 0}
+            if pendente["fim"] > pendente["inicio"]:
+                contagem = {"linhas": pendente["linhas"]}
+                lotes = self._lotes(caminho, pendente["cabecalho"], pendente["inicio"], pendente["fim"],
+                                    tamanho_fatia_bytes, contagem)
+                ingestao = self.sistema._consumir_lotes(lotes, self.sistema._registrar_linha_preparada,
+                                                        exibir_progresso, rejeicoes)
+                resumo["linhas"], resumo["rejeitadas"] = ingestao["linhas"], ingestao["rejeitadas"]
+                with open(caminho, "rb") as f:
+                    assinatura = _assinatura(f, min(pendente["fim"], _TAMANHO_ASSINATURA))
+                self.arquivos[caminho] = {"cabecalho": pendente["cabecalho"], "offset": pendente["fim"],
+                                          "linhas": contagem["linhas"], "assinatura": assinatura}
+            resultado.append(resumo)
+        self.salvar()
+        return resultado
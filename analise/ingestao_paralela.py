@@ -0,0 +1,92 @@
+import csv
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+from analise.ingestao import LinhaPreparada, PreparadorPosicional
+
+
+def dividir_trecho(f, inicio: int, fim: int, tamanho_fatia_bytes: int) -> List[Tuple[int, int]]:
+    """
+    Divide o trecho [inicio, fim) do arquivo binário f em intervalos de
+    aproximadamente tamanho_fatia_bytes, sempre terminando logo após uma
+    quebra de linha (ou em fim).
+    """
+    if tamanho_fatia_bytes < 1:
+        raise ValueError("tamanho_fatia_bytes deve ser ≥ 1.")
+    fatias = []
+    while inicio < fim:
+        f.seek(min(inicio + tamanho_fatia_bytes, fim))
+        f.readline()
+        corte = min(f.tell(), fim)
+        fatias.append((inicio, corte))
+        inicio = corte
+    return fatias
+
+
+def dividir_csv(caminho_arquivo: str, tamanho_fatia_bytes: int) -> Tuple[Optional[List[str]], List[Tuple[int, int]]]:
+    """
+    Lê o cabeçalho e divide o restante do arquivo em intervalos de bytes
+    [inicio, fim) de aproximadamente tamanho_fatia_bytes, sempre terminando
+    logo após uma quebra de linha.
+    """
+    if tamanho_fatia_bytes < 1:
+        raise ValueError("tamanho_fatia_bytes deve ser ≥ 1.")
+    with open(caminho_arquivo, "rb") as f:
+        primeira = f.readline()
+        if not primeira:
+            return None, []
+        cabecalho = next(csv.reader([primeira.decode("utf-8")]))
+        inicio = f.tell()
+        return cabecalho, dividir_trecho(f, inicio, os.fstat(f.fileno()).st_size, tamanho_fatia_bytes)
+
+
+def preparar_fatia(caminho_arquivo: str, inicio: int, fim: int,
+                   cabecalho: List[str]) -> Tuple[int, List[Tuple[int, LinhaPreparada]]]:
+    """
+    Executado em um processo do pool: converte e valida as linhas de uma
+    fatia. Retorna (quebras de linha na fatia, [(linha relativa à fatia,
+    linha preparada)]), com a linha relativa começando em 1, para quem
+    consome as fatias em ordem numerá-las pelas linhas do arquivo.
+    """
+    with open(caminho_arquivo, "rb") as f:
+        f.seek(inicio)
+        texto = f.read(fim - inicio).decode("utf-8")
+    preparar = PreparadorPosicional(cabecalho)
+    leitor = csv.reader(io.StringIO(texto, newline=""))
+    return texto.count("\n"), [(leitor.line_num, preparar(valores)) for valores in leitor if valores]
+
+
+def numerar_fatia(fatia_preparada: Tuple[int, list], linhas_antes: int) -> List[Tuple[int, LinhaPreparada]]:
+    """Pares (linha do arquivo, linha preparada) de uma fatia precedida por linhas_antes linhas."""
+    return [(linhas_antes + relativa, preparada) for relativa, preparada in fatia_preparada[1]]
+
+
+def preparar_csv_em_paralelo(caminho_arquivo: str, processos: int = None,
+                             tamanho_fatia_bytes: int = 16 * 1024 * 1024
+                             ) -> Iterator[List[Tuple[int, LinhaPreparada]]]:
+    """
+    Entrega as linhas preparadas de cada fatia, na ordem do arquivo, como
+    pares (linha do arquivo, linha preparada). No máximo 2 fatias por
+    processo ficam pendentes ao mesmo tempo, limitando a memória usada
+    pelos resultados ainda não consumidos.
+    """
+    cabecalho, fatias = dividir_csv(caminho_arquivo, tamanho_fatia_bytes)
+    if not fatias:
+        return
+    processos = processos or os.cpu_count() or 1
+    linhas_antes = 1   # o cabeçalho
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        pendentes = deque()
+        for inicio, fim in fatias:
+            pendentes.append(executor.submit(preparar_fatia, caminho_arquivo, inicio, fim, cabecalho))
+            if len(pendentes) >= 2 * processos:
+                fatia = pendentes.popleft().result()
+                yield numerar_fatia(fatia, linhas_antes)
+                linhas_antes += fatia[0]
+        while pendentes:
+            fatia = pendentes.popleft().result()
+            yield numerar_fatia(fatia, linhas_antes)
+            linhas_antes += fatia[0]
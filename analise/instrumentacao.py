@@ -0,0 +1,153 @@
+import cProfile
+import io
+import json
+import pstats
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator
+
+
+class Instrumentacao:
+    """
+    Coleta tempos por etapa, contadores e rejeições por classe de erro
+    durante a ingestão e os relatórios do SistemaAnaliseEngajamento.
+
+    Opcionalmente captura um perfil cProfile (perfil=True) e as alocações
+    via tracemalloc (alocacoes=True) enquanto captura() estiver ativo.
+    Quando o sistema está sem instrumentação nada disto é executado.
+    """
+    def __init__(self, perfil: bool = False, alocacoes: bool = False, top_n: int = 20):
+        self.tempos: Dict[str, float] = defaultdict(float)
+        self.chamadas: Dict[str, int] = defaultdict(int)
+        self.contadores: Dict[str, int] = defaultdict(int)
+        self.rejeicoes: Dict[str, int] = defaultdict(int)
+        # soma dos tempos próprios já registrados, para descontar etapas aninhadas
+        self._tempo_registrado = 0.0
+        self._perfil = cProfile.Profile() if perfil else None
+        self._alocacoes = alocacoes
+        self._retrato_alocacoes = None
+        self._pico_alocacoes = 0
+        self._top_n = top_n
+
+    def envolver(self, etapa: str, funcao: Callable) -> Callable:
+        """
+        Retorna funcao cronometrada, acumulando tempo e chamadas em etapa.
+        O tempo é o próprio da etapa: o de outras etapas cronometradas
+        durante a chamada (ex.: classificação dentro de conteúdo) fica só
+        com elas, e a soma das etapas não passa do tempo total.
+        """
+        tempos, chamadas, relogio = self.tempos, self.chamadas, time.perf_counter
+
+        def cronometrada(*args, **kwargs):
+            registrado = self._tempo_registrado
+            inicio = relogio()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                proprio = relogio() - inicio - (self._tempo_registrado - registrado)
+                tempos[etapa] += proprio
+                self._tempo_registrado += proprio
+                chamadas[etapa] += 1
+        return cronometrada
+
+    def cronometrar_iteracao(self, etapa: str, iteravel: Iterable) -> Iterator:
+        """
+        Cronometra o tempo gasto para obter cada item de iteravel, sem o das
+        etapas cronometradas durante a obtenção (ex.: a preparação das linhas
+        de um lote lido de forma preguiçosa), como em envolver.
+        """
+        iterador = iter(iteravel)
+        relogio = time.perf_counter
+        while True:
+            registrado = self._tempo_registrado
+            inicio = relogio()
+            try:
+                item = next(iterador)
+            except StopIteration:
+                return
+            finally:
+                proprio = relogio() - inicio - (self._tempo_registrado - registrado)
+                self.tempos[etapa] += proprio
+                self._tempo_registrado += proprio
+                self.chamadas[etapa] += 1
+            yield item
+
+    def contar(self, nome: str, quantidade: int = 1) -> None:
+        self.contadores[nome] += quantidade
+
+    def registrar_rejeicao(self, excecao: Exception) -> None:
+        self.rejeicoes[type(excecao).__name__] += 1
+
+    @contextmanager
+    def captura(self):
+        """Ativa cProfile e/ou tracemalloc, se configurados, durante o bloco."""
+        iniciou_tracemalloc = self._alocacoes and not tracemalloc.is_tracing()
+        if iniciou_tracemalloc:
+            tracemalloc.start()
+        if self._perfil is not None:
+            self._perfil.enable()
+        try:
+            yield self
+        finally:
+            if self._perfil is not None:
+                self._perfil.disable()
+            if self._alocacoes and tracemalloc.is_tracing():
+                self._retrato_alocacoes = tracemalloc.take_snapshot()
+                self._pico_alocacoes = max(self._pico_alocacoes, tracemalloc.get_traced_memory()[1])
+                if iniciou_tracemalloc:
+                    tracemalloc.stop()
+
+    def _relatorio_perfil(self) -> list:
+        saida = io.StringIO()
+        estatisticas = pstats.Stats(self._perfil, stream=saida)
+        estatisticas.sort_stats(pstats.SortKey.CUMULATIVE)
+        funcoes = []
+        for (arquivo, linha, nome), (_, chamadas, proprio, acumulado, _) in estatisticas.stats.items():
+            funcoes.append({
+                "funcao": f"{arquivo}:{linha}({nome})",
+                "chamadas": chamadas,
+                "tempo_proprio_seg": proprio,
+                "tempo_acumulado_seg": acumulado,
+            })
+        funcoes.sort(key=lambda f: f["tempo_acumulado_seg"], reverse=True)
+        return funcoes[:self._top_n]
+
+    def _relatorio_alocacoes(self) -> dict:
+        estatisticas = self._retrato_alocacoes.statistics("lineno")[:self._top_n]
+        return {
+            "pico_bytes": self._pico_alocacoes,
+            "principais_origens": [
+                {"origem": str(e.traceback), "bytes": e.size, "blocos": e.count}
+                for e in estatisticas
+            ],
+        }
+
+    def relatorio(self) -> dict:
+        """Relatório estruturado (serializável em JSON) do que foi coletado."""
+        linhas = self.contadores.get("linhas", 0)
+        rejeitadas = sum(self.rejeicoes.values())
+        relatorio = {
+            "etapas": {
+                etapa: {
+                    "segundos": self.tempos[etapa],
+                    "chamadas": self.chamadas[etapa],
+                    "media_us": self.tempos[etapa] / self.chamadas[etapa] * 1e6 if self.chamadas[etapa] else 0.0,
+                }
+                for etapa in self.tempos
+            },
+            "contadores": dict(self.contadores),
+            "linhas_aceitas": linhas - rejeitadas,
+            "linhas_rejeitadas": rejeitadas,
+            "rejeicoes_por_classe": dict(self.rejeicoes),
+        }
+        if self._perfil is not None:
+            relatorio["perfil"] = self._relatorio_perfil()
+        if self._retrato_alocacoes is not None:
+            relatorio["alocacoes"] = self._relatorio_alocacoes()
+        return relatorio
+
+    def salvar_json(self, caminho_arquivo: str) -> None:
+        with open(caminho_arquivo, "w", encoding="utf-8") as f:
+            json.dump(self.relatorio(), f, ensure_ascii=False, indent=2)
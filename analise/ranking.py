@@ -0,0 +1,22 @@
+import heapq
+from typing import Callable, Iterable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def ranquear(itens: Iterable[T],
+             chave: Callable[[T], int],
+             top_n: Optional[int] = None) -> List[Tuple[T, int]]:
+    """
+    Retorna [(item, valor)] em ordem decrescente de chave(item).
+
+    A chave é avaliada uma única vez por item. Com top_n, usa um heap
+    limitado a top_n elementos (O(n log k)); empates mantêm a ordem
+    original dos itens, como em sorted(..., reverse=True)[:top_n].
+    """
+    decorados = ((chave(item), -posicao, item) for posicao, item in enumerate(itens))
+    if top_n is None:
+        ordenados = sorted(decorados, key=lambda d: (d[0], d[1]), reverse=True)
+    else:
+        ordenados = heapq.nlargest(top_n, decorados, key=lambda d: (d[0], d[1]))
+    return [(item, valor) for valor, _, item in ordenados]
@@ -0,0 +1,107 @@
+import json
+from typing import Dict, List, Optional
+
+_PREFIXOS_CONSOLE = {
+    KeyError: "Coluna faltando no CSV",
+}
+
+
+def categoria_erro(erro: Exception) -> str:
+    """
+    Categoria de um erro de ingestão: a classe da exceção e o início fixo da
+    mensagem (antes de ':'), sem o valor que variou de linha para linha.
+    Ex.: "ValueError: Tipo de interação inválido", "KeyError: 'plataforma'".
+    """
+    return f"{type(erro).__name__}: {str(erro).split(':', 1)[0]}"
+
+
+class ColetorRejeicoes:
+    """
+    Coleta as linhas rejeitadas na ingestão agrupadas por categoria, com o
+    número da linha no arquivo (1 = cabeçalho; contam as linhas vazias e,
+    num campo entre aspas com quebra de linha, vale a última linha do
+    registro). Em fluxos sem arquivo, é a posição da linha no fluxo.
+
+    As contagens são sempre exatas. Limites evitam que dados sujos dominem
+    o tempo de ingestão:
+      - exibir_por_categoria: mensagens impressas por categoria (0 = nenhuma);
+        as demais aparecem apenas no resumo;
+      - amostras_por_categoria: registros de exemplo mantidos em memória;
+      - max_quarentena_por_categoria: rejeições gravadas na quarentena por
+        categoria (None = todas).
+
+    Com caminho_quarentena, cada rejeição vira uma linha JSON (numero_linha,
+    categoria, erro e a linha original, quando disponível) e o arquivo é
+    gravado em blocos de tamanho_buffer, não a cada linha.
+    """
+    def __init__(self,
+                 caminho_quarentena: Optional[str] = None,
+                 exibir_por_categoria: int = 3,
+                 amostras_por_categoria: int = 5,
+                 max_quarentena_por_categoria: Optional[int] = None,
+                 tamanho_buffer: int = 10_000):
+        self.caminho_quarentena = caminho_quarentena
+        self._exibir = exibir_por_categoria
+        self._amostras = amostras_por_categoria
+        self._max_quarentena = max_quarentena_por_categoria
+        self._tamanho_buffer = tamanho_buffer
+        self.contagem: Dict[str, int] = {}
+        self.exemplos: Dict[str, List[dict]] = {}
+        self._buffer: List[str] = []
+        self._quarentena_iniciada = False
+        self.total = 0
+
+    def registrar(self, erro: Exception, numero_linha: int, linha=None) -> None:
+        categoria = categoria_erro(erro)
+        quantidade = self.contagem.get(categoria, 0) + 1
+        self.contagem[categoria] = quantidade
+        self.total += 1
+
+        if quantidade <= self._exibir:
+            prefixo = _PREFIXOS_CONSOLE.get(type(erro), "Erro ao processar linha")
+            print(f"{prefixo} (linha {numero_linha}): {erro}")
+        if quantidade <= self._amostras:
+            self.exemplos.setdefault(categoria, []).append(
+                {"numero_linha": numero_linha, "erro": str(erro)})
+        if self.caminho_quarentena is not None and (
+                self._max_quarentena is None or quantidade <= self._max_quarentena):
+            self._buffer.append(json.dumps({
+                "numero_linha": numero_linha,
+                "categoria": categoria,
+                "erro": str(erro),
+                "linha": linha if isinstance(linha, dict) else getattr(linha, "original", None),
+            }, ensure_ascii=False))
+            if len(self._buffer) >= self._tamanho_buffer:
+                self.descarregar()
+
+    def descarregar(self) -> None:
+        """Grava na quarentena as rejeições pendentes no buffer."""
+        if self.caminho_quarentena is None or (not self._buffer and self._quarentena_iniciada):
+            return
+        # a primeira gravação recria o arquivo; as seguintes acrescentam
+        modo = "a" if self._quarentena_iniciada else "w"
+        with open(self.caminho_quarentena, modo, encoding="utf-8") as f:
+            for registro in self._buffer:
+                f.write(registro)
+                f.write("\n")
+        self._buffer.clear()
+        self._quarentena_iniciada = True
+
+    def resumo(self) -> dict:
+        return {
+            "total": self.total,
+            "por_categoria": {
+                categoria: {"quantidade": quantidade, "exemplos": self.exemplos.get(categoria, [])}
+                for categoria, quantidade in sorted(self.contagem.items(), key=lambda c: -c[1])
+            },
+            "quarentena": self.caminho_quarentena,
+        }
+
+    def imprimir_resumo(self) -> None:
+        if not self.total:
+            return
+        print(f"[ingestão] {self.total} linhas rejeitadas:")
+        for categoria, quantidade in sorted(self.contagem.items(), key=lambda c: -c[1]):
+            print(f"  {quantidade:>8}  {categoria}")
+        if self.caminho_quarentena is not None:
+            print(f"  detalhes em {self.caminho_quarentena}")
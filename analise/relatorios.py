@@ -0,0 +1,250 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence
+
+from entidades.armazenamento import ArmazenamentoColunar, TIPOS_INTERACAO, CODIGO_TIPO
+from entidades.conteudo import Video
+from entidades.metricas import TIPOS_ENGAJAMENTO, MetricasPlataforma
+
+# Métricas por conteúdo que o motor sabe calcular
+METRICAS_RELATORIO = ("total_engajamento", "contagem_por_tipo", "tempo_total",
+                      "media_tempo", "percentual_medio_assistido", "comentarios")
+_CODIGO_COMENTARIO = CODIGO_TIPO["comment"]
+
+
+class LinhaRelatorio(NamedTuple):
+    """Métricas de um conteúdo; as não solicitadas ficam None."""
+    id_conteudo: int
+    nome_conteudo: str
+    tipo_conteudo: str                  # 'video', 'podcast' ou 'artigo'
+    total_engajamento: Optional[int] = None
+    contagem_por_tipo: Optional[Dict[str, int]] = None
+    tempo_total: Optional[int] = None
+    media_tempo: Optional[float] = None
+    percentual_medio_assistido: Optional[float] = None   # só vídeos
+    comentarios: Optional[List[str]] = None
+
+
+class ResumoConteudo(NamedTuple):
+    """
+    Acumuladores de um conteúdo, no formato trocado com os processos do pool
+    e produzido por outros backends (ver montar_linhas_relatorio).
+    """
+    contagem_por_tipo: Dict[str, int]
+    total_engajamento: int
+    tempo_total: int
+    media_tempo: float
+    qtd_usuarios_com_tempo: int
+    comentarios: Optional[List[str]]
+
+
+# colunas do armazenamento no processo do pool, recebidas uma vez na criação
+_COLUNAS = None
+
+
+def _iniciar_processo(colunas: dict) -> None:
+    global _COLUNAS
+    _COLUNAS = colunas
+
+
+def _resumir_posicoes(posicoes: Iterable[int], colunas: dict) -> ResumoConteudo:
+    """Acumula as interações de um conteúdo a partir das posições nas colunas."""
+    usuarios, tipos, duracoes = colunas["usuarios"], colunas["tipos"], colunas["duracoes"]
+    pool, comentarios = colunas["pool_comentarios"], colunas["comentarios"]
+    textos = [] if pool is not None else None
+    contagem: Dict[str, int] = {}
+    engajamento = tempo_total = qtd_tempos = 0
+    com_tempo = set()
+    for p in posicoes:
+        codigo = tipos[p]
+        tipo = TIPOS_INTERACAO[codigo]
+        contagem[tipo] = contagem.get(tipo, 0) + 1
+        if tipo in TIPOS_ENGAJAMENTO:
+            engajamento += 1
+        duracao = duracoes[p]
+        if duracao > 0:
+            tempo_total += duracao
+            qtd_tempos += 1
+            com_tempo.add(usuarios[p])
+        if textos is not None and codigo == _CODIGO_COMENTARIO:
+            textos.append(pool[comentarios[p]])
+    media = tempo_total / qtd_tempos if qtd_tempos else 0.0
+    return ResumoConteudo(contagem, engajamento, tempo_total, media, len(com_tempo), textos)
+
+
+def _resumir_fatia(fatia: List[Sequence[int]]) -> List[ResumoConteudo]:
+    """Executado em um processo do pool: resume os conteúdos de uma fatia, na ordem."""
+    return [_resumir_posicoes(posicoes, _COLUNAS) for posicoes in fatia]
+
+
+def _colunas(armazenamento: ArmazenamentoColunar, com_comentarios: bool) -> dict:
+    if armazenamento._somente_leitura:
+        # colunas ainda mapeadas de um snapshot: memoryview não é serializável
+        armazenamento._materializar()
+    return {
+        "usuarios": armazenamento._usuarios,
+        "tipos": armazenamento._tipos,
+        "duracoes": armazenamento._duracoes,
+        "comentarios": armazenamento._comentarios,
+        "pool_comentarios": armazenamento._pool_comentarios if com_comentarios else None,
+    }
+
+
+def _resumir_em_serie(conteudos: List, armazenamento: Optional[ArmazenamentoColunar],
+                      com_usuarios: bool, com_comentarios: bool) -> Iterator[ResumoConteudo]:
+    """Lê os acumuladores de cada conteúdo (reconstruídos só se necessário)."""
+    if com_comentarios and armazenamento is not None:
+        pool, comentarios, tipos = (armazenamento._pool_comentarios, armazenamento._comentarios,
+                                    armazenamento._tipos)
+    for conteudo in conteudos:
+        metricas = conteudo._obter_metricas()
+        textos = None
+        if com_comentarios:
+            # os acumuladores já dizem se há comentários a procurar
+            if not metricas.contagem_por_tipo.get("comment"):
+                textos = []
+            elif armazenamento is not None:
+                textos = [pool[comentarios[p]] for p in conteudo._interacoes._indices
+                          if tipos[p] == _CODIGO_COMENTARIO]
+            else:
+                textos = conteudo.listar_comentarios()
+        yield ResumoConteudo(metricas.contagem_por_tipo, metricas.total_engajamento, metricas.tempo_total,
+                      metricas.media_tempo,
+                      metricas.qtd_usuarios_com_tempo() if com_usuarios else 0, textos)
+
+
+def _resumir_em_paralelo(conteudos: List, armazenamento: ArmazenamentoColunar,
+                         com_comentarios: bool, processos: int) -> Iterator[ResumoConteudo]:
+    """
+    Divide os conteúdos em fatias (cerca de 4 por processo) e resume cada
+    fatia em um processo do pool a partir das colunas do armazenamento.
+    """
+    qtd_fatias = processos * 4
+    tamanho = max(1, math.ceil(len(conteudos) / qtd_fatias))
+    fatias = [[c._interacoes._indices for c in conteudos[n:n + tamanho]]
+              for n in range(0, len(conteudos), tamanho)]
+    # as colunas vão pelo initializer: uma cópia por processo (nenhuma com fork)
+    with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_processo,
+                             initargs=(_colunas(armazenamento, com_comentarios),)) as executor:
+        for resultado in executor.map(_resumir_fatia, fatias):
+            yield from resultado
+
+
+def validar_metricas(metricas: Iterable[str]) -> tuple:
+    metricas = tuple(metricas)
+    invalidas = [m for m in metricas if m not in METRICAS_RELATORIO]
+    if invalidas:
+        raise ValueError(f"Métricas desconhecidas: {', '.join(invalidas)}")
+    return metricas
+
+
+def gerar_relatorio_metricas(conteudos: Iterable,
+                             armazenamento: Optional[ArmazenamentoColunar] = None,
+                             metricas: Iterable[str] = METRICAS_RELATORIO,
+                             processos: Optional[int] = 1) -> List[LinhaRelatorio]:
+    """
+    Calcula as métricas pedidas para todos os conteúdos de uma vez e devolve
+    uma LinhaRelatorio por conteúdo, na ordem recebida, para quem for exibir.
+
+    Com processos=1 (padrão), lê os acumuladores de cada conteúdo. Com
+    processos > 1 (None = um por CPU) e armazenamento colunar, os conteúdos
+    são divididos em fatias resumidas em paralelo direto das colunas (no
+    modo de objetos o cálculo é sempre em série). O cálculo paralelo é
+    sempre exato, mesmo para conteúdos em modo de métricas aproximadas.
+    """
+    metricas = validar_metricas(metricas)
+    conteudos = list(conteudos)
+    com_comentarios = "comentarios" in metricas
+
+    processos = processos or os.cpu_count() or 1
+    if processos > 1 and armazenamento is not None and conteudos:
+        resumos = _resumir_em_paralelo(conteudos, armazenamento, com_comentarios, processos)
+    else:
+        resumos = _resumir_em_serie(conteudos, armazenamento,
+                                    "percentual_medio_assistido" in metricas, com_comentarios)
+
+    return montar_linhas_relatorio(conteudos, resumos, metricas)
+
+
+def montar_linhas_relatorio(conteudos: Iterable, resumos: Iterable[ResumoConteudo],
+                            metricas: Sequence[str]) -> List[LinhaRelatorio]:
+    """Uma LinhaRelatorio por conteúdo, com o resumo na mesma posição, só com as métricas pedidas."""
+    # uma flag por métrica evita consultar a lista de métricas a cada conteúdo
+    (com_engajamento, com_contagem, com_tempo, com_media, com_percentual,
+     com_comentarios) = (m in metricas for m in METRICAS_RELATORIO)
+    linhas = []
+    for conteudo, resumo in zip(conteudos, resumos):
+        percentual = None
+        if com_percentual and isinstance(conteudo, Video):
+            percentual = conteudo.percentual_assistido(resumo.tempo_total, resumo.qtd_usuarios_com_tempo)
+        linhas.append(LinhaRelatorio(
+            conteudo.id_conteudo, conteudo.nome_conteudo, type(conteudo).__name__.lower(),
+            resumo.total_engajamento if com_engajamento else None,
+            dict(resumo.contagem_por_tipo) if com_contagem else None,
+            resumo.tempo_total if com_tempo else None,
+            resumo.media_tempo if com_media else None,
+            percentual,
+            resumo.comentarios if com_comentarios else None,
+        ))
+    return linhas
+
+
+class LinhaComparacaoPlataforma(NamedTuple):
+    """Indicadores de uma plataforma; participações são relativas às plataformas comparadas."""
+    id_plataforma: int
+    nome_plataforma: str
+    total_interacoes: int
+    contagem_por_tipo: Dict[str, int]
+    total_engajamento: int
+    taxa_engajamento: float             # % das interações que são like/share/comment
+    tempo_total: int
+    media_tempo: float                  # por interação com duração > 0
+    usuarios_unicos: int
+    conteudos_unicos: int
+    tempo_por_usuario: float
+    participacao_interacoes: float      # %
+    participacao_tempo: float           # %
+
+
+# Campos numéricos aceitos em ordenar_por
+CAMPOS_ORDENACAO_PLATAFORMAS = ("total_interacoes", "total_engajamento", "taxa_engajamento", "tempo_total",
+                                "media_tempo", "usuarios_unicos", "conteudos_unicos", "tempo_por_usuario")
+
+
+def _percentual(parte: float, total: float) -> float:
+    return round(parte / total * 100, 2) if total else 0.0
+
+
+def comparar_plataformas(plataformas: Iterable, rollups: Dict[int, MetricasPlataforma],
+                         ordenar_por: Optional[str] = None) -> List[LinhaComparacaoPlataforma]:
+    """
+    Uma LinhaComparacaoPlataforma por plataforma, calculada só a partir dos
+    rollups {id_plataforma: MetricasPlataforma}, sem percorrer interações.
+    Na ordem recebida ou, com ordenar_por, em ordem decrescente do campo
+    (empates mantêm a ordem recebida).
+    """
+    if ordenar_por is not None and ordenar_por not in CAMPOS_ORDENACAO_PLATAFORMAS:
+        raise ValueError(f"Campo de ordenação inválido: {ordenar_por}. "
+                         f"Use um de: {', '.join(CAMPOS_ORDENACAO_PLATAFORMAS)}")
+    plataformas = list(plataformas)
+    vazio = MetricasPlataforma()
+    selecionados = [(p, rollups.get(p.id_plataforma, vazio)) for p in plataformas]
+    total_interacoes = sum(r.total_interacoes for _, r in selecionados)
+    total_tempo = sum(r.tempo_total for _, r in selecionados)
+
+    linhas = []
+    for plataforma, rollup in selecionados:
+        interacoes = rollup.total_interacoes
+        usuarios = rollup.qtd_usuarios()
+        linhas.append(LinhaComparacaoPlataforma(
+            plataforma.id_plataforma, plataforma.nome_plataforma, interacoes,
+            dict(rollup.contagem_por_tipo), rollup.total_engajamento,
+            _percentual(rollup.total_engajamento, interacoes), rollup.tempo_total,
+            round(rollup.media_tempo, 2), usuarios, rollup.qtd_conteudos(),
+            round(rollup.tempo_total / usuarios, 2) if usuarios else 0.0,
+            _percentual(interacoes, total_interacoes), _percentual(rollup.tempo_total, total_tempo),
+        ))
+    if ordenar_por is not None:
+        linhas.sort(key=lambda linha: getattr(linha, ordenar_por), reverse=True)
+    return linhas
@@ -0,0 +1,447 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from http import HTTPStatus
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from entidades.armazenamento import TIPOS_INTERACAO
+from analise.rejeicoes import ColetorRejeicoes
+from analise.relatorios import gerar_relatorio_metricas
+
+# Limites de uma requisição HTTP
+_TAMANHO_MAXIMO_CORPO = 64 * 1024
+_TEMPO_LEITURA_SEG = 10.0
+# padrão de ServicoEngajamento.max_itens: maior n do top e maior tamanho de página aceitos
+_MAXIMO_ITENS = 1000
+
+
+class CacheResultados:
+    """
+    Cache LRU de resultados com validade (TTL) e versão dos dados: uma
+    entrada só é devolvida enquanto não expirou e foi calculada sobre a
+    versao_dados atual do sistema. Acima de capacidade entradas, a usada
+    há mais tempo é descartada. Acessado apenas pelo loop de eventos.
+    """
+    def __init__(self, capacidade: int = 1024, ttl_segundos: float = 30.0,
+                 relogio: Callable[[], float] = time.monotonic):
+        if capacidade < 1:
+            raise ValueError("capacidade deve ser ≥ 1.")
+        self.capacidade = capacidade
+        self.ttl_segundos = ttl_segundos
+        self._relogio = relogio
+        self._entradas: "OrderedDict[Any, Tuple[int, float, Any]]" = OrderedDict()
+        self.acertos = self.faltas = self.descartes = 0
+
+    def obter(self, chave, versao: int) -> Tuple[bool, Any]:
+        """(True, valor) se há entrada válida para chave na versão; senão (False, None)."""
+        entrada = self._entradas.get(chave)
+        if entrada is not None:
+            versao_entrada, expira_em, valor = entrada
+            if versao_entrada == versao and self._relogio() < expira_em:
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+                return True, valor
+            del self._entradas[chave]
+        self.faltas += 1
+        return False, None
+
+    def guardar(self, chave, versao: int, valor) -> None:
+        self._entradas[chave] = (versao, self._relogio() + self.ttl_segundos, valor)
+        self._entradas.move_to_end(chave)
+        while len(self._entradas) > self.capacidade:
+            self._entradas.popitem(last=False)
+            self.descartes += 1
+
+    def limpar(self) -> None:
+        self._entradas.clear()
+
+    def estatisticas(self) -> dict:
+        return {"entradas": len(self._entradas), "capacidade": self.capacidade,
+                "ttl_segundos": self.ttl_segundos, "acertos": self.acertos,
+                "faltas": self.faltas, "descartes": self.descartes}
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+
+class TravaLeituraEscrita:
+    """
+    Várias leituras simultâneas ou uma escrita exclusiva. Escritas à espera
+    têm prioridade sobre novas leituras, para a ingestão não ficar parada
+    atrás de um fluxo contínuo de consultas.
+    """
+    def __init__(self):
+        self._condicao = threading.Condition()
+        self._leitores = 0
+        self._escrevendo = False
+        self._escritas_esperando = 0
+
+    @contextmanager
+    def leitura(self):
+        with self._condicao:
+            while self._escrevendo or self._escritas_esperando:
+                self._condicao.wait()
+            self._leitores += 1
+        try:
+            yield
+        finally:
+            with self._condicao:
+                self._leitores -= 1
+                if not self._leitores:
+                    self._condicao.notify_all()
+
+    @contextmanager
+    def escrita(self):
+        with self._condicao:
+            self._escritas_esperando += 1
+            while self._escrevendo or self._leitores:
+                self._condicao.wait()
+            self._escritas_esperando -= 1
+            self._escrevendo = True
+        try:
+            yield
+        finally:
+            with self._condicao:
+                self._escrevendo = False
+                self._condicao.notify_all()
+
+
+# ---------------------------------------------------------------------- consultas
+# Executadas fora do loop de eventos, com a trava de leitura; devolvem valores JSON.
+
+def _top_conteudos(sistema, n: int = 10, tipo: Optional[str] = None) -> list:
+    return [{"posicao": posicao, "id_conteudo": c.id_conteudo, "nome_conteudo": c.nome_conteudo,
+             "tipo_conteudo": type(c).__name__.lower(), "total_engajamento": total}
+            for posicao, (c, total) in enumerate(sistema.ranking_conteudos(n, tipo), 1)]
+
+
+def _metricas_conteudo(sistema, id_conteudo: int) -> dict:
+    conteudo = sistema.obter_conteudo(id_conteudo)
+    if conteudo is None:
+        raise KeyError(f"Conteúdo {id_conteudo} não encontrado.")
+    metricas = ("total_engajamento", "contagem_por_tipo", "tempo_total", "media_tempo",
+                "percentual_medio_assistido")
+    linha = gerar_relatorio_metricas([conteudo], sistema.armazenamento, metricas)[0]
+    resultado = linha._asdict()
+    del resultado["comentarios"]
+    resultado["media_tempo"] = round(linha.media_tempo, 2)
+    return resultado
+
+
+def _atividade_usuario(sistema, id_usuario: int) -> dict:
+    usuario = sistema.obter_usuario(id_usuario)
+    if usuario is None:
+        raise KeyError(f"Usuário {id_usuario} não encontrado.")
+    contagem = {tipo: usuario.contar_interacoes_por_tipo(tipo) for tipo in TIPOS_INTERACAO}
+    return {
+        "id_usuario": usuario.id_usuario,
+        "total_interacoes": usuario.total_interacoes,
+        "contagem_por_tipo": {tipo: qtd for tipo, qtd in contagem.items() if qtd},
+        "tempo_total_consumo": usuario.calcular_tempo_total_consumo(),
+        "conteudos_consumidos": len(usuario.obter_ids_conteudos_consumidos()),
+        "plataformas_mais_frequentes": [p.nome_plataforma for p in usuario.plataformas_mais_frequentes(3)],
+    }
+
+
+def _estatisticas_plataformas(sistema, ordenar_por: Optional[str] = None) -> list:
+    return [linha._asdict() for linha in sistema.comparar_plataformas(ordenar_por=ordenar_por)]
+
+
+def _buscar_comentarios(sistema, consulta: str, ids_conteudos: Optional[Tuple[int, ...]] = None,
+                        ids_plataformas: Optional[Tuple[int, ...]] = None, inicio: Optional[datetime] = None,
+                        fim: Optional[datetime] = None, pagina: int = 1, tamanho_pagina: int = 20) -> dict:
+    resultado = sistema.buscar_comentarios(consulta, ids_conteudos, ids_plataformas, inicio, fim,
+                                           pagina, tamanho_pagina)
+    return {
+        "total": resultado.total,
+        "pagina": resultado.pagina,
+        "tamanho_pagina": resultado.tamanho_pagina,
+        "por_conteudo": resultado.por_conteudo,
+        "por_plataforma": resultado.por_plataforma,
+        "comentarios": [dict(c._asdict(), timestamp=c.timestamp.isoformat()) for c in resultado.comentarios],
+    }
+
+
+def _contagens(sistema) -> dict:
+    return {"conteudos": len(sistema.listar_conteudos()), "usuarios": len(sistema.listar_usuarios()),
+            "plataformas": len(sistema.listar_plataformas())}
+
+
+# {nome: função(sistema, **parametros) -> valor JSON}
+CONSULTAS: Dict[str, Callable[..., Any]] = {
+    "top_conteudos": _top_conteudos,
+    "metricas_conteudo": _metricas_conteudo,
+    "atividade_usuario": _atividade_usuario,
+    "estatisticas_plataformas": _estatisticas_plataformas,
+    "buscar_comentarios": _buscar_comentarios,
+    "contagens": _contagens,
+}
+
+
+class ServicoEngajamento:
+    """
+    Serviço assíncrono sobre um SistemaAnaliseEngajamento: consultas (ver
+    CONSULTAS) e ingestão rodam em um pool de threads, fora do loop de
+    eventos, e os resultados ficam em um CacheResultados invalidado quando
+    versao_dados muda. Consultas iguais simultâneas são calculadas uma vez.
+
+    Consultas compartilham a trava de leitura; a ingestão (ingerir) toma a
+    trava de escrita a cada lote, então consultas e ingestão se intercalam
+    lote a lote. Ingestões feitas diretamente no sistema, fora de ingerir,
+    não passam pela trava e não devem rodar com o serviço ativo.
+
+    servir(host, porta) expõe o serviço em HTTP/JSON (ver _ROTAS):
+      GET  /status
+      GET  /conteudos/top?n=10&tipo=video
+      GET  /conteudos/<id_conteudo>
+      GET  /usuarios/<id_usuario>
+      GET  /plataformas?ordenar_por=tempo_total
+      GET  /comentarios?q="muito bom"&conteudo=1,2&plataforma=3
+                        &inicio=2024-01-01&fim=2024-02-01&pagina=1&tamanho=20
+      POST /ingestao      {"caminho": "arquivo.csv"}
+
+    POST /ingestao só lê arquivos dentro de diretorio_ingestao (caminho
+    relativo, sem '..', conferido após resolver links) e fica desabilitado
+    sem ele. As respostas de ingestão e de erro interno não repetem valores
+    lidos do arquivo: só contagens e categorias de rejeição. n do top e
+    tamanho da página de comentários acima de max_itens respondem 400.
+    """
+    def __init__(self, sistema, cache: CacheResultados = None, max_threads: int = None,
+                 diretorio_ingestao: Optional[str] = None, max_itens: int = _MAXIMO_ITENS):
+        if max_itens < 1:
+            raise ValueError("max_itens deve ser ≥ 1.")
+        self.sistema = sistema
+        self.max_itens = max_itens
+        self.diretorio_ingestao = None if diretorio_ingestao is None else os.path.realpath(diretorio_ingestao)
+        self.cache = cache if cache is not None else CacheResultados()
+        self._executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="servico")
+        self._trava = TravaLeituraEscrita()
+        self._versao_cache = sistema.versao_dados
+        self._em_andamento: Dict[tuple, asyncio.Future] = {}
+        self._ingestao: Optional[asyncio.Lock] = None
+
+    def fechar(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    # ------------------------------------------------------------------ API assíncrona
+
+    async def consultar(self, nome: str, **parametros):
+        """
+        Resultado da consulta CONSULTAS[nome] com os parâmetros, do cache
+        quando ainda válido. O valor devolvido é compartilhado com o cache
+        e não deve ser alterado.
+        """
+        funcao = CONSULTAS.get(nome)
+        if funcao is None:
+            raise ValueError(f"Consulta desconhecida: {nome}")
+        chave = (nome, tuple(sorted(parametros.items())))
+        versao = self.sistema.versao_dados
+        if versao != self._versao_cache:
+            # dados novos: nenhuma entrada do cache vale mais
+            self.cache.limpar()
+            self._versao_cache = versao
+        achou, valor = self.cache.obter(chave, versao)
+        if achou:
+            return valor
+
+        tarefa = self._em_andamento.get((chave, versao))
+        if tarefa is None:
+            tarefa = asyncio.ensure_future(self._calcular(chave, funcao, parametros))
+            self._em_andamento[(chave, versao)] = tarefa
+            tarefa.add_done_callback(lambda _: self._em_andamento.pop((chave, versao), None))
+        # shield: o cancelamento de um requisitante não interrompe os demais
+        return await asyncio.shield(tarefa)
+
+    async def _calcular(self, chave, funcao, parametros: dict):
+        loop = asyncio.get_running_loop()
+        versao, valor = await loop.run_in_executor(self._executor, self._ler, funcao, parametros)
+        self.cache.guardar(chave, versao, valor)
+        return valor
+
+    def _ler(self, funcao, parametros: dict):
+        with self._trava.leitura():
+            # versão lida sob a trava: é a dos dados usados no cálculo
+            return self.sistema.versao_dados, funcao(self.sistema, **parametros)
+
+    async def ingerir(self, caminho_arquivo: str, tamanho_lote: int = 10_000,
+                      rejeicoes: ColetorRejeicoes = None) -> dict:
+        """
+        Ingere um CSV fora do loop de eventos, intercalando lotes com as
+        consultas. Ingestões simultâneas são executadas uma após a outra.
+        """
+        if self._ingestao is None:
+            self._ingestao = asyncio.Lock()
+        if rejeicoes is None:
+            rejeicoes = ColetorRejeicoes(exibir_por_categoria=0)
+        async with self._ingestao:
+            loop = asyncio.get_running_loop()
+            resumo = await loop.run_in_executor(self._executor, self._escrever, caminho_arquivo,
+                                                tamanho_lote, rejeicoes)
+        return {"arquivo": caminho_arquivo, "linhas": resumo["linhas"], "rejeitadas": resumo["rejeitadas"],
+                "segundos": round(resumo["segundos"], 3),
+                "rejeicoes": dict(sorted(rejeicoes.contagem.items(), key=lambda c: -c[1])),
+                "versao_dados": self.sistema.versao_dados}
+
+    def _escrever(self, caminho_arquivo: str, tamanho_lote: int, rejeicoes: ColetorRejeicoes) -> dict:
+        return self.sistema._consumir_csv(caminho_arquivo, tamanho_lote, False, rejeicoes,
+                                          self._lotes_exclusivos)
+
+    def _lotes_exclusivos(self, lotes):
+        # cada lote é registrado com a trava de escrita; a leitura do CSV fica fora dela
+        for lote in lotes:
+            lote = list(lote)
+            with self._trava.escrita():
+                yield lote
+
+    def _caminho_ingestao(self, relativo: str) -> str:
+        """Caminho absoluto de um arquivo pedido via HTTP, restrito a diretorio_ingestao."""
+        if self.diretorio_ingestao is None:
+            raise _ErroHTTP(HTTPStatus.FORBIDDEN, "Ingestão via HTTP desabilitada (sem diretório de ingestão).")
+        partes = relativo.replace("\\", "/").split("/")
+        if not relativo or os.path.isabs(relativo) or ".." in partes:
+            raise _ErroHTTP(HTTPStatus.FORBIDDEN, "Caminho deve ser relativo ao diretório de ingestão, sem '..'.")
+        caminho = os.path.realpath(os.path.join(self.diretorio_ingestao, relativo))
+        if os.path.commonpath((self.diretorio_ingestao, caminho)) != self.diretorio_ingestao:
+            raise _ErroHTTP(HTTPStatus.FORBIDDEN, "Caminho fora do diretório de ingestão.")
+        if not os.path.isfile(caminho):
+            raise _ErroHTTP(HTTPStatus.NOT_FOUND, f"Arquivo não encontrado: {relativo}")
+        return caminho
+
+    async def status(self) -> dict:
+        return {"versao_dados": self.sistema.versao_dados, **(await self.consultar("contagens")),
+                "cache": self.cache.estatisticas()}
+
+    # ------------------------------------------------------------------ HTTP
+
+    async def servir(self, host: str = "127.0.0.1", porta: int = 8080) -> None:
+        """Atende requisições HTTP até ser cancelado."""
+        servidor = await asyncio.start_server(self._atender, host, porta)
+        enderecos = ", ".join(f"{s.getsockname()[0]}:{s.getsockname()[1]}" for s in servidor.sockets)
+        print(f"[serviço] ouvindo em {enderecos}", file=sys.stderr)
+        async with servidor:
+            await servidor.serve_forever()
+
+    async def _rota(self, metodo: str, caminho: str, consulta: dict, corpo: bytes):
+        partes = [p for p in caminho.split("/") if p]
+        if metodo == "POST":
+            if partes == ["ingestao"]:
+                dados = json.loads(corpo or b"{}")
+                if not isinstance(dados, dict) or not isinstance(dados.get("caminho"), str):
+                    raise ValueError('Corpo deve ser {"caminho": "<arquivo.csv>"}.')
+                caminho_arquivo = self._caminho_ingestao(dados["caminho"])
+                try:
+                    resultado = await self.ingerir(caminho_arquivo)
+                except (OSError, ValueError) as e:
+                    # ex.: arquivo ilegível ou com bytes inválidos; a mensagem pode trazer trechos dele
+                    print(f"[serviço] ingestão falhou: {type(e).__name__}: {e}", file=sys.stderr)
+                    raise _ErroHTTP(HTTPStatus.UNPROCESSABLE_ENTITY,
+                                    f"Falha ao ler {dados['caminho']} ({type(e).__name__}).")
+                # o caminho resolvido não volta ao cliente
+                resultado["arquivo"] = dados["caminho"]
+                return resultado
+        elif metodo == "GET":
+            if partes == ["status"]:
+                return await self.status()
+            if partes == ["plataformas"]:
+                return await self.consultar("estatisticas_plataformas", ordenar_por=consulta.get("ordenar_por"))
+            if partes == ["comentarios"]:
+                return await self.consultar(
+                    "buscar_comentarios", consulta=consulta.get("q", ""),
+                    ids_conteudos=_lista_ids(consulta.get("conteudo")),
+                    ids_plataformas=_lista_ids(consulta.get("plataforma")),
+                    inicio=_instante(consulta.get("inicio")), fim=_instante(consulta.get("fim")),
+                    pagina=int(consulta.get("pagina", 1)),
+                    tamanho_pagina=_inteiro_limitado(consulta, "tamanho", 20, self.max_itens))
+            if partes == ["conteudos", "top"]:
+                n = _inteiro_limitado(consulta, "n", 10, self.max_itens)
+                return await self.consultar("top_conteudos", n=n, tipo=consulta.get("tipo"))
+            if len(partes) == 2 and partes[0] == "conteudos":
+                return await self.consultar("metricas_conteudo", id_conteudo=int(partes[1]))
+            if len(partes) == 2 and partes[0] == "usuarios":
+                return await self.consultar("atividade_usuario", id_usuario=int(partes[1]))
+        else:
+            raise _ErroHTTP(HTTPStatus.METHOD_NOT_ALLOWED, f"Método não suportado: {metodo}")
+        raise _ErroHTTP(HTTPStatus.NOT_FOUND, f"Rota não encontrada: {metodo} {caminho}")
+
+    async def _atender(self, leitor: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+        try:
+            try:
+                metodo, alvo, corpo = await asyncio.wait_for(_ler_requisicao(leitor), _TEMPO_LEITURA_SEG)
+                url = urlsplit(alvo)
+                consulta = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                situacao, resposta = HTTPStatus.OK, await self._rota(metodo, url.path, consulta, corpo)
+            except _ErroHTTP as e:
+                situacao, resposta = e.situacao, {"erro": e.mensagem}
+            except KeyError as e:
+                situacao, resposta = HTTPStatus.NOT_FOUND, {"erro": e.args[0] if e.args else str(e)}
+            except ValueError as e:
+                situacao, resposta = HTTPStatus.BAD_REQUEST, {"erro": str(e)}
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+                return
+            except Exception as e:
+                # detalhes (que podem conter valores do CSV) só no log do servidor
+                print(f"[serviço] erro interno: {type(e).__name__}: {e}", file=sys.stderr)
+                situacao, resposta = HTTPStatus.INTERNAL_SERVER_ERROR, {"erro": f"Erro interno ({type(e).__name__})."}
+            conteudo = json.dumps(resposta, ensure_ascii=False).encode("utf-8")
+            escritor.write(
+                f"HTTP/1.1 {situacao.value} {situacao.phrase}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(conteudo)}\r\n"
+                f"Connection: close\r\n\r\n".encode("ascii") + conteudo)
+            await escritor.drain()
+        finally:
+            escritor.close()
+
+
+def _lista_ids(valor: Optional[str]) -> Optional[Tuple[int, ...]]:
+    """"1,2,3" -> (1, 2, 3); tupla para servir de chave do cache."""
+    if valor is None:
+        return None
+    return tuple(sorted({int(parte) for parte in valor.split(",") if parte.strip()}))
+
+
+def _inteiro_limitado(consulta: dict, nome: str, padrao: int, maximo: int) -> int:
+    """Parâmetro inteiro da consulta entre 1 e maximo (ValueError, e 400, fora disso)."""
+    valor = int(consulta.get(nome, padrao))
+    if not 1 <= valor <= maximo:
+        raise ValueError(f"{nome} deve estar entre 1 e {maximo}.")
+    return valor
+
+
+def _instante(valor: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(valor) if valor else None
+
+
+class _ErroHTTP(Exception):
+    def __init__(self, situacao: HTTPStatus, mensagem: str):
+        super().__init__(mensagem)
+        self.situacao = situacao
+        self.mensagem = mensagem
+
+
+async def _ler_requisicao(leitor: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+    """(método, alvo, corpo) de uma requisição HTTP/1.x."""
+    linha = (await leitor.readline()).decode("latin-1").split()
+    if len(linha) != 3:
+        raise _ErroHTTP(HTTPStatus.BAD_REQUEST, "Linha de requisição inválida.")
+    metodo, alvo, _ = linha
+    tamanho = 0
+    while True:
+        cabecalho = (await leitor.readline()).decode("latin-1").strip()
+        if not cabecalho:
+            break
+        nome, _, valor = cabecalho.partition(":")
+        if nome.strip().lower() == "content-length":
+            tamanho = int(valor)
+    if tamanho > _TAMANHO_MAXIMO_CORPO:
+        raise _ErroHTTP(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Corpo da requisição muito grande.")
+    corpo = await leitor.readexactly(tamanho) if tamanho else b""
+    return metodo.upper(), alvo, corpo
@@ -1,8 +1,42 @@
+import asyncio
 import csv
+import time
+from contextlib import nullcontext
+from datetime import datetime
+from itertools import chain, islice
+from typing import Iterable, Iterator, Optional
 from entidades.plataforma import Plataforma
 from entidades.usuario import Usuario
 from entidades.conteudo import Conteudo, Video, Podcast, Artigo
 from entidades.interacao import Interacao
+from entidades.armazenamento import ArmazenamentoColunar, InteracaoColunar, para_epoch
+from entidades.metricas import MetricasConteudo, MetricasAproximadas, MetricasPlataforma
+from entidades.sketches import HyperLogLog, KLL
+from analise.ranking import ranquear
+from analise.ingestao import (
+    LinhaPreparada, PreparadorPosicional, preparar_linha, ETAPA_PLATAFORMA, ETAPA_ID_CONTEUDO,
+    ETAPA_NOME_CONTEUDO, ETAPA_ID_USUARIO, ETAPA_INTERACAO,
+)
+from analise.ingestao_paralela import preparar_csv_em_paralelo
+from analise import snapshot
+from analise.indice_temporal import IndiceTemporal
+from analise.indice_comentarios import IndiceComentarios, ResultadoBusca
+from analise.tempo_real import AgregadorJanelas
+from analise.instrumentacao import Instrumentacao
+from analise.rejeicoes import ColetorRejeicoes
+from analise.coconsumo import MotorCoconsumo
+from analise.relatorios import (LinhaComparacaoPlataforma, LinhaRelatorio, METRICAS_RELATORIO,
+                                comparar_plataformas, gerar_relatorio_metricas)
+
+def _em_lotes(linhas: Iterator, tamanho_lote: int) -> Iterator[Iterator]:
+    """
+    Divide linhas em lotes de até tamanho_lote, cada um um iterador que deve
+    ser consumido antes do próximo. As linhas não ficam retidas em listas,
+    que sobreviveriam às coletas do gc e o fariam varrer o heap mais vezes.
+    """
+    for primeira in linhas:
+        yield chain((primeira,), islice(linhas, tamanho_lote - 1))
+
 
 class SistemaAnaliseEngajamento:
     """
@@ -10,12 +44,125 @@ class SistemaAnaliseEngajamento:
     processa o CSV e gera relatórios de engajamento.
     """
     VERSAO_ANALISE = "2.0"
+    _MAPA_TIPOS = {
+        'video': Video,
+        'podcast': Podcast,
+        'artigo': Artigo,
+    }
+    # Etapas da ingestão cronometradas por habilitar_instrumentacao: {método: etapa}
+    _ETAPAS_INSTRUMENTADAS = {
+        '_preparar_linha': 'preparacao_linha',
+        'obter_plataforma': 'plataforma',
+        '_obter_ou_criar_conteudo': 'conteudo',
+        '_criar_conteudo': 'classificacao_conteudo',
+        '_obter_ou_criar_usuario': 'usuario',
+        '_criar_interacao': 'interacao',
+        '_vincular_interacao': 'vinculacao',
+    }
+    _preparar_linha = staticmethod(preparar_linha)
+    _criar_conteudo = staticmethod(Conteudo.criar_por_tipo)
 
-    def __init__(self):
+    def __init__(self, armazenamento_colunar: bool = False, metricas_aproximadas: bool = False):
         self.__plataformas_registradas = {}    # {nome_plataforma: Plataforma}
         self.__conteudos_registrados = {}      # {id_conteudo: Conteudo}
         self.__usuarios_registrados = {}       # {id_usuario: Usuario}
         self.__proximo_id_plataforma = 1
+        # Com armazenamento_colunar=True as interações ficam em colunas compactas
+        # e Conteudo/Usuario guardam apenas as posições (ver entidades.armazenamento)
+        self.__armazenamento = ArmazenamentoColunar() if armazenamento_colunar else None
+        # índice temporal construído na primeira consulta e mantido a partir daí
+        self.__indice_temporal = None
+        self.__instrumentacao = None
+        # Com metricas_aproximadas=True cada Conteudo guarda sketches de tamanho
+        # fixo (HyperLogLog/KLL) no lugar do tempo por usuário
+        self.__metricas_aproximadas = metricas_aproximadas
+        # {nome_plataforma: MetricasAproximadas}, construído na primeira consulta
+        self.__sketches_plataformas = None
+        # {id_plataforma: MetricasPlataforma}, mantido desde a primeira interação
+        self.__rollups_plataformas = {}
+        # índice invertido dos comentários, mantido desde a primeira interação
+        self.__indice_comentarios = IndiceComentarios()
+        # incrementada a cada lote ingerido (ver versao_dados)
+        self.__versao_dados = 0
+
+    @property
+    def armazenamento(self):
+        """ArmazenamentoColunar em uso, ou None no modo de objetos."""
+        return self.__armazenamento
+
+    @property
+    def metricas_aproximadas(self) -> bool:
+        """Se os conteúdos novos usam MetricasAproximadas (ver __init__)."""
+        return self.__metricas_aproximadas
+
+    def _registros(self) -> tuple:
+        """Registros internos (uso restrito ao pacote, ex.: snapshot)."""
+        return (self.__plataformas_registradas, self.__conteudos_registrados,
+                self.__usuarios_registrados, self.__proximo_id_plataforma)
+
+    def _restaurar_registros(self, plataformas: dict, conteudos: dict, usuarios: dict,
+                             proximo_id_plataforma: int, armazenamento, rollups_plataformas: dict,
+                             indice_comentarios: IndiceComentarios) -> None:
+        """Substitui os registros internos (uso restrito ao pacote, ex.: snapshot)."""
+        self.__plataformas_registradas = plataformas
+        self.__conteudos_registrados = conteudos
+        self.__usuarios_registrados = usuarios
+        self.__proximo_id_plataforma = proximo_id_plataforma
+        self.__armazenamento = armazenamento
+        self.__indice_temporal = None
+        self.__sketches_plataformas = None
+        self.__rollups_plataformas = rollups_plataformas
+        self.__indice_comentarios = indice_comentarios
+        self.__versao_dados += 1
+
+    @property
+    def versao_dados(self) -> int:
+        """
+        Muda sempre que novas interações são registradas (a cada lote de
+        ingestão ou linha de consumir_fila); serve de chave de invalidação
+        para caches de resultados (ver analise.servico).
+        """
+        return self.__versao_dados
+
+    def salvar_snapshot(self, caminho_snapshot: str,
+                        caminho_origem: str = None,
+                        calcular_hash: bool = False) -> None:
+        """
+        Grava um snapshot binário colunar do sistema. Com caminho_origem,
+        registra tamanho/mtime (e SHA-256, se calcular_hash) do arquivo de
+        origem para invalidar o snapshot quando ele mudar.
+        """
+        snapshot.salvar(self, caminho_snapshot, caminho_origem, calcular_hash)
+
+    @classmethod
+    def carregar_snapshot(cls, caminho_snapshot: str,
+                          caminho_origem: str = None,
+                          verificar_hash: bool = False):
+        """
+        Carrega um sistema a partir do snapshot, ou retorna None se ele não
+        existir ou estiver desatualizado em relação a caminho_origem.
+        """
+        if not snapshot.snapshot_valido(caminho_snapshot, caminho_origem, verificar_hash):
+            return None
+        return snapshot.carregar(caminho_snapshot, cls)
+
+    @classmethod
+    def carregar_ou_processar_csv(cls, caminho_csv: str,
+                                  caminho_snapshot: str = None,
+                                  verificar_hash: bool = False):
+        """
+        Partida rápida: usa o snapshot de caminho_csv se ainda for válido;
+        caso contrário processa o CSV (modo colunar) e grava um novo snapshot.
+        """
+        caminho_snapshot = caminho_snapshot or caminho_csv + ".snapshot"
+        sistema = cls.carregar_snapshot(caminho_snapshot, caminho_csv, verificar_hash)
+        if sistema is None:
+            digital = snapshot.impressao_digital(caminho_csv)
+            sistema = cls(armazenamento_colunar=True)
+            sistema.processar_interacoes_do_csv(caminho_csv)
+            if snapshot.impressao_digital(caminho_csv) == digital:
+                sistema.salvar_snapshot(caminho_snapshot, caminho_csv, calcular_hash=verificar_hash)
+        return sistema
 
     def cadastrar_plataforma(self, nome_plataforma: str) -> Plataforma:
         if nome_plataforma not in self.__plataformas_registradas:
@@ -31,91 +178,608 @@ class SistemaAnaliseEngajamento:
     def listar_plataformas(self) -> list[Plataforma]:
         return list(self.__plataformas_registradas.values())
 
+    def obter_conteudo(self, id_conteudo: int) -> Optional[Conteudo]:
+        return self.__conteudos_registrados.get(id_conteudo)
+
+    def obter_usuario(self, id_usuario: int) -> Optional[Usuario]:
+        return self.__usuarios_registrados.get(id_usuario)
+
     def listar_conteudos(self) -> list[Conteudo]:
         return list(self.__conteudos_registrados.values())
 
     def listar_usuarios(self) -> list[Usuario]:
         return list(self.__usuarios_registrados.values())
 
-    def _carregar_interacoes_csv(self, caminho_arquivo: str) -> list[dict]:
+    def iterar_interacoes(self) -> Iterator:
+        """
+        Percorre todas as interações registradas. No modo colunar, segue a
+        ordem de ingestão; no modo de objetos, agrupa por conteúdo.
+        """
+        if self.__armazenamento is not None:
+            yield from self.__armazenamento
+        else:
+            for conteudo in self.__conteudos_registrados.values():
+                yield from conteudo._interacoes
+
+    def _iterar_lotes_preparados(self, caminho_arquivo: str,
+                                 tamanho_lote: int) -> Iterator[list[tuple[int, LinhaPreparada]]]:
+        """
+        Lê o CSV de forma preguiçosa, entregando lotes de até tamanho_lote
+        pares (linha do arquivo, linha preparada). Usa csv.reader e
+        PreparadorPosicional, sem montar um dict por linha. Apenas um lote
+        fica em memória por vez.
+        """
+        if tamanho_lote < 1:
+            raise ValueError("tamanho_lote deve ser ≥ 1.")
+        with open(caminho_arquivo, newline='', encoding='utf-8') as f:
+            leitor = csv.reader(f)
+            cabecalho = next(leitor, None)
+            if cabecalho is None:
+                return
+            preparar = PreparadorPosicional(cabecalho)
+            if self.__instrumentacao is not None:
+                preparar = self.__instrumentacao.envolver("preparacao_linha", preparar)
+            # como no DictReader, linhas totalmente vazias são ignoradas
+            linhas = ((leitor.line_num, preparar(valores)) for valores in leitor if valores)
+            while True:
+                lote = list(islice(linhas, tamanho_lote))
+                if not lote:
+                    break
+                yield lote
+
+    def _obter_ou_criar_conteudo(self, id_conteudo: int, nome_conteudo: str) -> Conteudo:
+        # Conteúdo — fábrica na própria classe Conteudo
+        conteudo = self.__conteudos_registrados.get(id_conteudo)
+        if conteudo is None:
+            conteudo = self._criar_conteudo(id_conteudo, nome_conteudo)
+            if self.__armazenamento is not None:
+                conteudo._usar_armazenamento(self.__armazenamento)
+            if self.__metricas_aproximadas:
+                conteudo.usar_metricas_aproximadas()
+            self.__conteudos_registrados[id_conteudo] = conteudo
+        return conteudo
+
+    def _obter_ou_criar_usuario(self, id_usuario: int) -> Usuario:
+        usuario = self.__usuarios_registrados.get(id_usuario)
+        if usuario is None:
+            usuario = Usuario(id_usuario)
+            if self.__armazenamento is not None:
+                usuario._usar_armazenamento(self.__armazenamento)
+            self.__usuarios_registrados[id_usuario] = usuario
+        return usuario
+
+    def _processar_linha(self, linha: dict) -> Interacao:
+        """
+        Converte uma linha do CSV em Interacao, registrando plataforma,
+        conteúdo e usuário conforme necessário.
+        """
+        return self._registrar_linha_preparada(self._preparar_linha(linha))
+
+    def _registrar_linha_preparada(self, linha: LinhaPreparada) -> Interacao:
+        """
+        Registra uma linha já convertida por preparar_linha. Se a preparação
+        falhou, os cadastros anteriores à etapa do erro são feitos e o erro
+        é relançado, como no processamento direto da linha.
+        """
+        etapa = linha.etapa_erro
+        if etapa == ETAPA_PLATAFORMA:
+            raise linha.erro
+        plataforma = self.obter_plataforma(linha.nome_plataforma)
+
+        if etapa in (ETAPA_ID_CONTEUDO, ETAPA_NOME_CONTEUDO):
+            raise linha.erro
+        conteudo = self._obter_ou_criar_conteudo(linha.id_conteudo, linha.nome_conteudo)
+
+        if etapa == ETAPA_ID_USUARIO:
+            raise linha.erro
+        usuario = self._obter_ou_criar_usuario(linha.id_usuario)
+
+        if etapa == ETAPA_INTERACAO:
+            raise linha.erro
+        interacao = self._criar_interacao(conteudo, plataforma, linha.id_usuario, linha.timestamp,
+                                          linha.tipo_interacao, linha.duracao, linha.comentario)
+        self._vincular_interacao(conteudo, usuario, interacao, plataforma, linha.id_usuario, linha.timestamp,
+                                 linha.tipo_interacao, linha.duracao, linha.comentario)
+        return interacao
+
+    def _registrador_posicional(self, preparar: PreparadorPosicional):
+        """
+        Função que registra uma lista de csv.reader sem passar por
+        LinhaPreparada: cada campo é convertido logo antes do cadastro que
+        depende dele, o que reproduz os efeitos de _registrar_linha_preparada
+        quando uma conversão falha. Linhas de largura diferente da do
+        cabeçalho e cabeçalhos sem alguma coluna seguem o caminho em etapas.
+        """
+        registrar_preparada = self._registrar_linha_preparada
+        posicoes = preparar.posicoes_diretas()
+        if posicoes is None:
+            return lambda valores: registrar_preparada(preparar(valores))
+        (p_plataforma, p_id_conteudo, p_nome_conteudo, p_id_usuario,
+         p_timestamp, p_tipo, p_duracao, p_comentario) = posicoes
+        largura = len(preparar._cabecalho)
+        obter_plataforma = self.obter_plataforma
+        obter_conteudo = self._obter_ou_criar_conteudo
+        obter_usuario = self._obter_ou_criar_usuario
+        criar_interacao = self._criar_interacao
+        vincular_interacao = self._vincular_interacao
+        converter_timestamp = preparar._timestamp
+        tipos, converter_tipo = preparar._tipos, preparar._tipo
+        duracoes, converter_duracao = preparar._duracoes, preparar._duracao
+
+        def registrar(valores):
+            if len(valores) != largura:
+                return registrar_preparada(preparar(valores))
+            plataforma = obter_plataforma(valores[p_plataforma])
+            conteudo = obter_conteudo(int(valores[p_id_conteudo]), valores[p_nome_conteudo])
+            id_usuario = int(valores[p_id_usuario])
+            usuario = obter_usuario(id_usuario)
+            timestamp = converter_timestamp(valores[p_timestamp])
+            tipo = tipos.get(valores[p_tipo]) or converter_tipo(valores[p_tipo])
+            duracao = duracoes.get(valores[p_duracao])
+            if duracao is None:
+                duracao = converter_duracao(valores[p_duracao])
+            comentario = valores[p_comentario].strip()
+            interacao = criar_interacao(conteudo, plataforma, id_usuario, timestamp, tipo, duracao, comentario)
+            vincular_interacao(conteudo, usuario, interacao, plataforma, id_usuario, timestamp, tipo, duracao,
+                               comentario)
+            return interacao
+        return registrar
+
+    def _criar_interacao(self, conteudo: Conteudo, plataforma: Plataforma, id_usuario: int,
+                         timestamp: datetime, tipo_interacao: str, duracao: int, comentario: str):
+        armazenamento = self.__armazenamento
+        if armazenamento is None:
+            return Interacao.de_campos_validados(conteudo, plataforma, id_usuario, timestamp,
+                                                 tipo_interacao, duracao, comentario)
+        # modo colunar: os campos vão direto para as colunas; só a visão é criada
+        posicao = armazenamento.adicionar_campos(Interacao._reservar_id(), conteudo, plataforma,
+                                                 id_usuario, timestamp, tipo_interacao, duracao,
+                                                 comentario)
+        return InteracaoColunar(armazenamento, posicao)
+
+    def _vincular_interacao(self, conteudo: Conteudo, usuario: Usuario, interacao, plataforma: Plataforma,
+                            id_usuario: int, timestamp: datetime, tipo_interacao: str, duracao: int,
+                            comentario: str) -> None:
+        """
+        Liga a interação criada por _criar_interacao ao conteúdo, ao usuário
+        e às estruturas mantidas a cada interação. Recebe também os campos já
+        convertidos, para não relê-los da interação.
+        """
+        conteudo.adicionar_interacao(interacao)
+        usuario.registrar_interacao(interacao)
+        if self.__indice_temporal is not None:
+            self.__indice_temporal.registrar(interacao)
+        if self.__sketches_plataformas is not None:
+            self._registrar_sketch_plataforma(interacao)
+        # rollup da plataforma e índice de comentários: sempre mantidos
+        id_plataforma = plataforma.id_plataforma
+        id_conteudo = conteudo.id_conteudo
+        rollup = self.__rollups_plataformas.get(id_plataforma)
+        if rollup is None:
+            rollup = self.__rollups_plataformas[id_plataforma] = MetricasPlataforma()
+        rollup.registrar(tipo_interacao, duracao, id_usuario, id_conteudo)
+        if comentario:
+            self.__indice_comentarios.registrar_valores(comentario, interacao.id_interacao, id_conteudo,
+                                                        id_plataforma, id_usuario, para_epoch(timestamp))
+
+    def _registrar_tratando_erros(self, registrar, linha, rejeicoes: ColetorRejeicoes,
+                                  numero_linha: int, original=None):
+        """
+        Aplica registrar à linha; erros de dados vão para rejeicoes e a linha
+        é ignorada. original, se informado, converte a linha para a quarentena.
+        """
+        try:
+            return registrar(linha)
+        except (ValueError, KeyError) as e:
+            rejeicoes.registrar(e, numero_linha, linha if original is None else original(linha))
+            if self.__instrumentacao is not None:
+                self.__instrumentacao.registrar_rejeicao(e)
+        return None
+
+    def _consumir_lotes(self, lotes, registrar, exibir_progresso: bool,
+                        rejeicoes: ColetorRejeicoes = None, original=None) -> dict:
+        """
+        Aplica registrar a cada linha dos lotes (listas ou iteradores de
+        pares (número da linha no arquivo, linha), consumidos em ordem),
+        coletando os erros em rejeicoes (um ColetorRejeicoes padrão se None)
+        com o número da linha e, opcionalmente, relatando o progresso ao fim
+        de cada lote.
+        """
+        if rejeicoes is None:
+            rejeicoes = ColetorRejeicoes()
+        rejeitadas_antes = rejeicoes.total
+        instrumentacao = self.__instrumentacao
+        if instrumentacao is not None:
+            lotes = instrumentacao.cronometrar_iteracao("leitura_csv", lotes)
+        inicio = time.perf_counter()
+        total_linhas = 0
+        try:
+            with (instrumentacao.captura() if instrumentacao is not None else nullcontext()):
+                for lote in lotes:
+                    contagem = total_linhas
+                    for contagem, (numero_linha, linha) in enumerate(lote, total_linhas + 1):
+                        self._registrar_tratando_erros(registrar, linha, rejeicoes, numero_linha, original)
+                    total_linhas = contagem
+                    self.__versao_dados += 1
+                    if exibir_progresso:
+                        decorrido = time.perf_counter() - inicio
+                        taxa = total_linhas / decorrido if decorrido > 0 else 0.0
+                        print(f"[ingestão] {total_linhas} linhas processadas | {taxa:,.0f} linhas/s")
+        finally:
+            rejeicoes.descarregar()
+
+        decorrido = time.perf_counter() - inicio
+        if instrumentacao is not None:
+            instrumentacao.contar("linhas", total_linhas)
+        rejeicoes.imprimir_resumo()
+        return {
+            "linhas": total_linhas,
+            "rejeitadas": rejeicoes.total - rejeitadas_antes,
+            "segundos": decorrido,
+            "linhas_por_segundo": total_linhas / decorrido if decorrido > 0 else 0.0,
+            "rejeicoes": rejeicoes.resumo(),
+        }
+
+    def processar_interacoes_do_csv(self,
+                                    caminho_arquivo: str,
+                                    tamanho_lote: int = 10_000,
+                                    exibir_progresso: bool = False,
+                                    rejeicoes: ColetorRejeicoes = None) -> dict:
+        """
+        Processa o CSV em modo streaming: as linhas são lidas e convertidas
+        em lotes de tamanho_lote, mantendo o uso de memória limitado.
+
+        Com exibir_progresso=True, imprime ao fim de cada lote o total de
+        linhas lidas e a taxa em linhas/segundo.
+
+        Linhas inválidas são agrupadas por categoria em rejeicoes (ver
+        ColetorRejeicoes: limite de mensagens, amostras e quarentena); sem
+        coletor, só as primeiras de cada categoria são impressas.
+
+        Retorna um resumo com linhas lidas, rejeitadas, tempo decorrido,
+        taxa e o resumo das rejeições.
+        """
+        return self._consumir_csv(caminho_arquivo, tamanho_lote, exibir_progresso, rejeicoes)
+
+    def _consumir_csv(self, caminho_arquivo: str, tamanho_lote: int, exibir_progresso: bool,
+                      rejeicoes: ColetorRejeicoes = None, envolver_lotes=None) -> dict:
+        """
+        Lê o CSV em lotes e registra as linhas. Sem instrumentação, as listas
+        de csv.reader são registradas direto (ver _registrador_posicional);
+        com ela, passam por LinhaPreparada para cada etapa ser cronometrada.
+        envolver_lotes, se informado, recebe e devolve o iterador de lotes.
+        """
+        if tamanho_lote < 1:
+            raise ValueError("tamanho_lote deve ser ≥ 1.")
+        envolver_lotes = envolver_lotes or iter
+        if self.__instrumentacao is not None:
+            lotes = self._iterar_lotes_preparados(caminho_arquivo, tamanho_lote)
+            return self._consumir_lotes(envolver_lotes(lotes), self._registrar_linha_preparada,
+                                        exibir_progresso, rejeicoes)
         with open(caminho_arquivo, newline='', encoding='utf-8') as f:
-            return list(csv.DictReader(f))
+            leitor = csv.reader(f)
+            cabecalho = next(leitor, None)
+            if cabecalho is None:
+                return self._consumir_lotes(envolver_lotes(()), None, exibir_progresso, rejeicoes)
+            preparar = PreparadorPosicional(cabecalho)
+            # como no DictReader, linhas totalmente vazias são ignoradas; line_num é a
+            # linha do arquivo em que o registro termina (conta as vazias e as quebras entre aspas)
+            lotes = _em_lotes(((leitor.line_num, valores) for valores in leitor if valores), tamanho_lote)
+            return self._consumir_lotes(envolver_lotes(lotes), self._registrador_posicional(preparar),
+                                        exibir_progresso, rejeicoes, preparar._como_dict)
 
-    def processar_interacoes_do_csv(self, caminho_arquivo: str) -> None:
-        for linha in self._carregar_interacoes_csv(caminho_arquivo):
+    def processar_interacoes_do_csv_paralelo(self,
+                                             caminho_arquivo: str,
+                                             processos: int = None,
+                                             tamanho_fatia_bytes: int = 16 * 1024 * 1024,
+                                             exibir_progresso: bool = False,
+                                             rejeicoes: ColetorRejeicoes = None) -> dict:
+        """
+        Divide o CSV em fatias de bytes, converte e valida as fatias em um
+        pool de processos e registra os resultados na ordem do arquivo.
+        IDs de plataforma e de interação ficam iguais aos do processamento
+        sequencial. Campos entre aspas com quebra de linha não são suportados.
+
+        Retorna o mesmo resumo de processar_interacoes_do_csv.
+        """
+        lotes = preparar_csv_em_paralelo(caminho_arquivo, processos, tamanho_fatia_bytes)
+        return self._consumir_lotes(lotes, self._registrar_linha_preparada, exibir_progresso, rejeicoes)
+
+    def consumir_fluxo(self, fonte: Iterable[dict],
+                       agregador: AgregadorJanelas = None,
+                       rejeicoes: ColetorRejeicoes = None) -> dict:
+        """
+        Modo streaming: registra cada linha (dict no formato do CSV) vinda
+        de um iterador, com as mesmas validações da ingestão do arquivo,
+        e a repassa ao agregador de janelas, se informado. Rejeições levam
+        o line_num da fonte (ex.: csv.DictReader) ou, sem ele, a posição
+        da linha no fluxo.
+        """
+        def registrar(linha):
+            interacao = self._processar_linha(linha)
+            if agregador is not None:
+                agregador.registrar(interacao)
+        lotes = ([(getattr(fonte, "line_num", n), linha)] for n, linha in enumerate(fonte, 1))
+        return self._consumir_lotes(lotes, registrar, False, rejeicoes)
+
+    async def consumir_fila(self, fila: asyncio.Queue,
+                            agregador: AgregadorJanelas = None,
+                            rejeicoes: ColetorRejeicoes = None) -> int:
+        """
+        Versão assíncrona de consumir_fluxo: consome linhas de uma
+        asyncio.Queue até receber None. Retorna a quantidade de linhas lidas.
+        """
+        if rejeicoes is None:
+            rejeicoes = ColetorRejeicoes()
+        total = 0
+        while True:
+            linha = await fila.get()
             try:
-                # Plataforma
-                plataforma = self.obter_plataforma(linha["plataforma"])
-
-                # Conteúdo — fábrica na própria classe Conteudo
-                id_conteudo = int(linha["id_conteudo"])
-                nome_conteudo = linha["nome_conteudo"]
-                if id_conteudo not in self.__conteudos_registrados:
-                    conteudo = Conteudo.criar_por_tipo(id_conteudo, nome_conteudo)
-                    self.__conteudos_registrados[id_conteudo] = conteudo
-                conteudo = self.__conteudos_registrados[id_conteudo]
-
-                # Usuário
-                id_usuario = int(linha["id_usuario"])
-                if id_usuario not in self.__usuarios_registrados:
-                    self.__usuarios_registrados[id_usuario] = Usuario(id_usuario)
-                usuario = self.__usuarios_registrados[id_usuario]
-
-                # Interação
-                interacao = Interacao(
-                    conteudo_associado=conteudo,
-                    id_usuario=id_usuario,
-                    timestamp_interacao=linha["timestamp_interacao"],
-                    plataforma_interacao=plataforma,
-                    tipo_interacao=linha["tipo_interacao"],
-                    watch_duration_seconds=linha.get("watch_duration_seconds", 0),
-                    comment_text=linha.get("comment_text", "")
-                )
-
-                conteudo.adicionar_interacao(interacao)
-                usuario.registrar_interacao(interacao)
-
-            except ValueError as e:
-                print(f"Erro ao processar linha: {e}")
-            except KeyError as e:
-                print(f"Coluna faltando no CSV: {e}")
+                if linha is None:
+                    rejeicoes.descarregar()
+                    return total
+                total += 1
+                interacao = self._registrar_tratando_erros(self._processar_linha, linha,
+                                                           rejeicoes, total)
+                self.__versao_dados += 1
+                if interacao is not None and agregador is not None:
+                    agregador.registrar(interacao)
+            finally:
+                fila.task_done()
+
+    def habilitar_instrumentacao(self, perfil: bool = False, alocacoes: bool = False) -> Instrumentacao:
+        """
+        Passa a cronometrar cada etapa da ingestão (leitura do CSV, preparação
+        da linha, plataforma, conteúdo, classificação do conteúdo, usuário,
+        interação e vinculação), contar linhas e rejeições por classe de erro
+        e, opcionalmente, capturar cProfile (perfil) e tracemalloc (alocacoes).
+
+        Os métodos cronometrados são instalados como atributos da instância;
+        sem instrumentação o caminho de ingestão não tem custo adicional.
+        """
+        self.desabilitar_instrumentacao()
+        instrumentacao = Instrumentacao(perfil=perfil, alocacoes=alocacoes)
+        for metodo, etapa in self._ETAPAS_INSTRUMENTADAS.items():
+            setattr(self, metodo, instrumentacao.envolver(etapa, getattr(self, metodo)))
+        self.__instrumentacao = instrumentacao
+        return instrumentacao
+
+    def desabilitar_instrumentacao(self) -> None:
+        for metodo in self._ETAPAS_INSTRUMENTADAS:
+            self.__dict__.pop(metodo, None)
+        self.__instrumentacao = None
+
+    def relatorio_instrumentacao(self) -> dict:
+        """Relatório estruturado da instrumentação ativa ({} se desabilitada)."""
+        if self.__instrumentacao is None:
+            return {}
+        return self.__instrumentacao.relatorio()
+
+    def calcular_metricas_conteudos(self) -> dict[int, MetricasConteudo]:
+        """
+        Métricas de todos os conteúdos, lidas dos acumuladores que cada
+        Conteudo mantém a cada interação registrada (refeitos só para quem
+        os descartou, ex.: ao trocar de modo), sem nova passada sobre as
+        interações.
+
+        Retorna a tabela {id_conteudo: MetricasConteudo}.
+        """
+        return {id_conteudo: conteudo._obter_metricas()
+                for id_conteudo, conteudo in self.__conteudos_registrados.items()}
+
+    def ranking_conteudos(self, top_n: int = None, tipo: str = None) -> list[tuple[Conteudo, int]]:
+        """
+        Retorna [(Conteudo, total_engajamento)] em ordem decrescente,
+        opcionalmente restrito a um tipo ('video', 'podcast' ou 'artigo').
+        Com top_n, usa heap limitado (O(n log k)).
+        """
+        conteudos = self.__conteudos_registrados.values()
+        if tipo is not None:
+            cls = self._MAPA_TIPOS.get(tipo.lower())
+            if cls is None:
+                return []
+            conteudos = (c for c in conteudos if isinstance(c, cls))
+        return ranquear(conteudos, Conteudo.calcular_total_interacoes_engajamento, top_n)
+
+    def ranking_usuarios(self, top_n: int = None) -> list[tuple[Usuario, int]]:
+        """
+        Retorna [(Usuario, total_interacoes)] em ordem decrescente.
+        Com top_n, usa heap limitado (O(n log k)).
+        """
+        return ranquear(self.__usuarios_registrados.values(),
+                        lambda u: u.total_interacoes, top_n)
+
+    @property
+    def indice_temporal(self) -> IndiceTemporal:
+        """
+        Índice de séries temporais por conteúdo, usuário e plataforma.
+        Construído na primeira consulta e atualizado a cada nova interação.
+        """
+        if self.__indice_temporal is None:
+            if self.__armazenamento is not None:
+                self.__indice_temporal = IndiceTemporal.de_armazenamento(self.__armazenamento)
+            else:
+                self.__indice_temporal = IndiceTemporal.de_interacoes(self.iterar_interacoes())
+        return self.__indice_temporal
+
+    @property
+    def indice_comentarios(self) -> IndiceComentarios:
+        """
+        Índice invertido dos comment_text não vazios, atualizado a cada
+        interação vinculada desde a primeira (refeito só na carga de um
+        snapshot): a primeira busca não percorre as interações.
+        """
+        return self.__indice_comentarios
+
+    def buscar_comentarios(self, consulta: str,
+                           ids_conteudos: Iterable[int] = None,
+                           ids_plataformas: Iterable[int] = None,
+                           inicio: datetime = None,
+                           fim: datetime = None,
+                           pagina: int = 1,
+                           tamanho_pagina: int = 20) -> ResultadoBusca:
+        """
+        Busca nos comentários por palavras e frases entre aspas (todas
+        obrigatórias, sem diferenciar maiúsculas nem acentos), com filtros
+        opcionais de conteúdo, plataforma e intervalo [inicio, fim).
+        Retorna o total, as contagens por conteúdo e por plataforma e uma
+        página de resultados, dos mais recentes aos mais antigos.
+        """
+        return self.indice_comentarios.buscar(consulta, ids_conteudos, ids_plataformas, inicio, fim,
+                                              pagina, tamanho_pagina)
+
+    def engajamento_conteudo_no_intervalo(self, id_conteudo: int,
+                                          inicio: datetime, fim: datetime) -> int:
+        """Interações de engajamento do conteúdo com inicio ≤ timestamp < fim."""
+        return self.indice_temporal.conteudo(id_conteudo, inicio, fim)[1]
+
+    def engajamento_por_conteudo_no_intervalo(self, inicio: datetime,
+                                              fim: datetime) -> dict[int, int]:
+        """{id_conteudo: engajamento} no intervalo [inicio, fim)."""
+        indice = self.indice_temporal
+        return {id_conteudo: indice.conteudo(id_conteudo, inicio, fim)[1]
+                for id_conteudo in self.__conteudos_registrados}
+
+    def tempo_consumo_usuario_no_intervalo(self, id_usuario: int,
+                                           inicio: datetime, fim: datetime) -> int:
+        """Tempo assistido (durações > 0) do usuário no intervalo [inicio, fim)."""
+        return self.indice_temporal.usuario(id_usuario, inicio, fim)[2]
+
+    def tempo_por_plataforma_por_hora(self, inicio: datetime,
+                                      fim: datetime) -> dict[int, list[tuple[datetime, int]]]:
+        """
+        {id_plataforma: [(hora, tempo assistido)]} para cada hora do intervalo
+        [inicio, fim), respondido por buscas binárias no índice temporal.
+        """
+        indice = self.indice_temporal
+        return {p.id_plataforma: indice.plataforma_por_hora(p.id_plataforma, inicio, fim)
+                for p in self.__plataformas_registradas.values()}
+
+    def _registrar_sketch_plataforma(self, interacao) -> None:
+        nome = interacao.plataforma_interacao.nome_plataforma
+        metricas = self.__sketches_plataformas.get(nome)
+        if metricas is None:
+            metricas = self.__sketches_plataformas[nome] = MetricasAproximadas()
+        metricas.registrar(interacao.tipo_interacao, interacao.watch_duration_seconds,
+                           interacao.id_usuario)
+
+    def sketches_plataformas(self) -> dict[str, MetricasAproximadas]:
+        """
+        {nome_plataforma: MetricasAproximadas} com contagens, usuários
+        distintos (HyperLogLog) e durações (KLL) de cada plataforma.
+        Construído na primeira consulta e atualizado a cada nova interação.
+        """
+        if self.__sketches_plataformas is None:
+            self.__sketches_plataformas = {}
+            for interacao in self.iterar_interacoes():
+                self._registrar_sketch_plataforma(interacao)
+        return self.__sketches_plataformas
+
+    def rollups_plataformas(self) -> dict[int, MetricasPlataforma]:
+        """
+        {id_plataforma: MetricasPlataforma} com interações por tipo, tempo
+        assistido e usuários e conteúdos distintos de cada plataforma.
+        Atualizado a cada interação vinculada, desde a primeira (e gravado
+        no snapshot): a consulta não percorre as interações.
+        """
+        return self.__rollups_plataformas
+
+    def comparar_plataformas(self, nomes_plataformas: Iterable[str] = None,
+                             ordenar_por: str = None) -> list[LinhaComparacaoPlataforma]:
+        """
+        Comparação entre plataformas (ex.: TV Globo, Globoplay e G1) a partir
+        dos rollups: volume, engajamento, tempo, audiência e participação de
+        cada uma no total das comparadas. Sem nomes, compara todas; com
+        ordenar_por (ver CAMPOS_ORDENACAO_PLATAFORMAS), ordena de forma decrescente.
+        """
+        plataformas = self.listar_plataformas()
+        if nomes_plataformas is not None:
+            nomes = set(nomes_plataformas)
+            plataformas = [p for p in plataformas if p.nome_plataforma in nomes]
+        return comparar_plataformas(plataformas, self.rollups_plataformas(), ordenar_por)
+
+    def estatisticas_aproximadas(self, ids_conteudos: Iterable[int] = None,
+                                 nomes_plataformas: Iterable[str] = None,
+                                 quantis: tuple = (0.5, 0.95)) -> dict:
+        """
+        Usuários distintos e quantis de watch_duration_seconds (> 0) da união
+        dos conteúdos e plataformas informados, combinando os sketches de cada
+        um sem revisitar as interações. Filtra-se por conteúdos ou por
+        plataformas (não pelos dois); sem filtros, considera todos os conteúdos.
+
+        Retorna {"usuarios_unicos", "quantis": {q: duração},
+        "erro_relativo_usuarios", "erro_posto_quantis"}; os erros são os
+        limites típicos dos sketches (≈ 1,6% e ≈ 1%).
+        """
+        if ids_conteudos is not None and nomes_plataformas is not None:
+            raise ValueError("Informe ids_conteudos ou nomes_plataformas, não ambos.")
+        usuarios, duracoes = HyperLogLog(), KLL()
+        if ids_conteudos is None and nomes_plataformas is None:
+            ids_conteudos = self.__conteudos_registrados
+        for id_conteudo in ids_conteudos or ():
+            conteudo = self.__conteudos_registrados.get(id_conteudo)
+            if conteudo is not None:
+                sketch_usuarios, sketch_duracoes = conteudo.sketches_audiencia()
+                usuarios.mesclar(sketch_usuarios)
+                duracoes.mesclar(sketch_duracoes)
+        if nomes_plataformas is not None:
+            por_plataforma = self.sketches_plataformas()
+            for nome in nomes_plataformas:
+                metricas = por_plataforma.get(nome)
+                if metricas is not None:
+                    usuarios.mesclar(metricas.usuarios)
+                    if metricas.duracoes is not None:
+                        duracoes.mesclar(metricas.duracoes)
+        return {
+            "usuarios_unicos": len(usuarios),
+            "quantis": duracoes.quantis(quantis),
+            "erro_relativo_usuarios": round(usuarios.erro_relativo, 4),
+            "erro_posto_quantis": round(1.7 / duracoes.k, 4),
+        }
+
+    def coconsumo(self, tipos: Iterable[str] = None) -> MotorCoconsumo:
+        """
+        Motor de sobreposição de audiências entre conteúdos (usuários em
+        comum, Jaccard, "quem consumiu X também consumiu"), construído com
+        as interações atuais; com tipos, só esses tipos contam como audiência.
+        """
+        return MotorCoconsumo.de_sistema(self, tipos)
+
+    def gerar_relatorio_metricas(self, metricas: Iterable[str] = METRICAS_RELATORIO,
+                                 processos: int = 1) -> list[LinhaRelatorio]:
+        """
+        Métricas pedidas (ver analise.relatorios.METRICAS_RELATORIO) de todos
+        os conteúdos, uma LinhaRelatorio por conteúdo na ordem de cadastro.
+        Com processos > 1 e armazenamento colunar, o cálculo é dividido por
+        fatias de conteúdos em um pool de processos.
+        """
+        return gerar_relatorio_metricas(self.__conteudos_registrados.values(), self.__armazenamento,
+                                        metricas, processos)
 
     def gerar_relatorio_engajamento_conteudos(self, top_n: int = None) -> None:
-        conteudos = self.listar_conteudos()
         if top_n is not None:
-            conteudos = sorted(
-                conteudos,
-                key=lambda c: c.calcular_total_interacoes_engajamento(),
-                reverse=True
-            )[:top_n]
-
-        for c in conteudos:
-            total = c.calcular_total_interacoes_engajamento()
+            linhas = self.ranking_conteudos(top_n)
+        else:
+            linhas = ((c, c.calcular_total_interacoes_engajamento())
+                      for c in self.__conteudos_registrados.values())
+
+        for c, total in linhas:
             print(f"ID: {c.id_conteudo} | Nome: {c.nome_conteudo} | Interacoes: {total}")
 
     def gerar_relatorio_atividade_usuarios(self, top_n: int = None) -> None:
-        usuarios = self.listar_usuarios()
         if top_n is not None:
-            usuarios = sorted(
-                usuarios,
-                key=lambda u: len(u.interacoes_realizadas),
-                reverse=True
-            )[:top_n]
-
-        for u in usuarios:
-            total = len(u.interacoes_realizadas)
+            linhas = self.ranking_usuarios(top_n)
+        else:
+            linhas = ((u, u.total_interacoes) for u in self.__usuarios_registrados.values())
+
+        for u, total in linhas:
             print(f"ID: {u.id_usuario} | Interacoes: {total}")
 
     def listar_conteudos_por_tipo(self, tipo: str) -> list[Conteudo]:
         """
         Retorna apenas os Conteudo do tipo 'video', 'podcast' ou 'artigo'.
         """
-        mapping = {
-            'video': Video,
-            'podcast': Podcast,
-            'artigo': Artigo,
-        }
-        cls = mapping.get(tipo.lower())
+        cls = self._MAPA_TIPOS.get(tipo.lower())
         return [c for c in self.listar_conteudos() if isinstance(c, cls)] if cls else []
 
     def identificar_top_por_tipo(self, tipo: str, top_n: int = 5) -> None:
@@ -123,14 +787,8 @@ class SistemaAnaliseEngajamento:
         Exibe os top N conteúdos de um determinado tipo
         ordenados por engajamento.
         """
-        conteudos = self.listar_conteudos_por_tipo(tipo)
-        top = sorted(
-            conteudos,
-            key=lambda c: c.calcular_total_interacoes_engajamento(),
-            reverse=True
-        )[:top_n]
+        top = self.ranking_conteudos(top_n, tipo=tipo)
 
         print(f"\nTop {top_n} {tipo}s por interações:")
-        for c in top:
-            total = c.calcular_total_interacoes_engajamento()
+        for c, total in top:
             print(f"ID: {c.id_conteudo} | Nome: {c.nome_conteudo} | Interacoes: {total}")
@@ -0,0 +1,454 @@
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set
+
+from entidades.armazenamento import CODIGO_TIPO, TIPOS_INTERACAO, para_epoch, de_epoch
+from entidades.conteudo import Conteudo
+from entidades.interacao import Interacao
+from entidades.metricas import TIPOS_ENGAJAMENTO, MetricasConteudo, MetricasPlataforma
+from entidades.plataforma import Plataforma
+from analise.coconsumo import MotorCoconsumo
+from analise.relatorios import (LinhaRelatorio, METRICAS_RELATORIO, ResumoConteudo,
+                                montar_linhas_relatorio, validar_metricas)
+from analise.sistema import SistemaAnaliseEngajamento
+
+_HORA_US = 3600 * 1_000_000
+_CODIGOS_ENGAJAMENTO = tuple(sorted(CODIGO_TIPO[t] for t in TIPOS_ENGAJAMENTO))
+_FILTRO_ENGAJAMENTO = f"tipo IN ({', '.join(map(str, _CODIGOS_ENGAJAMENTO))})"
+
+_ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS plataformas (
+    id_plataforma INTEGER PRIMARY KEY,
+    chave TEXT NOT NULL UNIQUE,          -- nome como veio no CSV
+    nome TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS conteudos (
+    ordem INTEGER PRIMARY KEY,           -- ordem de cadastro (desempate dos rankings)
+    id_conteudo INTEGER NOT NULL UNIQUE,
+    nome TEXT NOT NULL,
+    tipo TEXT NOT NULL,                  -- 'video', 'podcast', 'artigo' ou 'conteudo'
+    duracao INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS usuarios (
+    ordem INTEGER PRIMARY KEY,
+    id_usuario INTEGER NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS interacoes (
+    id_interacao INTEGER PRIMARY KEY,
+    id_conteudo INTEGER NOT NULL,
+    id_usuario INTEGER NOT NULL,
+    id_plataforma INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,          -- microssegundos desde a época
+    tipo INTEGER NOT NULL,               -- posição em TIPOS_INTERACAO
+    duracao INTEGER NOT NULL,
+    comentario TEXT                      -- NULL quando vazio
+);
+CREATE INDEX IF NOT EXISTS ix_interacoes_conteudo ON interacoes (id_conteudo, timestamp);
+CREATE INDEX IF NOT EXISTS ix_interacoes_usuario ON interacoes (id_usuario, timestamp);
+CREATE INDEX IF NOT EXISTS ix_interacoes_plataforma ON interacoes (id_plataforma, timestamp);
+CREATE INDEX IF NOT EXISTS ix_interacoes_tipo ON interacoes (tipo);
+CREATE INDEX IF NOT EXISTS ix_interacoes_timestamp ON interacoes (timestamp);
+"""
+
+
+class InteracaoSQL(NamedTuple):
+    """Linha da tabela interacoes, com as mesmas propriedades públicas de Interacao."""
+    id_interacao: int
+    conteudo_associado: Conteudo
+    id_usuario: int
+    timestamp_interacao: datetime
+    plataforma_interacao: Plataforma
+    tipo_interacao: str
+    watch_duration_seconds: int
+    comment_text: str
+
+
+class ConteudoSQL(NamedTuple):
+    """Conteúdo devolvido pelos rankings: identificação, sem interações nem métricas."""
+    id_conteudo: int
+    nome_conteudo: str
+    tipo_conteudo: str
+
+
+class UsuarioSQL(NamedTuple):
+    """Usuário com os totais agregados no banco, sem as interações."""
+    id_usuario: int
+    total_interacoes: int
+    tempo_total_consumo: int
+
+
+class _Indisponivel:
+    """Oculta um recurso herdado: acessá-lo levanta AttributeError (hasattr devolve False)."""
+    def __set_name__(self, dono, nome):
+        self._nome = nome
+
+    def __get__(self, instancia, dono=None):
+        raise AttributeError(f"SistemaSQLite não oferece '{self._nome}' "
+                             f"(depende das interações em memória).")
+
+
+class _MetricasSQL(MetricasConteudo):
+    """MetricasConteudo carregada de agregados SQL, sem o tempo por usuário."""
+    __slots__ = ("_qtd_usuarios_com_tempo",)
+
+    def __init__(self, qtd_usuarios_com_tempo: int = 0):
+        super().__init__()
+        self._qtd_usuarios_com_tempo = qtd_usuarios_com_tempo
+
+    def qtd_usuarios_com_tempo(self) -> int:
+        return self._qtd_usuarios_com_tempo
+
+
+class _RollupSQL(MetricasPlataforma):
+    """MetricasPlataforma carregada de agregados SQL: só as quantidades de distintos."""
+    __slots__ = ("_qtd_usuarios", "_qtd_conteudos")
+
+    def __init__(self, qtd_usuarios: int = 0, qtd_conteudos: int = 0):
+        super().__init__()
+        self._qtd_usuarios = qtd_usuarios
+        self._qtd_conteudos = qtd_conteudos
+
+    def qtd_usuarios(self) -> int:
+        return self._qtd_usuarios
+
+    def qtd_conteudos(self) -> int:
+        return self._qtd_conteudos
+
+
+class SistemaSQLite(SistemaAnaliseEngajamento):
+    """
+    SistemaAnaliseEngajamento com as interações persistidas em um arquivo
+    SQLite em vez de mantidas em memória, para volumes maiores que a RAM.
+
+    A ingestão (CSV, CSV em paralelo, fluxo e fila) e as validações são as
+    do sistema em memória; as linhas aceitas são acumuladas e gravadas com
+    executemany em uma transação por lote. Em memória ficam só plataformas,
+    conteúdos e os IDs dos usuários vistos na sessão. Métricas, rankings, relatórios, rollups por plataforma e
+    consultas por intervalo são agregações SQL apoiadas nos índices por
+    conteúdo, usuário, plataforma, tipo e timestamp.
+
+    Nada guarda interações em memória: listar_conteudos e obter_conteudo
+    devolvem os Conteudo com as métricas pré-carregadas do banco;
+    listar_usuarios, obter_usuario e os rankings devolvem registros
+    (UsuarioSQL, ConteudoSQL) com os totais calculados no banco;
+    comentários vêm de gerar_relatorio_metricas. Recursos que dependem das
+    interações em memória (snapshot, índice temporal, índice e busca de
+    comentários, sketches) não existem nesta classe: acessá-los levanta
+    AttributeError.
+    """
+    _ETAPAS_INSTRUMENTADAS = {**SistemaAnaliseEngajamento._ETAPAS_INSTRUMENTADAS,
+                              '_descarregar': 'gravacao_banco'}
+
+    def __init__(self, caminho_banco: str = ":memory:", tamanho_buffer: int = 10_000):
+        super().__init__()
+        self.caminho_banco = caminho_banco
+        self._conexao = sqlite3.connect(caminho_banco)
+        self._conexao.executescript("PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;" + _ESQUEMA)
+        self._tamanho_buffer = tamanho_buffer
+        # linhas aceitas ainda não gravadas, por tabela
+        self._pendentes: Dict[str, list] = {"plataformas": [], "conteudos": [], "usuarios": [],
+                                            "interacoes": []}
+        self._plataformas: Dict[str, Plataforma] = {}
+        self._conteudos: Dict[int, Conteudo] = {}
+        self._usuarios_vistos: Set[int] = set()   # IDs já enfileirados nesta sessão
+        self._carregar_cadastros()
+
+    def _carregar_cadastros(self) -> None:
+        """Reabre um banco existente: plataformas, conteúdos e o próximo ID de interação."""
+        for id_plataforma, chave, nome in self._conexao.execute(
+                "SELECT id_plataforma, chave, nome FROM plataformas ORDER BY id_plataforma"):
+            self._plataformas[chave] = Plataforma(nome, id_plataforma=id_plataforma)
+        for id_conteudo, nome in self._conexao.execute("SELECT id_conteudo, nome FROM conteudos ORDER BY ordem"):
+            self._conteudos[id_conteudo] = self._criar_conteudo(id_conteudo, nome)
+        (maior_id,) = self._conexao.execute("SELECT COALESCE(MAX(id_interacao), 0) FROM interacoes").fetchone()
+        Interacao._id_interacao_global = max(Interacao._id_interacao_global, maior_id + 1)
+
+    def fechar(self) -> None:
+        self._descarregar()
+        self._conexao.close()
+
+    def __enter__(self) -> "SistemaSQLite":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
+
+    # ------------------------------------------------------------------ ingestão
+
+    def _descarregar(self) -> None:
+        """Grava as linhas pendentes em uma única transação."""
+        pendentes = self._pendentes
+        if not pendentes["interacoes"] and not pendentes["usuarios"] and not pendentes["conteudos"] \
+                and not pendentes["plataformas"]:
+            return
+        with self._conexao:
+            self._conexao.executemany("INSERT INTO plataformas (id_plataforma, chave, nome) VALUES (?, ?, ?)",
+                                      pendentes["plataformas"])
+            self._conexao.executemany("INSERT INTO conteudos (id_conteudo, nome, tipo, duracao) VALUES (?, ?, ?, ?)",
+                                      pendentes["conteudos"])
+            self._conexao.executemany("INSERT OR IGNORE INTO usuarios (id_usuario) VALUES (?)",
+                                      pendentes["usuarios"])
+            self._conexao.executemany("INSERT INTO interacoes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                      pendentes["interacoes"])
+        for linhas in pendentes.values():
+            linhas.clear()
+
+    def _lotes_com_descarga(self, lotes: Iterable) -> Iterator:
+        # retomado depois que cada lote foi registrado: grava o que ele acumulou
+        for lote in lotes:
+            yield lote
+            self._descarregar()
+
+    def _consumir_lotes(self, lotes, registrar, exibir_progresso: bool, rejeicoes=None,
+                        original=None) -> dict:
+        return super()._consumir_lotes(self._lotes_com_descarga(lotes), registrar, exibir_progresso,
+                                       rejeicoes, original)
+
+    async def consumir_fila(self, fila, agregador=None, rejeicoes=None) -> int:
+        try:
+            return await super().consumir_fila(fila, agregador, rejeicoes)
+        finally:
+            self._descarregar()
+
+    def cadastrar_plataforma(self, nome_plataforma: str) -> Plataforma:
+        if nome_plataforma not in self._plataformas:
+            p = Plataforma(nome_plataforma, id_plataforma=len(self._plataformas) + 1)
+            self._plataformas[nome_plataforma] = p
+            self._pendentes["plataformas"].append((p.id_plataforma, nome_plataforma, p.nome_plataforma))
+        return self._plataformas[nome_plataforma]
+
+    def obter_plataforma(self, nome_plataforma: str) -> Plataforma:
+        return self._plataformas.get(nome_plataforma) or self.cadastrar_plataforma(nome_plataforma)
+
+    def _obter_ou_criar_conteudo(self, id_conteudo: int, nome_conteudo: str) -> Conteudo:
+        conteudo = self._conteudos.get(id_conteudo)
+        if conteudo is None:
+            conteudo = self._criar_conteudo(id_conteudo, nome_conteudo)
+            self._conteudos[id_conteudo] = conteudo
+            self._pendentes["conteudos"].append(
+                (id_conteudo, conteudo.nome_conteudo, type(conteudo).__name__.lower(),
+                 getattr(conteudo, "duracao_total_video_seg", 0)))
+        return conteudo
+
+    def _obter_ou_criar_usuario(self, id_usuario: int) -> int:
+        # só o primeiro aparecimento na sessão vai para o banco; usuários de sessões
+        # anteriores são descartados pelo INSERT OR IGNORE
+        if id_usuario not in self._usuarios_vistos:
+            self._usuarios_vistos.add(id_usuario)
+            self._pendentes["usuarios"].append((id_usuario,))
+        return id_usuario
+
+    def _vincular_interacao(self, conteudo: Conteudo, usuario: int, interacao: Interacao, plataforma: Plataforma,
+                            id_usuario: int, timestamp: datetime, tipo_interacao: str, duracao: int,
+                            comentario: str) -> None:
+        self._pendentes["interacoes"].append((
+            interacao.id_interacao, conteudo.id_conteudo, usuario, plataforma.id_plataforma,
+            para_epoch(timestamp), CODIGO_TIPO[tipo_interacao], duracao, comentario or None,
+        ))
+        if len(self._pendentes["interacoes"]) >= self._tamanho_buffer:
+            self._descarregar()
+
+    def _consultar(self, sql: str, parametros=()) -> sqlite3.Cursor:
+        # leituras sempre enxergam tudo o que já foi registrado
+        self._descarregar()
+        return self._conexao.execute(sql, parametros)
+
+    # ------------------------------------------------------------------ cadastros
+
+    def listar_plataformas(self) -> list[Plataforma]:
+        return list(self._plataformas.values())
+
+    def _carregar_metricas(self, conteudos: Iterable[Conteudo], filtro: str = "", parametros=()) -> None:
+        """Define nos conteúdos as métricas agregadas no banco (filtro restringe as interações lidas)."""
+        contagens: Dict[int, list] = {}
+        for id_conteudo, codigo, quantidade, tempo, qtd_tempos in self._consultar(
+                f"SELECT id_conteudo, tipo, COUNT(*), SUM(MAX(duracao, 0)), SUM(duracao > 0) "
+                f"FROM interacoes {filtro} GROUP BY id_conteudo, tipo ORDER BY id_conteudo, MIN(id_interacao)",
+                parametros):
+            contagens.setdefault(id_conteudo, []).append((TIPOS_INTERACAO[codigo], quantidade, tempo, qtd_tempos))
+        usuarios_com_tempo = dict(self._consultar(
+            f"SELECT id_conteudo, COUNT(DISTINCT id_usuario) FROM interacoes {filtro or 'WHERE 1'} "
+            f"AND duracao > 0 GROUP BY id_conteudo", parametros))
+
+        for conteudo in conteudos:
+            metricas = _MetricasSQL(usuarios_com_tempo.get(conteudo.id_conteudo, 0))
+            for tipo, quantidade, tempo, qtd_tempos in contagens.get(conteudo.id_conteudo, ()):
+                metricas.contagem_por_tipo[tipo] = quantidade
+                if tipo in TIPOS_ENGAJAMENTO:
+                    metricas.total_engajamento += quantidade
+                metricas.tempo_total += tempo
+                metricas.qtd_tempos_positivos += qtd_tempos
+            conteudo._definir_metricas(metricas)
+
+    def listar_conteudos(self) -> list[Conteudo]:
+        """Conteúdos na ordem de cadastro, com as métricas carregadas do banco."""
+        self._carregar_metricas(self._conteudos.values())
+        return list(self._conteudos.values())
+
+    def obter_conteudo(self, id_conteudo: int) -> Optional[Conteudo]:
+        """O conteúdo com as métricas carregadas do banco, ou None."""
+        conteudo = self._conteudos.get(id_conteudo)
+        if conteudo is not None:
+            self._carregar_metricas((conteudo,), "WHERE id_conteudo = ?", (id_conteudo,))
+        return conteudo
+
+    def _consultar_usuarios(self, sufixo: str, parametros=()) -> list[UsuarioSQL]:
+        return [UsuarioSQL(*linha) for linha in self._consultar(
+            "SELECT u.id_usuario, COUNT(i.id_interacao) AS total, COALESCE(SUM(MAX(i.duracao, 0)), 0) "
+            "FROM usuarios u LEFT JOIN interacoes i USING (id_usuario) " + sufixo, parametros)]
+
+    def listar_usuarios(self) -> list[UsuarioSQL]:
+        """Usuários na ordem de cadastro, com total de interações e tempo de consumo."""
+        return self._consultar_usuarios("GROUP BY u.ordem ORDER BY u.ordem")
+
+    def obter_usuario(self, id_usuario: int) -> Optional[UsuarioSQL]:
+        usuarios = self._consultar_usuarios("WHERE u.id_usuario = ? GROUP BY u.ordem", (id_usuario,))
+        return usuarios[0] if usuarios else None
+
+    def iterar_interacoes(self) -> Iterator[InteracaoSQL]:
+        """Percorre as interações na ordem de ingestão."""
+        plataformas = {p.id_plataforma: p for p in self._plataformas.values()}
+        for id_interacao, id_conteudo, id_usuario, id_plataforma, ts, codigo, duracao, comentario in self._consultar(
+                "SELECT * FROM interacoes ORDER BY id_interacao"):
+            yield InteracaoSQL(id_interacao, self._conteudos[id_conteudo], id_usuario, de_epoch(ts),
+                               plataformas[id_plataforma], TIPOS_INTERACAO[codigo], duracao, comentario or "")
+
+    # ------------------------------------------------------------------ métricas e relatórios
+
+    def gerar_relatorio_metricas(self, metricas: Iterable[str] = METRICAS_RELATORIO,
+                                 processos: int = 1) -> list[LinhaRelatorio]:
+        """
+        Mesmas linhas de SistemaAnaliseEngajamento.gerar_relatorio_metricas,
+        calculadas por GROUP BY no banco (processos é ignorado).
+        """
+        metricas = validar_metricas(metricas)
+        conteudos = self.listar_conteudos()
+        comentarios: Dict[int, List[str]] = {}
+        if "comentarios" in metricas:
+            for id_conteudo, texto in self._consultar(
+                    "SELECT id_conteudo, COALESCE(comentario, '') FROM interacoes WHERE tipo = ? "
+                    "ORDER BY id_conteudo, id_interacao", (CODIGO_TIPO["comment"],)):
+                comentarios.setdefault(id_conteudo, []).append(texto)
+        resumos = []
+        for conteudo in conteudos:
+            m = conteudo._obter_metricas()
+            resumos.append(ResumoConteudo(m.contagem_por_tipo, m.total_engajamento, m.tempo_total,
+                                          m.media_tempo, m.qtd_usuarios_com_tempo(),
+                                          comentarios.get(conteudo.id_conteudo, [])))
+        return montar_linhas_relatorio(conteudos, resumos, metricas)
+
+    def calcular_metricas_conteudos(self) -> dict[int, MetricasConteudo]:
+        """{id_conteudo: métricas} calculadas no banco (sem o tempo por usuário)."""
+        return {c.id_conteudo: c._obter_metricas() for c in self.listar_conteudos()}
+
+    def ranking_conteudos(self, top_n: int = None, tipo: str = None) -> list[tuple[ConteudoSQL, int]]:
+        """Mesma ordem e totais do sistema em memória, por ORDER BY ... LIMIT no banco."""
+        filtro, parametros = "", []
+        if tipo is not None:
+            if tipo.lower() not in self._MAPA_TIPOS:
+                return []
+            filtro, parametros = "WHERE c.tipo = ?", [tipo.lower()]
+        limite = "LIMIT ?" if top_n is not None else ""
+        if top_n is not None:
+            parametros.append(top_n)
+        sql = (f"SELECT c.id_conteudo, COALESCE(e.total, 0) AS total FROM conteudos c "
+               f"LEFT JOIN (SELECT id_conteudo, COUNT(*) AS total FROM interacoes "
+               f"WHERE {_FILTRO_ENGAJAMENTO} GROUP BY id_conteudo) e USING (id_conteudo) "
+               f"{filtro} ORDER BY total DESC, c.ordem {limite}")
+        return [(self._resumir_conteudo(id_conteudo), total)
+                for id_conteudo, total in self._consultar(sql, parametros)]
+
+    def _resumir_conteudo(self, id_conteudo: int) -> ConteudoSQL:
+        conteudo = self._conteudos[id_conteudo]
+        return ConteudoSQL(id_conteudo, conteudo.nome_conteudo, type(conteudo).__name__.lower())
+
+    def ranking_usuarios(self, top_n: int = None) -> list[tuple[UsuarioSQL, int]]:
+        limite = "LIMIT ?" if top_n is not None else ""
+        usuarios = self._consultar_usuarios(f"GROUP BY u.ordem ORDER BY total DESC, u.ordem {limite}",
+                                            [top_n] if top_n is not None else [])
+        return [(u, u.total_interacoes) for u in usuarios]
+
+    def gerar_relatorio_engajamento_conteudos(self, top_n: int = None) -> None:
+        linhas = self.ranking_conteudos(top_n) if top_n is not None else (
+            (c, c.calcular_total_interacoes_engajamento()) for c in self.listar_conteudos())
+        for c, total in linhas:
+            print(f"ID: {c.id_conteudo} | Nome: {c.nome_conteudo} | Interacoes: {total}")
+
+    def gerar_relatorio_atividade_usuarios(self, top_n: int = None) -> None:
+        linhas = self.ranking_usuarios(top_n) if top_n is not None else (
+            (u, u.total_interacoes) for u in self.listar_usuarios())
+        for u, total in linhas:
+            print(f"ID: {u.id_usuario} | Interacoes: {total}")
+
+    def rollups_plataformas(self) -> dict[int, MetricasPlataforma]:
+        """{id_plataforma: rollup} por GROUP BY no banco, a cada chamada."""
+        rollups = {id_plataforma: _RollupSQL(qtd_usuarios, qtd_conteudos)
+                   for id_plataforma, qtd_usuarios, qtd_conteudos in self._consultar(
+                       "SELECT id_plataforma, COUNT(DISTINCT id_usuario), COUNT(DISTINCT id_conteudo) "
+                       "FROM interacoes GROUP BY id_plataforma")}
+        for id_plataforma, codigo, quantidade, tempo, qtd_tempos in self._consultar(
+                "SELECT id_plataforma, tipo, COUNT(*), SUM(MAX(duracao, 0)), SUM(duracao > 0) "
+                "FROM interacoes GROUP BY id_plataforma, tipo ORDER BY id_plataforma, MIN(id_interacao)"):
+            rollup = rollups[id_plataforma]
+            tipo = TIPOS_INTERACAO[codigo]
+            rollup.contagem_por_tipo[tipo] = quantidade
+            if tipo in TIPOS_ENGAJAMENTO:
+                rollup.total_engajamento += quantidade
+            rollup.tempo_total += tempo
+            rollup.qtd_tempos_positivos += qtd_tempos
+        return rollups
+
+    def coconsumo(self, tipos: Iterable[str] = None) -> MotorCoconsumo:
+        audiencias: Dict[int, List[int]] = {c: [] for c in self._conteudos}
+        sql, parametros = "SELECT id_conteudo, id_usuario FROM interacoes", []
+        if tipos is not None:
+            codigos = [CODIGO_TIPO[t] for t in tipos if t in CODIGO_TIPO]
+            sql += f" WHERE tipo IN ({', '.join('?' * len(codigos))})"
+            parametros = codigos
+        for id_conteudo, id_usuario in self._consultar(sql + " ORDER BY id_interacao", parametros):
+            audiencias[id_conteudo].append(id_usuario)
+        return MotorCoconsumo(audiencias)
+
+    # ------------------------------------------------------------------ consultas por intervalo
+
+    def engajamento_conteudo_no_intervalo(self, id_conteudo: int, inicio: datetime, fim: datetime) -> int:
+        (total,) = self._consultar(
+            f"SELECT COUNT(*) FROM interacoes WHERE id_conteudo = ? AND timestamp >= ? AND timestamp < ? "
+            f"AND {_FILTRO_ENGAJAMENTO}", (id_conteudo, para_epoch(inicio), para_epoch(fim))).fetchone()
+        return total
+
+    def engajamento_por_conteudo_no_intervalo(self, inicio: datetime, fim: datetime) -> dict[int, int]:
+        totais = dict(self._consultar(
+            f"SELECT id_conteudo, COUNT(*) FROM interacoes WHERE timestamp >= ? AND timestamp < ? "
+            f"AND {_FILTRO_ENGAJAMENTO} GROUP BY id_conteudo", (para_epoch(inicio), para_epoch(fim))))
+        return {id_conteudo: totais.get(id_conteudo, 0) for id_conteudo in self._conteudos}
+
+    def tempo_consumo_usuario_no_intervalo(self, id_usuario: int, inicio: datetime, fim: datetime) -> int:
+        (total,) = self._consultar(
+            "SELECT COALESCE(SUM(duracao), 0) FROM interacoes WHERE id_usuario = ? "
+            "AND timestamp >= ? AND timestamp < ? AND duracao > 0",
+            (id_usuario, para_epoch(inicio), para_epoch(fim))).fetchone()
+        return total
+
+    def tempo_por_plataforma_por_hora(self, inicio: datetime,
+                                      fim: datetime) -> dict[int, list[tuple[datetime, int]]]:
+        t0, t1 = para_epoch(inicio), para_epoch(fim)
+        hora0 = t0 - t0 % _HORA_US
+        qtd_horas = max(0, -(-(t1 - hora0) // _HORA_US))
+        series = {p.id_plataforma: [0] * qtd_horas for p in self._plataformas.values()}
+        for id_plataforma, balde, tempo in self._consultar(
+                "SELECT id_plataforma, (timestamp - ?) / ?, SUM(duracao) FROM interacoes "
+                "WHERE timestamp >= ? AND timestamp < ? AND duracao > 0 GROUP BY 1, 2",
+                (hora0, _HORA_US, t0, t1)):
+            series[id_plataforma][balde] = tempo
+        return {id_plataforma: [(de_epoch(hora0 + n * _HORA_US), tempo) for n, tempo in enumerate(serie)]
+                for id_plataforma, serie in series.items()}
+
+    # ------------------------------------------------------------------ não suportados
+
+    salvar_snapshot = _Indisponivel()
+    estatisticas_aproximadas = _Indisponivel()
+    sketches_plataformas = _Indisponivel()
+    indice_temporal = _Indisponivel()
+    indice_comentarios = _Indisponivel()
+    buscar_comentarios = _Indisponivel()
@@ -0,0 +1,399 @@
+import gc
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from itertools import accumulate
+from operator import attrgetter
+from typing import Optional
+
+from entidades.armazenamento import (ArmazenamentoColunar, ListaInteracoes, CODIGO_TIPO,
+                                     TIPOS_INTERACAO, de_epoch)
+from entidades.conteudo import Conteudo, Video, Podcast, Artigo
+from entidades.interacao import Interacao
+from entidades.metricas import MetricasConteudo, MetricasPlataforma
+from entidades.plataforma import Plataforma
+from entidades.usuario import Usuario
+from analise.indice_comentarios import IndiceComentarios
+
+# Layout do arquivo:
+#   MAGICO (8 bytes) | versão (uint32) | tamanho do cabeçalho (uint64) |
+#   cabeçalho JSON (utf-8) | seções binárias, cada uma alinhada em 8 bytes
+# O cabeçalho guarda o modo do sistema, plataformas, conteúdos e o layout
+# das seções; colunas de interações, ids de usuários, pool de comentários
+# e acumuladores ficam nas seções binárias; os rollups por plataforma têm
+# os escalares no cabeçalho e os usuários e conteúdos distintos em seções.
+MAGICO = b"GLOBOSNP"
+VERSAO_FORMATO = 3
+_PREFIXO = struct.Struct("<8sIQ")
+
+# {classe: nome da propriedade de duração passada ao construtor}
+_DURACAO_POR_CLASSE = {
+    "Video": "duracao_total_video_seg",
+    "Podcast": "duracao_total_episodio_seg",
+    "Artigo": "tempo_leitura_estimado_seg",
+    "Conteudo": None,
+}
+_CLASSES_CONTEUDO = {"Video": Video, "Podcast": Podcast, "Artigo": Artigo, "Conteudo": Conteudo}
+
+
+def impressao_digital(caminho_origem: str, calcular_hash: bool = False) -> dict:
+    """Tamanho, mtime e, opcionalmente, SHA-256 do arquivo de origem."""
+    info = os.stat(caminho_origem)
+    digital = {"tamanho": info.st_size, "mtime_ns": info.st_mtime_ns}
+    if calcular_hash:
+        h = hashlib.sha256()
+        with open(caminho_origem, "rb") as f:
+            for bloco in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(bloco)
+        digital["sha256"] = h.hexdigest()
+    return digital
+
+
+def _ler_cabecalho(f) -> Optional[dict]:
+    prefixo = f.read(_PREFIXO.size)
+    if len(prefixo) < _PREFIXO.size:
+        return None
+    magico, versao, tamanho = _PREFIXO.unpack(prefixo)
+    if magico != MAGICO or versao != VERSAO_FORMATO:
+        return None
+    return json.loads(f.read(tamanho).decode("utf-8"))
+
+
+def snapshot_valido(caminho_snapshot: str,
+                    caminho_origem: Optional[str] = None,
+                    verificar_hash: bool = False) -> bool:
+    """
+    Indica se o snapshot existe, tem formato reconhecido e, quando
+    caminho_origem é informado, corresponde ao arquivo de origem atual
+    (tamanho e mtime; também SHA-256 se verificar_hash=True).
+    """
+    try:
+        with open(caminho_snapshot, "rb") as f:
+            cabecalho = _ler_cabecalho(f)
+    except (OSError, ValueError):
+        return False
+    if cabecalho is None:
+        return False
+    if caminho_origem is None:
+        return True
+
+    gravada = cabecalho.get("origem")
+    if not gravada:
+        return False
+    try:
+        atual = impressao_digital(caminho_origem, calcular_hash=verificar_hash)
+    except OSError:
+        return False
+    if (atual["tamanho"], atual["mtime_ns"]) != (gravada["tamanho"], gravada["mtime_ns"]):
+        return False
+    if verificar_hash:
+        return gravada.get("sha256") == atual["sha256"]
+    return True
+
+
+def _duracao(conteudo) -> int:
+    propriedade = _DURACAO_POR_CLASSE[type(conteudo).__name__]
+    return getattr(conteudo, propriedade) if propriedade else 0
+
+
+def _concatenar(listas) -> tuple:
+    """Une listas de posições em formato CSR: (offsets, indices)."""
+    offsets = array('q', [0])
+    indices = array('q')
+    for lista in listas:
+        indices.extend(lista)
+        offsets.append(len(indices))
+    return offsets, indices
+
+
+def _secoes_pool(pool_comentarios) -> dict:
+    """Pool de comentários como um bloco utf-8 e os offsets de cada texto."""
+    textos = [texto.encode("utf-8") for texto in pool_comentarios]
+    return {
+        "comentarios_offsets": array('q', accumulate(map(len, textos), initial=0)),
+        "comentarios_texto": array('B', b"".join(textos)),
+    }
+
+
+def _decodificar_pool(secoes: dict) -> list:
+    offsets, texto = secoes["comentarios_offsets"], secoes["comentarios_texto"].tobytes()
+    return [texto[inicio:fim].decode("utf-8") for inicio, fim in zip(offsets, offsets[1:])]
+
+
+def _secoes_metricas(conteudos) -> dict:
+    """
+    Acumuladores exatos (MetricasConteudo) de cada conteúdo: contagens na
+    ordem em que os tipos apareceram, escalares e tempo por usuário em CSR.
+    Conteúdos no modo aproximado ocupam uma entrada vazia e são refeitos na carga.
+    """
+    tipos, contagens, escalares = array('b'), array('q'), array('q')
+    offsets, ids_usuarios, tempos = array('q', [0]), array('q'), array('q')
+    for conteudo in conteudos:
+        itens = []
+        if not conteudo.metricas_aproximadas:
+            metricas = conteudo._obter_metricas()
+            itens = [(CODIGO_TIPO[tipo], quantidade) for tipo, quantidade in metricas.contagem_por_tipo.items()]
+            escalares.extend((metricas.total_engajamento, metricas.tempo_total, metricas.qtd_tempos_positivos))
+            ids_usuarios.extend(metricas.tempo_por_usuario.keys())
+            tempos.extend(metricas.tempo_por_usuario.values())
+        else:
+            escalares.extend((0, 0, 0))
+        itens += [(-1, 0)] * (len(TIPOS_INTERACAO) - len(itens))
+        for codigo, quantidade in itens:
+            tipos.append(codigo)
+            contagens.append(quantidade)
+        offsets.append(len(ids_usuarios))
+    return {
+        "metricas_tipos": tipos,
+        "metricas_contagens": contagens,
+        "metricas_escalares": escalares,
+        "metricas_usuarios_offsets": offsets,
+        "metricas_usuarios_ids": ids_usuarios,
+        "metricas_usuarios_tempos": tempos,
+    }
+
+
+def _metricas_conteudo(secoes: dict, n: int) -> MetricasConteudo:
+    """Reconstrói os acumuladores do n-ésimo conteúdo a partir de _secoes_metricas."""
+    metricas = MetricasConteudo()
+    tipos, contagens = secoes["metricas_tipos"], secoes["metricas_contagens"]
+    base = n * len(TIPOS_INTERACAO)
+    metricas.contagem_por_tipo = {TIPOS_INTERACAO[tipos[k]]: contagens[k]
+                                  for k in range(base, base + len(TIPOS_INTERACAO)) if tipos[k] >= 0}
+    (metricas.total_engajamento, metricas.tempo_total,
+     metricas.qtd_tempos_positivos) = secoes["metricas_escalares"][3 * n:3 * n + 3]
+    offsets = secoes["metricas_usuarios_offsets"]
+    inicio, fim = offsets[n], offsets[n + 1]
+    metricas.tempo_por_usuario = dict(zip(secoes["metricas_usuarios_ids"][inicio:fim],
+                                          secoes["metricas_usuarios_tempos"][inicio:fim]))
+    return metricas
+
+
+def _rollups_cabecalho(rollups: dict) -> tuple:
+    """Rollups por plataforma: escalares para o cabeçalho e conjuntos distintos em CSR."""
+    escalares = [[id_plataforma, r.contagem_por_tipo, r.total_engajamento, r.tempo_total, r.qtd_tempos_positivos]
+                 for id_plataforma, r in rollups.items()]
+    secoes = {}
+    secoes["rollups_usuarios_offsets"], secoes["rollups_usuarios_ids"] = _concatenar(
+        r.usuarios for r in rollups.values())
+    secoes["rollups_conteudos_offsets"], secoes["rollups_conteudos_ids"] = _concatenar(
+        r.conteudos for r in rollups.values())
+    return escalares, secoes
+
+
+def _restaurar_rollups(escalares: list, secoes: dict) -> dict:
+    rollups = {}
+    offsets_u, ids_u = secoes["rollups_usuarios_offsets"], secoes["rollups_usuarios_ids"]
+    offsets_c, ids_c = secoes["rollups_conteudos_offsets"], secoes["rollups_conteudos_ids"]
+    for n, (id_plataforma, contagem, total_engajamento, tempo_total, qtd_tempos) in enumerate(escalares):
+        rollup = rollups[id_plataforma] = MetricasPlataforma()
+        rollup.contagem_por_tipo = contagem
+        rollup.total_engajamento, rollup.tempo_total, rollup.qtd_tempos_positivos = \
+            total_engajamento, tempo_total, qtd_tempos
+        rollup.usuarios = set(ids_u[offsets_u[n]:offsets_u[n + 1]])
+        rollup.conteudos = set(ids_c[offsets_c[n]:offsets_c[n + 1]])
+    return rollups
+
+
+def salvar(sistema, caminho_snapshot: str,
+           caminho_origem: Optional[str] = None,
+           calcular_hash: bool = False) -> None:
+    """
+    Grava plataformas, conteúdos, usuários e interações do sistema, com os
+    acumuladores de conteúdos, usuários e plataformas e o modo (colunar ou de objetos,
+    métricas exatas ou aproximadas).
+    """
+    plataformas, conteudos, usuarios, proximo_id_plataforma = sistema._registros()
+
+    armazenamento = sistema.armazenamento
+    colunar = armazenamento is not None
+    if colunar:
+        posicoes_conteudos = [c._interacoes._indices for c in conteudos.values()]
+        posicoes_usuarios = [u._lista_interacoes._indices for u in usuarios.values()]
+    else:
+        # modo de objetos: copia as interações, na ordem de registro, para um armazenamento temporário
+        armazenamento = ArmazenamentoColunar()
+        todas = sorted((i for c in conteudos.values() for i in c._interacoes), key=attrgetter("id_interacao"))
+        posicao = {id(i): armazenamento.adicionar(i) for i in todas}
+        posicoes_conteudos = [array('q', (posicao[id(i)] for i in c._interacoes)) for c in conteudos.values()]
+        posicoes_usuarios = [
+            array('q', (posicao[id(i)] for i in u.interacoes))
+            for u in usuarios.values()
+        ]
+
+    ordem_plataforma = {id(p): n for n, p in enumerate(plataformas.values())}
+    secoes = {nome: getattr(armazenamento, nome) for nome in ArmazenamentoColunar.COLUNAS}
+    secoes["conteudos_offsets"], secoes["conteudos_indices"] = _concatenar(posicoes_conteudos)
+    secoes["usuarios_offsets"], secoes["usuarios_indices"] = _concatenar(posicoes_usuarios)
+    secoes["usuarios_ids"] = array('q', usuarios.keys())
+    secoes["usuarios_tempo_total"] = array('q', (u.calcular_tempo_total_consumo() for u in usuarios.values()))
+    secoes.update(_secoes_pool(armazenamento._pool_comentarios))
+    secoes.update(_secoes_metricas(conteudos.values()))
+    rollups, secoes_rollups = _rollups_cabecalho(sistema.rollups_plataformas())
+    secoes.update(secoes_rollups)
+
+    layout = {}
+    deslocamento = 0
+    for nome, secao in secoes.items():
+        tamanho = len(secao) * secao.itemsize
+        # memoryviews (colunas ainda mapeadas de outro snapshot) têm format no lugar de typecode
+        layout[nome] = [getattr(secao, "typecode", None) or secao.format, deslocamento, len(secao)]
+        deslocamento += (tamanho + 7) // 8 * 8
+
+    cabecalho = {
+        "versao_analise": sistema.VERSAO_ANALISE,
+        "ordem_bytes": sys.byteorder,
+        "origem": impressao_digital(caminho_origem, calcular_hash) if caminho_origem else None,
+        "armazenamento_colunar": colunar,
+        "metricas_aproximadas": sistema.metricas_aproximadas,
+        "proximo_id_plataforma": proximo_id_plataforma,
+        "proximo_id_interacao": Interacao._id_interacao_global,
+        "plataformas": [[chave, p.nome_plataforma, p.id_plataforma] for chave, p in plataformas.items()],
+        "plataformas_armazenamento": [ordem_plataforma[id(p)] for p in armazenamento._lista_plataformas],
+        "conteudos": [
+            [c.id_conteudo, c.nome_conteudo, type(c).__name__, _duracao(c), c.metricas_aproximadas]
+            for c in conteudos.values()
+        ],
+        "rollups_plataformas": rollups,
+        "secoes": layout,
+    }
+    bruto = json.dumps(cabecalho, ensure_ascii=False).encode("utf-8")
+    bruto += b" " * (-(_PREFIXO.size + len(bruto)) % 8)
+
+    temporario = caminho_snapshot + ".tmp"
+    with open(temporario, "wb") as f:
+        f.write(_PREFIXO.pack(MAGICO, VERSAO_FORMATO, len(bruto)))
+        f.write(bruto)
+        for nome, secao in secoes.items():
+            f.write(secao)
+            f.write(b"\0" * (-(len(secao) * secao.itemsize) % 8))
+    os.replace(temporario, caminho_snapshot)
+
+
+def _mapear_secoes(caminho_snapshot: str) -> tuple:
+    """
+    Lê o cabeçalho e as seções do snapshot. As colunas de interações são
+    memoryviews sobre o arquivo mapeado, sem cópia (exceto se a ordem de
+    bytes for outra); as demais seções, pequenas ou lidas de uma vez, são
+    copiadas para arrays.
+    """
+    with open(caminho_snapshot, "rb") as f:
+        cabecalho = _ler_cabecalho(f)
+        if cabecalho is None:
+            raise ValueError("Arquivo de snapshot inválido ou de versão incompatível.")
+        inicio_dados = f.tell()
+        # o mapeamento continua válido depois de fechar o arquivo; é liberado
+        # quando as colunas deixam de referenciá-lo
+        visao = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    mesma_ordem = cabecalho["ordem_bytes"] == sys.byteorder
+    secoes = {}
+    for nome, (typecode, deslocamento, qtd) in cabecalho["secoes"].items():
+        secao = array(typecode)
+        inicio = inicio_dados + deslocamento
+        bruto = visao[inicio:inicio + qtd * secao.itemsize]
+        if nome in ArmazenamentoColunar.COLUNAS and mesma_ordem:
+            secoes[nome] = bruto.cast(typecode)
+            continue
+        secao.frombytes(bruto)
+        if not mesma_ordem:
+            secao.byteswap()
+        secoes[nome] = secao
+    return cabecalho, secoes
+
+
+def _interacoes_como_objetos(armazenamento: ArmazenamentoColunar) -> list:
+    """Uma Interacao por posição do armazenamento, com os IDs originais (modo de objetos)."""
+    conteudos, plataformas = armazenamento._mapa_conteudos, armazenamento._lista_plataformas
+    pool = armazenamento._pool_comentarios
+    return [
+        Interacao._restaurar(id_interacao, conteudos[id_conteudo], plataformas[codigo_plataforma],
+                             id_usuario, de_epoch(instante), TIPOS_INTERACAO[codigo_tipo], duracao,
+                             pool[comentario])
+        for (id_interacao, id_conteudo, id_usuario, instante, codigo_plataforma, codigo_tipo, duracao,
+             comentario) in zip(*(getattr(armazenamento, nome) for nome in ArmazenamentoColunar.COLUNAS))
+    ]
+
+
+def carregar(caminho_snapshot: str, classe_sistema):
+    """
+    Reconstrói uma instância de classe_sistema, no mesmo modo (colunar ou
+    de objetos, métricas exatas ou aproximadas) em que foi salva. No modo
+    colunar as colunas são usadas direto do arquivo mapeado em memória e
+    só são copiadas quando novas interações forem acrescentadas; os
+    acumuladores exatos e os rollups por plataforma são restaurados sem
+    percorrer as interações.
+    """
+    cabecalho, secoes = _mapear_secoes(caminho_snapshot)
+    # só objetos novos e todos alcançáveis: as coletas durante a carga não liberariam nada
+    reativar_gc = gc.isenabled()
+    gc.disable()
+    try:
+        return _restaurar_sistema(cabecalho, secoes, classe_sistema)
+    finally:
+        if reativar_gc:
+            gc.enable()
+
+
+def _restaurar_sistema(cabecalho: dict, secoes: dict, classe_sistema):
+
+    plataformas = {}
+    lista_plataformas = []
+    for chave, nome, id_plataforma in cabecalho["plataformas"]:
+        p = Plataforma(nome, id_plataforma=id_plataforma)
+        plataformas[chave] = p
+        lista_plataformas.append(p)
+
+    conteudos = {}
+    for id_conteudo, nome, classe, duracao, aproximado in cabecalho["conteudos"]:
+        cls = _CLASSES_CONTEUDO[classe]
+        conteudo = cls(id_conteudo, nome) if cls is Conteudo else cls(id_conteudo, nome, duracao)
+        if aproximado:
+            conteudo.usar_metricas_aproximadas()
+        conteudos[id_conteudo] = conteudo
+
+    armazenamento = ArmazenamentoColunar._restaurar(
+        {nome: secoes[nome] for nome in ArmazenamentoColunar.COLUNAS},
+        _decodificar_pool(secoes),
+        [lista_plataformas[n] for n in cabecalho["plataformas_armazenamento"]],
+        conteudos,
+    )
+    # o índice de comentários não vai no arquivo: é refeito aqui, das colunas (na ordem de registro)
+    indice_comentarios = IndiceComentarios.de_armazenamento(armazenamento)
+    colunar = cabecalho["armazenamento_colunar"]
+    if colunar:
+        def nova_lista(posicoes):
+            return ListaInteracoes(armazenamento, posicoes)
+    else:
+        interacoes = _interacoes_como_objetos(armazenamento)
+        armazenamento = None
+
+        def nova_lista(posicoes):
+            return list(map(interacoes.__getitem__, posicoes))
+
+    offsets, indices = secoes["conteudos_offsets"], secoes["conteudos_indices"]
+    for n, conteudo in enumerate(conteudos.values()):
+        conteudo._definir_interacoes(nova_lista(indices[offsets[n]:offsets[n + 1]]))
+        if not conteudo.metricas_aproximadas:
+            # aproximados (sketches) são refeitos na primeira leitura, na mesma ordem
+            conteudo._definir_metricas(_metricas_conteudo(secoes, n))
+
+    usuarios = {}
+    offsets, indices = secoes["usuarios_offsets"], secoes["usuarios_indices"]
+    for id_usuario, tempo_total, inicio, fim in zip(secoes["usuarios_ids"], secoes["usuarios_tempo_total"],
+                                                    offsets, offsets[1:]):
+        usuarios[id_usuario] = Usuario._restaurar(id_usuario, nova_lista(indices[inicio:fim]), tempo_total)
+
+    Interacao._id_interacao_global = max(Interacao._id_interacao_global,
+                                         cabecalho["proximo_id_interacao"])
+
+    sistema = classe_sistema(armazenamento_colunar=colunar,
+                             metricas_aproximadas=cabecalho["metricas_aproximadas"])
+    sistema._restaurar_registros(plataformas, conteudos, usuarios,
+                                 cabecalho["proximo_id_plataforma"], armazenamento,
+                                 _restaurar_rollups(cabecalho["rollups_plataformas"], secoes),
+                                 indice_comentarios)
+    return sistema
@@ -0,0 +1,205 @@
+import asyncio
+import csv
+import io
+import time
+from collections import deque
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from entidades.armazenamento import para_epoch, de_epoch
+
+# Ordem dos contadores de cada agregado de janela
+METRICAS_JANELA = ("views", "likes", "shares", "comments", "watch_seconds")
+_POSICAO_TIPO = {"view_start": 0, "like": 1, "share": 2, "comment": 3}
+_POSICAO_TEMPO = 4
+_MICROSSEGUNDO = timedelta(microseconds=1)
+
+
+class Janela:
+    """Agregados de uma janela [inicio, fim) por conteúdo e por plataforma."""
+    __slots__ = ("inicio", "fim", "por_conteudo", "por_plataforma")
+
+    def __init__(self, inicio: int, fim: int):
+        self.inicio = inicio   # epoch em microssegundos
+        self.fim = fim
+        self.por_conteudo: Dict[int, List[int]] = {}
+        self.por_plataforma: Dict[int, List[int]] = {}
+
+    @staticmethod
+    def _acumular(mapa: dict, chave, posicao: int, duracao: int) -> None:
+        contadores = mapa.get(chave)
+        if contadores is None:
+            contadores = mapa[chave] = [0] * len(METRICAS_JANELA)
+        contadores[posicao] += 1
+        if duracao > 0:
+            contadores[_POSICAO_TEMPO] += duracao
+
+    def registrar(self, id_conteudo: int, id_plataforma: int, posicao: int, duracao: int) -> None:
+        self._acumular(self.por_conteudo, id_conteudo, posicao, duracao)
+        self._acumular(self.por_plataforma, id_plataforma, posicao, duracao)
+
+    def como_dict(self) -> dict:
+        """Representação serializável, com as métricas nomeadas."""
+        def nomear(mapa):
+            return {chave: dict(zip(METRICAS_JANELA, contadores)) for chave, contadores in mapa.items()}
+        return {
+            "inicio": de_epoch(self.inicio).isoformat(),
+            "fim": de_epoch(self.fim).isoformat(),
+            "por_conteudo": nomear(self.por_conteudo),
+            "por_plataforma": nomear(self.por_plataforma),
+        }
+
+    def __repr__(self) -> str:
+        return f"Janela(inicio='{de_epoch(self.inicio)}', fim='{de_epoch(self.fim)}')"
+
+
+class AgregadorJanelas:
+    """
+    Agrega interações em janelas de tempo de evento. Com passo igual ao
+    tamanho (padrão) as janelas são fixas (tumbling); com passo menor,
+    deslizantes (sliding), cada interação entrando em tamanho/passo janelas.
+
+    A marca d'água é o maior timestamp visto menos atraso_permitido. Janelas
+    cujo fim fica atrás dela são fechadas: saem da memória, vão para
+    ao_fechar (se informado) e para as últimas max_fechadas janelas mantidas
+    em fechadas. Interações que só caberiam em janelas fechadas são
+    descartadas e contadas em descartadas.
+    """
+    def __init__(self,
+                 tamanho: timedelta,
+                 passo: Optional[timedelta] = None,
+                 atraso_permitido: timedelta = timedelta(0),
+                 max_fechadas: int = 100,
+                 ao_fechar: Optional[Callable[[Janela], None]] = None):
+        self._tamanho = tamanho // _MICROSSEGUNDO
+        self._passo = (passo or tamanho) // _MICROSSEGUNDO
+        if self._tamanho <= 0 or self._passo <= 0:
+            raise ValueError("tamanho e passo devem ser positivos.")
+        if self._passo > self._tamanho:
+            raise ValueError("passo não pode ser maior que o tamanho da janela.")
+        self._atraso = atraso_permitido // _MICROSSEGUNDO
+        self._abertas: Dict[int, Janela] = {}
+        self._marca_dagua: Optional[int] = None
+        self.fechadas = deque(maxlen=max_fechadas)
+        self._ao_fechar = ao_fechar
+        self.descartadas = 0
+
+    @property
+    def deslizante(self) -> bool:
+        return self._passo < self._tamanho
+
+    def registrar(self, interacao) -> bool:
+        """Inclui a interação nas janelas abertas; False se foi descartada."""
+        instante = para_epoch(interacao.timestamp_interacao)
+        posicao = _POSICAO_TIPO[interacao.tipo_interacao]
+        id_conteudo = interacao.conteudo_associado.id_conteudo
+        id_plataforma = interacao.plataforma_interacao.id_plataforma
+        duracao = interacao.watch_duration_seconds
+
+        marca = self._marca_dagua
+        # menor início múltiplo do passo cuja janela ainda contém o instante
+        inicio = (instante - self._tamanho) // self._passo * self._passo + self._passo
+        aceita = False
+        while inicio <= instante:
+            fim = inicio + self._tamanho
+            if marca is None or fim > marca:
+                janela = self._abertas.get(inicio)
+                if janela is None:
+                    janela = self._abertas[inicio] = Janela(inicio, fim)
+                janela.registrar(id_conteudo, id_plataforma, posicao, duracao)
+                aceita = True
+            inicio += self._passo
+
+        if not aceita:
+            self.descartadas += 1
+            return False
+
+        nova_marca = instante - self._atraso
+        if marca is None or nova_marca > marca:
+            self._marca_dagua = nova_marca
+            self._fechar_ate(nova_marca)
+        return True
+
+    def _fechar_ate(self, marca: int) -> None:
+        for inicio in sorted(i for i, j in self._abertas.items() if j.fim <= marca):
+            self._fechar(self._abertas.pop(inicio))
+
+    def _fechar(self, janela: Janela) -> None:
+        self.fechadas.append(janela)
+        if self._ao_fechar is not None:
+            self._ao_fechar(janela)
+
+    def fechar_todas(self) -> None:
+        """Fecha todas as janelas abertas (ex.: fim do fluxo)."""
+        for inicio in sorted(self._abertas):
+            self._fechar(self._abertas.pop(inicio))
+
+    def janelas_abertas(self) -> List[Janela]:
+        return [self._abertas[i] for i in sorted(self._abertas)]
+
+    def agregado(self, dimensao: str, chave: int) -> Dict[str, Dict[str, int]]:
+        """
+        Métricas atuais de um conteúdo (dimensao='conteudo') ou de uma
+        plataforma (dimensao='plataforma') em cada janela aberta.
+        """
+        if dimensao not in ("conteudo", "plataforma"):
+            raise ValueError("dimensao deve ser 'conteudo' ou 'plataforma'.")
+        resultado = {}
+        for janela in self.janelas_abertas():
+            mapa = janela.por_conteudo if dimensao == "conteudo" else janela.por_plataforma
+            contadores = mapa.get(chave)
+            if contadores is not None:
+                resultado[de_epoch(janela.inicio).isoformat()] = dict(zip(METRICAS_JANELA, contadores))
+        return resultado
+
+
+def acompanhar_csv(caminho_arquivo: str,
+                   intervalo: float = 0.5,
+                   ocioso_max: Optional[float] = None) -> Iterator[dict]:
+    """
+    Fonte local estilo "tail -f": entrega como dict cada linha completa
+    acrescentada ao CSV. Para após ocioso_max segundos sem dados novos,
+    inclusive enquanto espera o cabeçalho (None = acompanha indefinidamente).
+    """
+    with open(caminho_arquivo, newline="", encoding="utf-8") as f:
+        primeira = f.readline()
+        ocioso = 0.0
+        while not primeira.endswith("\n"):
+            if ocioso_max is not None and ocioso >= ocioso_max:
+                return
+            time.sleep(intervalo)
+            trecho = f.readline()
+            ocioso = 0.0 if trecho else ocioso + intervalo
+            primeira += trecho
+        cabecalho = next(csv.reader([primeira]))
+        parcial = ""
+        ocioso = 0.0
+        while ocioso_max is None or ocioso < ocioso_max:
+            trecho = f.readline()
+            if not trecho:
+                time.sleep(intervalo)
+                ocioso += intervalo
+                continue
+            ocioso = 0.0
+            parcial += trecho
+            if not parcial.endswith("\n"):
+                continue   # linha ainda sendo escrita
+            yield from csv.DictReader(io.StringIO(parcial, newline=""), fieldnames=cabecalho)
+            parcial = ""
+
+
+async def alimentar_fila(fonte: Iterable[dict], fila: asyncio.Queue) -> None:
+    """
+    Copia as linhas de uma fonte síncrona (possivelmente bloqueante, como
+    acompanhar_csv) para a fila, lendo-a fora do event loop, e envia o
+    sentinela None ao final.
+    """
+    loop = asyncio.get_running_loop()
+    iterador = iter(fonte)
+    fim = object()
+    while True:
+        linha = await loop.run_in_executor(None, next, iterador, fim)
+        if linha is fim:
+            break
+        await fila.put(linha)
+    await fila.put(None)
@@ -0,0 +1,186 @@
+"""
+Executa a suíte de benchmarks e grava os resultados em JSON.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.executar --linhas 10000 100000 1000000 --saida resultados.json
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from analise.sistema import SistemaAnaliseEngajamento
+from entidades.conteudo import Video
+from benchmarks.gerador import gerar_csv
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _cronometrar(funcao, *args, **kwargs) -> float:
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        inicio = time.perf_counter()
+        funcao(*args, **kwargs)
+        return time.perf_counter() - inicio
+
+
+def _para_cada(itens, metodo):
+    def executar():
+        for item in itens:
+            metodo(item)
+    return executar
+
+
+def medir_metricas_conteudo(sistema) -> dict:
+    conteudos = sistema.listar_conteudos()
+    videos = [c for c in conteudos if isinstance(c, Video)]
+    return {
+        "calcular_total_interacoes_engajamento":
+            _cronometrar(_para_cada(conteudos, lambda c: c.calcular_total_interacoes_engajamento())),
+        "calcular_contagem_por_tipo_interacao":
+            _cronometrar(_para_cada(conteudos, lambda c: c.calcular_contagem_por_tipo_interacao())),
+        "calcular_tempo_total_consumo":
+            _cronometrar(_para_cada(conteudos, lambda c: c.calcular_tempo_total_consumo())),
+        "calcular_media_tempo_consumo":
+            _cronometrar(_para_cada(conteudos, lambda c: c.calcular_media_tempo_consumo())),
+        "listar_comentarios":
+            _cronometrar(_para_cada(conteudos, lambda c: c.listar_comentarios())),
+        "calcular_percentual_medio_assistido":
+            _cronometrar(_para_cada(videos, lambda v: v.calcular_percentual_medio_assistido())),
+    }
+
+
+def medir_metricas_usuario(sistema) -> dict:
+    usuarios = sistema.listar_usuarios()
+    plataforma = sistema.listar_plataformas()[0] if sistema.listar_plataformas() else None
+    return {
+        "interacoes_realizadas":
+            _cronometrar(_para_cada(usuarios, lambda u: u.interacoes_realizadas)),
+        "obter_interacoes_por_tipo":
+            _cronometrar(_para_cada(usuarios, lambda u: u.obter_interacoes_por_tipo("like"))),
+        "obter_conteudos_unicos_consumidos":
+            _cronometrar(_para_cada(usuarios, lambda u: u.obter_conteudos_unicos_consumidos())),
+        "calcular_tempo_total_consumo_plataforma":
+            _cronometrar(_para_cada(usuarios, lambda u: u.calcular_tempo_total_consumo_plataforma(plataforma))),
+        "plataformas_mais_frequentes":
+            _cronometrar(_para_cada(usuarios, lambda u: u.plataformas_mais_frequentes())),
+        "contar_interacoes_por_tipo":
+            _cronometrar(_para_cada(usuarios, lambda u: u.contar_interacoes_por_tipo("like"))),
+        "calcular_tempo_total_consumo":
+            _cronometrar(_para_cada(usuarios, lambda u: u.calcular_tempo_total_consumo())),
+    }
+
+
+def medir_relatorios(sistema, top_n: int) -> dict:
+    return {
+        "gerar_relatorio_engajamento_conteudos": _cronometrar(sistema.gerar_relatorio_engajamento_conteudos, top_n),
+        "gerar_relatorio_atividade_usuarios": _cronometrar(sistema.gerar_relatorio_atividade_usuarios, top_n),
+        "identificar_top_por_tipo": _cronometrar(
+            lambda: [sistema.identificar_top_por_tipo(t, top_n) for t in ("video", "podcast", "artigo")]),
+        "ranking_conteudos": _cronometrar(sistema.ranking_conteudos, top_n),
+        "ranking_usuarios": _cronometrar(sistema.ranking_usuarios, top_n),
+        "calcular_metricas_conteudos": _cronometrar(sistema.calcular_metricas_conteudos),
+    }
+
+
+def executar_rodada(linhas: int, args, diretorio: str) -> dict:
+    caminho = os.path.join(diretorio, f"sintetico_{linhas}.csv")
+    parametros = {
+        "linhas": linhas,
+        "qtd_conteudos": args.conteudos,
+        "qtd_usuarios": args.usuarios,
+        "qtd_plataformas": args.plataformas,
+        "proporcao_podcast": args.podcast,
+        "proporcao_artigo": args.artigo,
+        "semente": args.semente,
+    }
+    inicio = time.perf_counter()
+    gerar_csv(caminho, **parametros)
+    tempo_geracao = time.perf_counter() - inicio
+
+    sistema = SistemaAnaliseEngajamento(armazenamento_colunar=args.colunar)
+    if args.instrumentar:
+        sistema.habilitar_instrumentacao()
+    tempo_ingestao = _cronometrar(sistema.processar_interacoes_do_csv, caminho)
+    resultado = {
+        "parametros": parametros,
+        "armazenamento_colunar": args.colunar,
+        "tamanho_arquivo_bytes": os.path.getsize(caminho),
+        "tempo_geracao_seg": tempo_geracao,
+        "ingestao": {
+            "segundos": tempo_ingestao,
+            "linhas_por_segundo": linhas / tempo_ingestao if tempo_ingestao > 0 else 0.0,
+        },
+        "conteudo": medir_metricas_conteudo(sistema),
+        "usuario": medir_metricas_usuario(sistema),
+        "relatorios": medir_relatorios(sistema, args.top_n),
+    }
+    if args.instrumentar:
+        resultado["instrumentacao"] = sistema.relatorio_instrumentacao()
+        sistema.desabilitar_instrumentacao()
+    if resource is not None:
+        # pico do processo inteiro: só é da rodada porque cada uma roda em um processo novo
+        resultado["pico_memoria_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if not args.manter_csv:
+        os.remove(caminho)
+    return resultado
+
+
+def executar_rodada_isolada(linhas: int, args, diretorio: str) -> dict:
+    """
+    Executa a rodada em um processo novo (spawn), para que o pico de memória
+    e o estado do heap não venham das rodadas anteriores.
+    """
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+        return executor.submit(executar_rodada, linhas, args, diretorio).result()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks do SistemaAnaliseEngajamento")
+    parser.add_argument("--linhas", type=int, nargs="+", default=[10_000, 100_000],
+                        help="quantidades de linhas a gerar (ex.: 10000 ... 100000000)")
+    parser.add_argument("--conteudos", type=int, default=1_000)
+    parser.add_argument("--usuarios", type=int, default=100_000)
+    parser.add_argument("--plataformas", type=int, default=13)
+    parser.add_argument("--podcast", type=float, default=0.15, help="proporção de conteúdos podcast")
+    parser.add_argument("--artigo", type=float, default=0.15, help="proporção de conteúdos artigo")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--colunar", action="store_true", help="usa o armazenamento colunar")
+    parser.add_argument("--instrumentar", action="store_true", help="inclui o tempo por etapa da ingestão")
+    parser.add_argument("--diretorio", default=None, help="onde gerar os CSVs (padrão: temporário)")
+    parser.add_argument("--manter-csv", action="store_true", help="não apaga os CSVs (use com --diretorio)")
+    parser.add_argument("--saida", default="resultados_benchmark.json")
+    args = parser.parse_args(argv)
+
+    rodadas = []
+    with (contextlib.nullcontext(args.diretorio) if args.diretorio
+          else tempfile.TemporaryDirectory(prefix="bench_globo_")) as diretorio:
+        for linhas in args.linhas:
+            print(f"[benchmark] {linhas} linhas...")
+            rodadas.append(executar_rodada_isolada(linhas, args, diretorio))
+
+    relatorio = {
+        "versao_analise": SistemaAnaliseEngajamento.VERSAO_ANALISE,
+        "python": sys.version.split()[0],
+        "sistema_operacional": platform.platform(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "rodadas": rodadas,
+    }
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    print(f"[benchmark] resultados gravados em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import csv
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+CABECALHO = ["id_conteudo", "nome_conteudo", "id_usuario", "timestamp_interacao",
+             "plataforma", "tipo_interacao", "watch_duration_seconds", "comment_text"]
+
+PLATAFORMAS_GLOBO = ["TV Globo", "Globoplay", "G1", "GE Globo", "Receitas Gshow",
+                     "Multishow", "Sportv Play", "Premiere", "GNT Play", "Viva",
+                     "Canal Brasil", "App Cartola", "Spotify"]
+
+# nomes-base por tipo; os de podcast e artigo contêm as palavras-chave
+# usadas por Conteudo.criar_por_tipo
+NOMES_VIDEO = ["Jornal Nacional", "Novela Renascer", "Fantástico", "Big Brother Brasil",
+               "Domingão com Huck", "Globo Repórter", "Mais Você", "Altas Horas"]
+NOMES_PODCAST = ["Podcast Papo de Segunda", "Podcast O Assunto", "Podcast Ilustríssima Conversa"]
+NOMES_ARTIGO = ["Artigo Economia Hoje", "Documentário Amazônia", "Artigo Saúde em Foco"]
+
+COMENTARIOS = ["Muito bom o tema de hoje!", "Adorei a reportagem.", "Não concordo com a análise.",
+               "Que episódio incrível!", "Poderiam falar mais sobre educação.",
+               "Excelente cobertura, parabéns!", "A novela está emocionante.",
+               "Informação clara e objetiva."]
+
+MISTURA_TIPOS_PADRAO = {"view_start": 0.6, "like": 0.2, "share": 0.1, "comment": 0.1}
+
+
+def gerar_csv(caminho_arquivo: str,
+              linhas: int,
+              qtd_conteudos: int = 1_000,
+              qtd_usuarios: int = 100_000,
+              qtd_plataformas: int = len(PLATAFORMAS_GLOBO),
+              mistura_tipos: Optional[Dict[str, float]] = None,
+              proporcao_podcast: float = 0.15,
+              proporcao_artigo: float = 0.15,
+              inicio: datetime = datetime(2024, 10, 20),
+              intervalo_medio_seg: float = 1.0,
+              semente: int = 42,
+              tamanho_lote: int = 50_000) -> None:
+    """
+    Gera um CSV sintético no mesmo esquema de interacoes_globo.csv.
+
+    Cada id_conteudo recebe um nome fixo de vídeo, podcast ou artigo conforme
+    as proporções; timestamps crescem em média intervalo_medio_seg por linha;
+    view_start traz watch_duration_seconds e comment traz comment_text.
+    A escrita é feita em lotes, sem manter o arquivo inteiro em memória.
+    """
+    rnd = random.Random(semente)
+    mistura = mistura_tipos or MISTURA_TIPOS_PADRAO
+    tipos, pesos = list(mistura), list(mistura.values())
+
+    plataformas = (PLATAFORMAS_GLOBO + [f"Plataforma {n}" for n in range(len(PLATAFORMAS_GLOBO) + 1,
+                                                                        qtd_plataformas + 1)])[:qtd_plataformas]
+    nomes: List[str] = []
+    for id_conteudo in range(1, qtd_conteudos + 1):
+        sorteio = rnd.random()
+        if sorteio < proporcao_podcast:
+            base = rnd.choice(NOMES_PODCAST)
+        elif sorteio < proporcao_podcast + proporcao_artigo:
+            base = rnd.choice(NOMES_ARTIGO)
+        else:
+            base = rnd.choice(NOMES_VIDEO)
+        nomes.append(f"{base} {id_conteudo}")
+
+    instante = inicio
+    with open(caminho_arquivo, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f, lineterminator="\n")
+        escritor.writerow(CABECALHO)
+        restantes = linhas
+        while restantes > 0:
+            n = min(tamanho_lote, restantes)
+            restantes -= n
+            lote = []
+            for tipo in rnd.choices(tipos, weights=pesos, k=n):
+                id_conteudo = rnd.randint(1, qtd_conteudos)
+                instante += timedelta(seconds=rnd.expovariate(1 / intervalo_medio_seg))
+                duracao = f"{rnd.randint(30, 7200)}.0" if tipo == "view_start" else ""
+                comentario = rnd.choice(COMENTARIOS) if tipo == "comment" else ""
+                lote.append((
+                    id_conteudo,
+                    nomes[id_conteudo - 1],
+                    rnd.randint(1, qtd_usuarios),
+                    instante.strftime("%Y-%m-%d %H:%M:%S"),
+                    rnd.choice(plataformas),
+                    tipo,
+                    duracao,
+                    comentario,
+                ))
+            escritor.writerows(lote)
@@ -0,0 +1,110 @@
+"""
+Mede a memória das entidades e da ingestão completa com tracemalloc.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.memoria --linhas 100000 --saida memoria.json
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime
+
+from analise.sistema import SistemaAnaliseEngajamento
+from entidades.conteudo import Video, Podcast, Artigo
+from entidades.interacao import Interacao
+from entidades.plataforma import Plataforma
+from entidades.usuario import Usuario
+from benchmarks.gerador import gerar_csv
+
+
+def _bytes_por_objeto(fabrica, quantidade: int) -> float:
+    """Memória média alocada por objeto criado por fabrica(i)."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        antes = tracemalloc.get_traced_memory()[0]
+        objetos = [fabrica(i) for i in range(quantidade)]
+        depois = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del objetos
+    return (depois - antes) / quantidade
+
+
+def medir_entidades(quantidade: int) -> dict:
+    plataforma = Plataforma("Globoplay", id_plataforma=1)
+    conteudo = Video(1, "Jornal Nacional", duracao_total_video_seg=0)
+    instante = datetime(2024, 10, 20)
+    return {
+        "Plataforma": _bytes_por_objeto(lambda i: Plataforma("Globoplay", id_plataforma=i), quantidade),
+        "Usuario": _bytes_por_objeto(Usuario, quantidade),
+        "Video": _bytes_por_objeto(lambda i: Video(i, "Jornal Nacional", 0), quantidade),
+        "Podcast": _bytes_por_objeto(lambda i: Podcast(i, "Podcast O Assunto", 0), quantidade),
+        "Artigo": _bytes_por_objeto(lambda i: Artigo(i, "Artigo Economia Hoje", 0), quantidade),
+        "Interacao": _bytes_por_objeto(
+            lambda i: Interacao.de_campos_validados(conteudo, plataforma, i, instante, "like", 0, ""),
+            quantidade),
+    }
+
+
+def medir_ingestao(caminho_csv: str, linhas: int, colunar: bool) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        sistema = SistemaAnaliseEngajamento(armazenamento_colunar=colunar)
+        with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+            sistema.processar_interacoes_do_csv(caminho_csv)
+        atual, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "bytes": atual,
+        "pico_bytes": pico,
+        "bytes_por_interacao": atual / linhas if linhas else 0.0,
+        "usuarios": len(sistema.listar_usuarios()),
+        "conteudos": len(sistema.listar_conteudos()),
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de memória das entidades")
+    parser.add_argument("--linhas", type=int, default=100_000)
+    parser.add_argument("--objetos", type=int, default=50_000,
+                        help="objetos criados por entidade na medição isolada")
+    parser.add_argument("--usuarios", type=int, default=100_000)
+    parser.add_argument("--conteudos", type=int, default=1_000)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", default=None, help="grava os resultados em JSON")
+    args = parser.parse_args(argv)
+
+    resultado = {
+        "python": sys.version.split()[0],
+        "bytes_por_objeto": medir_entidades(args.objetos),
+    }
+    with tempfile.TemporaryDirectory(prefix="bench_memoria_") as diretorio:
+        caminho = os.path.join(diretorio, "sintetico.csv")
+        gerar_csv(caminho, args.linhas, qtd_conteudos=args.conteudos,
+                  qtd_usuarios=args.usuarios, semente=args.semente)
+        resultado["ingestao"] = {
+            "objetos": medir_ingestao(caminho, args.linhas, colunar=False),
+            "colunar": medir_ingestao(caminho, args.linhas, colunar=True),
+        }
+
+    print("bytes por objeto:")
+    for entidade, tamanho in resultado["bytes_por_objeto"].items():
+        print(f"  {entidade:<12} {tamanho:>8.1f}")
+    print(f"ingestão de {args.linhas} linhas (bytes por interação, incluindo usuários e conteúdos):")
+    for modo, medida in resultado["ingestao"].items():
+        print(f"  {modo:<12} {medida['bytes_por_interacao']:>8.1f}  (pico {medida['pico_bytes'] / 2**20:.1f} MiB)")
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
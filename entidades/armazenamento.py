@@ -0,0 +1,282 @@
+from array import array
+from datetime import datetime, timedelta
+from typing import Iterator, List
+
+# Ordem fixa dos tipos: o código gravado na coluna é a posição nesta tupla
+TIPOS_INTERACAO = ("view_start", "like", "share", "comment")
+CODIGO_TIPO = {tipo: codigo for codigo, tipo in enumerate(TIPOS_INTERACAO)}
+
+_EPOCA = datetime(1970, 1, 1)
+_MICROSSEGUNDO = timedelta(microseconds=1)
+
+
+def para_epoch(momento: datetime) -> int:
+    """
+    Converte datetime sem fuso em microssegundos desde 1970-01-01. Com
+    fuso, levanta ValueError: as interações só guardam horários sem fuso
+    (ver Interacao._validar_timestamp), e de_epoch não teria como
+    devolver o fuso original.
+    """
+    if momento.tzinfo is not None:
+        raise ValueError("Timestamp com fuso horário não é suportado. Use horário sem fuso.")
+    return (momento - _EPOCA) // _MICROSSEGUNDO
+
+
+def de_epoch(microssegundos: int) -> datetime:
+    """Operação inversa de para_epoch (sempre retorna datetime sem fuso)."""
+    return _EPOCA + timedelta(microseconds=microssegundos)
+
+
+class ArmazenamentoColunar:
+    """
+    Armazena interações em colunas compactas (array da biblioteca padrão),
+    uma posição por interação, no lugar de um objeto Interacao por linha.
+    Textos de comentário são internados em um pool compartilhado.
+
+    As colunas restauradas de um snapshot podem ser memoryviews sobre o
+    arquivo mapeado (somente leitura); elas são copiadas para arrays na
+    primeira interação acrescentada.
+    """
+    # {atributo-coluna: typecode}, na ordem usada para serialização
+    COLUNAS = {"_ids": "q", "_conteudos": "q", "_usuarios": "q", "_timestamps": "q",
+               "_plataformas": "i", "_tipos": "b", "_duracoes": "q", "_comentarios": "i"}
+
+    def __init__(self):
+        self._ids = array('q')
+        self._conteudos = array('q')
+        self._usuarios = array('q')
+        self._timestamps = array('q')    # microssegundos desde a época
+        self._plataformas = array('i')   # código interno da plataforma
+        self._tipos = array('b')         # posição em TIPOS_INTERACAO
+        self._duracoes = array('q')
+        self._comentarios = array('i')   # posição no pool de comentários
+
+        self._pool_comentarios: List[str] = [""]
+        self._posicao_comentario = {"": 0}
+        self._lista_plataformas: List = []   # {código: Plataforma}
+        self._codigo_plataforma = {}         # {id(Plataforma): código}
+        self._mapa_conteudos = {}            # {id_conteudo: Conteudo}
+        self._posicao_copiada = {}           # {id_interacao: posição} das Interacao copiadas
+        self._somente_leitura = False        # restaurado e ainda sem acréscimos
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @classmethod
+    def _restaurar(cls, colunas: dict, pool_comentarios: List[str],
+                   plataformas: List, conteudos: dict) -> "ArmazenamentoColunar":
+        """
+        Reconstrói o armazenamento a partir de colunas já carregadas
+        (ex.: de um snapshot), sem passar por objetos Interacao. As colunas
+        podem ser arrays ou memoryviews do mesmo typecode, usadas sem cópia.
+        """
+        armazenamento = cls()
+        for nome in cls.COLUNAS:
+            setattr(armazenamento, nome, colunas[nome])
+        armazenamento._pool_comentarios = list(pool_comentarios)
+        # cópia das colunas e índice do pool ficam para o primeiro acréscimo
+        armazenamento._posicao_comentario = None
+        armazenamento._somente_leitura = True
+        for plataforma in plataformas:
+            armazenamento._codificar_plataforma(plataforma)
+        armazenamento._mapa_conteudos = dict(conteudos)
+        return armazenamento
+
+    def _materializar(self) -> None:
+        """
+        Prepara um armazenamento restaurado para receber interações: copia
+        as colunas mapeadas para arrays e indexa o pool de comentários.
+        """
+        for nome, typecode in self.COLUNAS.items():
+            coluna = getattr(self, nome)
+            if not isinstance(coluna, array):
+                copia = array(typecode)
+                copia.frombytes(coluna.cast('B'))
+                setattr(self, nome, copia)
+        self._posicao_comentario = {t: i for i, t in enumerate(self._pool_comentarios)}
+        self._somente_leitura = False
+
+    def _codificar_plataforma(self, plataforma) -> int:
+        codigo = self._codigo_plataforma.get(id(plataforma))
+        if codigo is None:
+            codigo = len(self._lista_plataformas)
+            self._lista_plataformas.append(plataforma)
+            self._codigo_plataforma[id(plataforma)] = codigo
+        return codigo
+
+    def _internar_comentario(self, texto: str) -> int:
+        posicao = self._posicao_comentario.get(texto)
+        if posicao is None:
+            posicao = len(self._pool_comentarios)
+            self._pool_comentarios.append(texto)
+            self._posicao_comentario[texto] = posicao
+        return posicao
+
+    def adicionar(self, interacao) -> int:
+        """
+        Copia os campos de uma Interacao para as colunas e retorna sua
+        posição. A mesma interação (mesmo id_interacao) acrescentada de novo,
+        ex.: à lista do conteúdo e à do usuário, reaproveita a posição.
+        """
+        posicao = self._posicao_copiada.get(interacao.id_interacao)
+        if posicao is None:
+            posicao = self._posicao_copiada[interacao.id_interacao] = self.adicionar_campos(
+                interacao.id_interacao, interacao.conteudo_associado, interacao.plataforma_interacao,
+                interacao.id_usuario, interacao.timestamp_interacao, interacao.tipo_interacao,
+                interacao.watch_duration_seconds, interacao.comment_text)
+        return posicao
+
+    def adicionar_campos(self, id_interacao: int, conteudo, plataforma, id_usuario: int,
+                         timestamp: datetime, tipo_interacao: str, duracao: int,
+                         comentario: str) -> int:
+        """
+        Acrescenta uma interação a partir de campos já validados (ver
+        Interacao.validar_campos), sem criar o objeto Interacao.
+        Retorna sua posição.
+        """
+        if self._somente_leitura:
+            self._materializar()
+        id_conteudo = conteudo.id_conteudo
+        if id_conteudo not in self._mapa_conteudos:
+            self._mapa_conteudos[id_conteudo] = conteudo
+        codigo_plataforma = self._codigo_plataforma.get(id(plataforma))
+        if codigo_plataforma is None:
+            codigo_plataforma = self._codificar_plataforma(plataforma)
+        posicao_comentario = self._posicao_comentario.get(comentario)
+        if posicao_comentario is None:
+            posicao_comentario = self._internar_comentario(comentario)
+
+        self._ids.append(id_interacao)
+        self._conteudos.append(id_conteudo)
+        self._usuarios.append(id_usuario)
+        self._timestamps.append(para_epoch(timestamp))
+        self._plataformas.append(codigo_plataforma)
+        self._tipos.append(CODIGO_TIPO[tipo_interacao])
+        self._duracoes.append(duracao)
+        self._comentarios.append(posicao_comentario)
+        return len(self._ids) - 1
+
+    def interacao(self, indice: int) -> "InteracaoColunar":
+        """Retorna uma visão leve da interação na posição indice."""
+        if not -len(self._ids) <= indice < len(self._ids):
+            raise IndexError("Índice de interação fora do intervalo.")
+        return InteracaoColunar(self, indice % len(self._ids))
+
+    def __iter__(self) -> Iterator["InteracaoColunar"]:
+        for indice in range(len(self._ids)):
+            yield InteracaoColunar(self, indice)
+
+    def nova_lista(self, interacoes=()) -> "ListaInteracoes":
+        """Cria uma lista de interações apoiada neste armazenamento."""
+        lista = ListaInteracoes(self)
+        for interacao in interacoes:
+            lista.append(interacao)
+        return lista
+
+    def bytes_por_interacao(self) -> float:
+        """
+        Bytes ocupados pelas colunas numéricas, por interação. Não inclui o
+        pool de comentários nem as posições e entidades de Conteudo/Usuario.
+        """
+        return float(sum(getattr(self, nome).itemsize for nome in self.COLUNAS))
+
+
+class InteracaoColunar:
+    """
+    Visão somente leitura de uma linha do ArmazenamentoColunar,
+    com as mesmas propriedades públicas de Interacao.
+    """
+    __slots__ = ("_armazenamento", "_indice")
+
+    def __init__(self, armazenamento: ArmazenamentoColunar, indice: int):
+        self._armazenamento = armazenamento
+        self._indice = indice
+
+    @property
+    def id_interacao(self) -> int:
+        return self._armazenamento._ids[self._indice]
+
+    @property
+    def conteudo_associado(self):
+        a = self._armazenamento
+        return a._mapa_conteudos[a._conteudos[self._indice]]
+
+    @property
+    def id_usuario(self) -> int:
+        return self._armazenamento._usuarios[self._indice]
+
+    @property
+    def timestamp_interacao(self) -> datetime:
+        return de_epoch(self._armazenamento._timestamps[self._indice])
+
+    @property
+    def plataforma_interacao(self):
+        a = self._armazenamento
+        return a._lista_plataformas[a._plataformas[self._indice]]
+
+    @property
+    def tipo_interacao(self) -> str:
+        return TIPOS_INTERACAO[self._armazenamento._tipos[self._indice]]
+
+    @property
+    def watch_duration_seconds(self) -> int:
+        return self._armazenamento._duracoes[self._indice]
+
+    @property
+    def comment_text(self) -> str:
+        a = self._armazenamento
+        return a._pool_comentarios[a._comentarios[self._indice]]
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, InteracaoColunar)
+            and self._armazenamento is other._armazenamento
+            and self._indice == other._indice
+        )
+
+    def __hash__(self) -> int:
+        return hash((id(self._armazenamento), self._indice))
+
+    def __str__(self) -> str:
+        return f"Interação {self.id_interacao} ({self.tipo_interacao})"
+
+    def __repr__(self) -> str:
+        return (f"Interacao(id={self.id_interacao}, "
+                f"tipo='{self.tipo_interacao}', "
+                f"duracao={self.watch_duration_seconds}s)")
+
+
+class ListaInteracoes:
+    """
+    Sequência de interações guardada apenas como posições no armazenamento.
+    Substitui a lista de objetos Interacao em Conteudo e Usuario.
+    """
+    __slots__ = ("_armazenamento", "_indices")
+
+    def __init__(self, armazenamento: ArmazenamentoColunar, indices: array = None):
+        self._armazenamento = armazenamento
+        self._indices = indices if indices is not None else array('q')
+
+    def nova(self) -> "ListaInteracoes":
+        """Lista vazia sobre o mesmo armazenamento."""
+        return ListaInteracoes(self._armazenamento)
+
+    def append(self, interacao) -> None:
+        if (isinstance(interacao, InteracaoColunar)
+                and interacao._armazenamento is self._armazenamento):
+            self._indices.append(interacao._indice)
+        else:
+            self._indices.append(self._armazenamento.adicionar(interacao))
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __iter__(self) -> Iterator[InteracaoColunar]:
+        armazenamento = self._armazenamento
+        for indice in self._indices:
+            yield InteracaoColunar(armazenamento, indice)
+
+    def __getitem__(self, posicao):
+        if isinstance(posicao, slice):
+            return [InteracaoColunar(self._armazenamento, i) for i in self._indices[posicao]]
+        return InteracaoColunar(self._armazenamento, self._indices[posicao])
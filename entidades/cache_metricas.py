@@ -0,0 +1,158 @@
+import functools
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from itertools import chain
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+# custo fixo estimado de uma entrada (chave, tupla e nó do OrderedDict)
+_CUSTO_ENTRADA = 200
+
+
+def tamanho_aproximado(valor, profundidade: int = 3) -> int:
+    """
+    Bytes ocupados por valor e pelos objetos que ele referencia até a
+    profundidade indicada (coleções e objetos com __slots__).
+    """
+    tamanho = sys.getsizeof(valor)
+    if profundidade == 0 or isinstance(valor, (str, bytes, bytearray, int, float)):
+        return tamanho
+    if isinstance(valor, dict):
+        itens = chain(valor.keys(), valor.values())
+    elif isinstance(valor, (list, tuple, set, frozenset)):
+        itens = valor
+    elif hasattr(type(valor), "__slots__"):
+        itens = (getattr(valor, nome) for nome in type(valor).__slots__ if hasattr(valor, nome))
+    else:
+        return tamanho
+    return tamanho + sum(tamanho_aproximado(item, profundidade - 1) for item in itens)
+
+
+class CacheMetricas:
+    """
+    Cache LRU global das métricas memoizadas (ver memoizar_metrica), com
+    orçamento de memória em bytes compartilhado por todos os objetos.
+
+    Cada entrada guarda a versão do objeto no momento do cálculo; uma nova
+    interação muda a versão só daquele conteúdo, e as entradas dele deixam
+    de valer (e são descartadas na próxima leitura) sem afetar as demais.
+    Quando o orçamento é excedido, as entradas usadas há mais tempo saem
+    primeiro. Seguro para uso por várias threads.
+
+    As chaves começam pelo id() do objeto dono, não pelo objeto: o cache não
+    o mantém vivo. Um weakref.finalize por dono remove as entradas dele
+    quando ele é coletado (antes que o id possa ser reaproveitado).
+    """
+    def __init__(self, limite_bytes: int = 64 * 1024 * 1024):
+        self.limite_bytes = limite_bytes
+        self._entradas: "OrderedDict[tuple, Tuple[int, Any, int]]" = OrderedDict()
+        # reentrante: a coleta de um dono pode ocorrer com a trava já tomada
+        self._trava = threading.RLock()
+        # {id(dono): chaves dele presentes em _entradas}; a chave some quando o dono é coletado
+        self._chaves_por_dono: Dict[int, Set[tuple]] = {}
+        self.bytes_usados = 0
+        self.acertos = self.faltas = self.descartes = 0
+
+    def obter(self, chave: tuple, versao: int) -> Tuple[bool, Any]:
+        """(True, valor) se há entrada para chave calculada na versão; senão (False, None)."""
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                if entrada[0] == versao:
+                    self._entradas.move_to_end(chave)
+                    self.acertos += 1
+                    return True, entrada[1]
+                self._remover(chave)
+            self.faltas += 1
+            return False, None
+
+    def guardar(self, chave: tuple, versao: int, valor, dono=None) -> None:
+        """Guarda valor; com dono (objeto cujo id() é chave[0]), a entrada sai quando ele é coletado."""
+        tamanho = tamanho_aproximado(valor) + _CUSTO_ENTRADA
+        with self._trava:
+            if chave in self._entradas:
+                self._remover(chave)
+            if tamanho > self.limite_bytes:
+                return
+            if dono is not None:
+                chaves = self._chaves_por_dono.get(chave[0])
+                if chaves is None:
+                    chaves = self._chaves_por_dono[chave[0]] = set()
+                    weakref.finalize(dono, self._descartar_dono, chave[0])
+                chaves.add(chave)
+            self._entradas[chave] = (versao, valor, tamanho)
+            self.bytes_usados += tamanho
+            while self.bytes_usados > self.limite_bytes:
+                chave_antiga = next(iter(self._entradas))
+                self._remover(chave_antiga)
+                self.descartes += 1
+
+    def _remover(self, chave: tuple) -> None:
+        self.bytes_usados -= self._entradas.pop(chave)[2]
+        chaves = self._chaves_por_dono.get(chave[0])
+        if chaves is not None:
+            chaves.discard(chave)
+
+    def _descartar_dono(self, id_dono: int) -> None:
+        with self._trava:
+            for chave in self._chaves_por_dono.pop(id_dono, ()):
+                self.bytes_usados -= self._entradas.pop(chave)[2]
+
+    def configurar(self, limite_bytes: int) -> None:
+        """Altera o orçamento, descartando as entradas mais antigas se preciso."""
+        with self._trava:
+            self.limite_bytes = limite_bytes
+            while self.bytes_usados > limite_bytes:
+                self._remover(next(iter(self._entradas)))
+                self.descartes += 1
+
+    def limpar(self) -> None:
+        with self._trava:
+            self._entradas.clear()
+            # os finalizadores continuam registrados: só as chaves são esquecidas
+            for chaves in self._chaves_por_dono.values():
+                chaves.clear()
+            self.bytes_usados = 0
+
+    def estatisticas(self) -> dict:
+        return {"entradas": len(self._entradas), "bytes_usados": self.bytes_usados,
+                "limite_bytes": self.limite_bytes, "acertos": self.acertos,
+                "faltas": self.faltas, "descartes": self.descartes}
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+
+# Cache compartilhado por todos os Conteudo
+CACHE_METRICAS = CacheMetricas()
+
+
+def memoizar_metrica(copiar: Optional[Callable] = None):
+    """
+    Decorador de métodos de métrica cujo custo cresce com as interações:
+    o resultado fica em CACHE_METRICAS, associado ao objeto (por id(), sem
+    mantê-lo vivo; o objeto precisa aceitar weakref), ao método, aos
+    argumentos e à versão do objeto (atributo _versao, incrementado a cada
+    mudança nas interações). Com copiar, cada chamada recebe copiar(valor),
+    para que quem altera o resultado não altere o cache.
+    """
+    def decorador(metodo):
+        nome = metodo.__name__
+
+        @functools.wraps(metodo)
+        def memoizado(self, *args, **kwargs):
+            chave = (id(self), nome, args, tuple(sorted(kwargs.items())) if kwargs else ())
+            # versão lida antes do cálculo: uma interação concorrente invalida o resultado
+            versao = self._versao
+            try:
+                achou, valor = CACHE_METRICAS.obter(chave, versao)
+            except TypeError:
+                # argumentos não hasheáveis (ex.: lista de quantis): sem cache
+                return metodo(self, *args, **kwargs)
+            if not achou:
+                valor = metodo(self, *args, **kwargs)
+                CACHE_METRICAS.guardar(chave, versao, valor, self)
+            return copiar(valor) if copiar is not None else valor
+        return memoizado
+    return decorador
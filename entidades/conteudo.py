@@ -1,9 +1,18 @@
-from typing import List, Dict
+import math
+from functools import lru_cache
+from typing import List, Dict, Optional, Sequence, Tuple
+from entidades.metricas import MetricasConteudo, MetricasAproximadas
+from entidades.cache_metricas import memoizar_metrica
+from entidades.sketches import HyperLogLog, KLL
 
 class Conteudo:
     """
     Representa um item de conteúdo consumível, com lista de interações.
     """
+    # __weakref__: o cache de métricas (memoizar_metrica) não mantém o conteúdo vivo
+    __slots__ = ("_id_conteudo", "_nome_conteudo", "_interacoes", "_metricas", "_aproximado", "_versao",
+                 "__weakref__")
+
     def __init__(self, id_conteudo, nome_conteudo):
         # validação de inputs
         try:
@@ -19,51 +28,147 @@ class Conteudo:
         self._id_conteudo: int = id_conteudo
         self._nome_conteudo: str = nome
         self._interacoes: List = []
+        # acumuladores atualizados a cada interação; None = montar a partir da
+        # lista na próxima leitura ou interação (criados só quando há o que contar)
+        self._metricas: Optional[MetricasConteudo] = None
+        # modo aproximado: MetricasAproximadas (sketches de tamanho fixo)
+        self._aproximado: bool = False
+        # muda a cada alteração das interações; invalida as métricas memoizadas
+        self._versao: int = 0
 
     def adicionar_interacao(self, interacao):
         """Registra uma nova interação neste conteúdo."""
         self._interacoes.append(interacao)
+        self._versao += 1
+        metricas = self._metricas
+        if metricas is None:
+            # primeira interação, ou acumuladores descartados: monta a partir da lista
+            self._obter_metricas()
+        else:
+            metricas.registrar(
+                interacao.tipo_interacao,
+                interacao.watch_duration_seconds,
+                interacao.id_usuario
+            )
+
+    def _definir_metricas(self, metricas: MetricasConteudo) -> None:
+        """Recebe acumuladores já calculados (ex.: de um snapshot ou do banco)."""
+        self._metricas = metricas
+        self._versao += 1
+
+    def _obter_metricas(self) -> MetricasConteudo:
+        """Retorna os acumuladores, reconstruindo-os se necessário."""
+        if self._metricas is None:
+            metricas = MetricasAproximadas() if self._aproximado else MetricasConteudo()
+            for i in self._interacoes:
+                metricas.registrar(i.tipo_interacao, i.watch_duration_seconds, i.id_usuario)
+            self._metricas = metricas
+        return self._metricas
+
+    def usar_metricas_aproximadas(self, ativar: bool = True) -> None:
+        """
+        Alterna entre acumuladores exatos e aproximados (MetricasAproximadas).
+        No modo aproximado a memória por conteúdo não cresce com a audiência;
+        usuários distintos e percentual assistido passam a ser estimativas.
+        """
+        if ativar != self._aproximado:
+            self._aproximado = ativar
+            self._metricas = None
+            self._versao += 1
+
+    @property
+    def metricas_aproximadas(self) -> bool:
+        return self._aproximado
+
+    def _usar_armazenamento(self, armazenamento) -> None:
+        """
+        Passa a guardar as interações no ArmazenamentoColunar informado,
+        migrando as já registradas.
+        """
+        self._interacoes = armazenamento.nova_lista(self._interacoes)
+
+    def _definir_interacoes(self, interacoes) -> None:
+        """Substitui a lista de interações (ex.: ao restaurar um snapshot)."""
+        self._interacoes = interacoes
+        self._metricas = None
+        self._versao += 1
 
     def calcular_total_interacoes_engajamento(self) -> int:
         """
         Retorna o total de interações de engajamento:
         soma dos tipos 'like', 'share' e 'comment' apenas.
         """
-        tipos_engajamento = {"like", "share", "comment"}
-        return sum(1 for i in self._interacoes if i.tipo_interacao in tipos_engajamento)
-
+        return self._obter_metricas().total_engajamento
 
     def calcular_contagem_por_tipo_interacao(self) -> Dict[str, int]:
         """
         Retorna dicionário {tipo: quantidade} para cada tipo de interação.
         """
-        contagem: Dict[str, int] = {}
-        for i in self._interacoes:
-            t = i.tipo_interacao
-            contagem[t] = contagem.get(t, 0) + 1
-        return contagem
+        return dict(self._obter_metricas().contagem_por_tipo)
 
     def calcular_tempo_total_consumo(self) -> int:
         """
         Soma watch_duration_seconds de todas as interações positivas.
         """
-        return sum(
-            i.watch_duration_seconds 
-            for i in self._interacoes 
-            if i.watch_duration_seconds > 0
-        )
+        return self._obter_metricas().tempo_total
 
     def calcular_media_tempo_consumo(self) -> float:
         """
         Retorna a média de watch_duration_seconds > 0.
         """
-        tempos = [
-            i.watch_duration_seconds 
-            for i in self._interacoes 
-            if i.watch_duration_seconds > 0
-        ]
-        return (sum(tempos) / len(tempos)) if tempos else 0.0
+        return self._obter_metricas().media_tempo
+
+    @memoizar_metrica()
+    def sketches_audiencia(self) -> Tuple[HyperLogLog, KLL]:
+        """
+        (HyperLogLog dos usuários, KLL das durações > 0) do conteúdo, para
+        combinar com os de outros conteúdos, plataformas ou processos. No modo
+        exato são construídos a partir das interações (e memoizados até a
+        próxima interação); não devem ser alterados por quem os recebe.
+        """
+        metricas = self._obter_metricas()
+        if isinstance(metricas, MetricasAproximadas):
+            return metricas.usuarios, metricas.duracoes if metricas.duracoes is not None else KLL()
+        usuarios, duracoes = HyperLogLog(), KLL()
+        for i in self._interacoes:
+            usuarios.adicionar(i.id_usuario)
+            if i.watch_duration_seconds > 0:
+                duracoes.adicionar(i.watch_duration_seconds)
+        return usuarios, duracoes
 
+    @memoizar_metrica()
+    def estimar_usuarios_unicos(self) -> int:
+        """
+        Usuários distintos que interagiram com o conteúdo: estimativa do
+        HyperLogLog no modo aproximado, contagem exata no modo exato.
+        """
+        metricas = self._obter_metricas()
+        if isinstance(metricas, MetricasAproximadas):
+            return len(metricas.usuarios)
+        return len({i.id_usuario for i in self._interacoes})
+
+    @memoizar_metrica(copiar=dict)
+    def quantis_tempo_consumo(self, quantis: Sequence[float] = (0.5, 0.95)) -> Dict[float, int]:
+        """
+        {q: duração} dos quantis de watch_duration_seconds > 0 (vazio se não
+        houver durações). Usa o posto mais próximo (menor valor com pelo menos
+        q das durações ≤ a ele), exato ou estimado pelo KLL no modo aproximado.
+        """
+        metricas = self._obter_metricas()
+        if isinstance(metricas, MetricasAproximadas):
+            return metricas.quantis(quantis)
+        duracoes = sorted(i.watch_duration_seconds for i in self._interacoes
+                          if i.watch_duration_seconds > 0)
+        if not duracoes:
+            return {}
+        resultado = {}
+        for q in quantis:
+            if not 0.0 <= q <= 1.0:
+                raise ValueError("Quantis devem estar entre 0 e 1.")
+            resultado[q] = duracoes[max(math.ceil(q * len(duracoes)), 1) - 1]
+        return resultado
+
+    @memoizar_metrica(copiar=list)
     def listar_comentarios(self) -> List[str]:
         """
         Retorna lista com todos os comment_text de interações 'comment'.
@@ -90,20 +195,33 @@ class Conteudo:
         Fábrica que escolhe Video, Podcast ou Artigo
         com base em palavras-chave em nome_conteudo.
         """
-        nome_lower = nome_conteudo.lower()
-        # prioridade: podcast, artigo, senão vídeo
-        if "podcast" in nome_lower:
+        tipo = Conteudo._tipo_por_nome(nome_conteudo)
+        if tipo == "podcast":
             # duração inicial zero; pode ajustar depois
             return Podcast(id_conteudo, nome_conteudo, duracao_total_episodio_seg=0)
-        elif "documentário" in nome_lower or "artigo" in nome_lower:
+        elif tipo == "artigo":
             return Artigo(id_conteudo, nome_conteudo, tempo_leitura_estimado_seg=0)
         else:
             return Video(id_conteudo, nome_conteudo, duracao_total_video_seg=0)
 
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _tipo_por_nome(nome_conteudo: str) -> str:
+        # decisão guardada por nome bruto: nomes repetidos não refazem a busca
+        nome_lower = nome_conteudo.lower()
+        # prioridade: podcast, artigo, senão vídeo
+        if "podcast" in nome_lower:
+            return "podcast"
+        elif "documentário" in nome_lower or "artigo" in nome_lower:
+            return "artigo"
+        return "video"
+
 class Video(Conteudo):
     """
     Especialização de Conteudo para vídeos, com cálculo de percentual médio.
     """
+    __slots__ = ("__duracao_total_video_seg",)
+
     def __init__(self, id_conteudo, nome_conteudo, duracao_total_video_seg):
         super().__init__(id_conteudo, nome_conteudo)
         # validação
@@ -119,23 +237,24 @@ class Video(Conteudo):
     def duracao_total_video_seg(self) -> int:
         return self.__duracao_total_video_seg
 
+    @memoizar_metrica()
     def calcular_percentual_medio_assistido(self) -> float:
         """
         ((tempo médio por usuário) / duracao_total_video_seg) * 100.
         """
-        if self.__duracao_total_video_seg == 0 or not self._interacoes:
+        if self.__duracao_total_video_seg == 0:
             return 0.0
 
-        por_usuario: Dict[int, int] = {}
-        for it in self._interacoes:
-            if it.watch_duration_seconds > 0:
-                por_usuario[it.id_usuario] = por_usuario.get(it.id_usuario, 0) + it.watch_duration_seconds
+        # média dos tempos por usuário = tempo total / usuários com tempo > 0
+        metricas = self._obter_metricas()
+        return self.percentual_assistido(metricas.tempo_total, metricas.qtd_usuarios_com_tempo())
 
-        percentuais = [
-            (tempo / self.__duracao_total_video_seg) * 100 
-            for tempo in por_usuario.values()
-        ]
-        return round(sum(percentuais) / len(percentuais), 2) if percentuais else 0.0
+    def percentual_assistido(self, tempo_total: int, qtd_usuarios: int) -> float:
+        """Percentual médio assistido a partir de acumuladores já calculados."""
+        if self.__duracao_total_video_seg == 0 or not qtd_usuarios:
+            return 0.0
+        tempo_medio = tempo_total / qtd_usuarios
+        return round((tempo_medio / self.__duracao_total_video_seg) * 100, 2)
 
     def __str__(self) -> str:
         return f"[VÍDEO] {self.nome_conteudo} (ID {self.id_conteudo})"
@@ -151,6 +270,8 @@ class Podcast(Conteudo):
     """
     Especialização de Conteudo para podcasts, com duração de episódio.
     """
+    __slots__ = ("__duracao_total_episodio_seg",)
+
     def __init__(self, id_conteudo, nome_conteudo, duracao_total_episodio_seg):
         super().__init__(id_conteudo, nome_conteudo)
         try:
@@ -170,6 +291,8 @@ class Artigo(Conteudo):
     """
     Especialização de Conteudo para artigos, com tempo estimado de leitura.
     """
+    __slots__ = ("__tempo_leitura_estimado_seg",)
+
     def __init__(self, id_conteudo, nome_conteudo, tempo_leitura_estimado_seg):
         super().__init__(id_conteudo, nome_conteudo)
         try:
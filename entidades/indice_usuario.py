@@ -0,0 +1,96 @@
+from collections.abc import Sequence
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from entidades.plataforma import Plataforma
+
+
+class VisaoInteracoes(Sequence):
+    """
+    Visão somente leitura, sem cópia, de uma lista de interações
+    (list ou ListaInteracoes). Reflete as interações registradas depois.
+    """
+    __slots__ = ("_lista",)
+
+    def __init__(self, lista):
+        self._lista = lista
+
+    def __len__(self) -> int:
+        return len(self._lista)
+
+    def __getitem__(self, posicao):
+        return self._lista[posicao]
+
+    def __iter__(self):
+        return iter(self._lista)
+
+    def __repr__(self) -> str:
+        return f"VisaoInteracoes({len(self._lista)} interações)"
+
+
+class IndiceUsuario:
+    """
+    Índice das interações de um usuário: listas por tipo e por plataforma,
+    tempo assistido por plataforma e os conteúdos consumidos por ID. As
+    listas mantêm a ordem de registro e são criadas por nova_lista (list,
+    ou ListaInteracoes no modo colunar, guardando apenas posições).
+
+    Plataformas são agrupadas pelo nome normalizado, a mesma igualdade de
+    Plataforma usada pelas consultas originais de Usuario.
+    """
+    __slots__ = ("_por_tipo", "_por_plataforma", "_conteudos", "_nova_lista")
+
+    def __init__(self, nova_lista: Callable[[], List] = list):
+        self._por_tipo: Dict[str, List] = {}
+        # {nome normalizado: [primeira Plataforma vista, interações, tempo assistido]}
+        self._por_plataforma: Dict[str, list] = {}
+        self._conteudos: Dict[int, object] = {}   # {id_conteudo: Conteudo}
+        self._nova_lista = nova_lista
+
+    @classmethod
+    def construir(cls, interacoes: Iterable, nova_lista: Callable[[], List] = list) -> "IndiceUsuario":
+        indice = cls(nova_lista)
+        for interacao in interacoes:
+            indice.registrar(interacao)
+        return indice
+
+    def registrar(self, interacao) -> None:
+        """Inclui uma interação no índice, em O(1)."""
+        tipo = interacao.tipo_interacao
+        lista = self._por_tipo.get(tipo)
+        if lista is None:
+            lista = self._por_tipo[tipo] = self._nova_lista()
+        lista.append(interacao)
+
+        plataforma = interacao.plataforma_interacao
+        grupo = self._por_plataforma.get(plataforma.nome_normalizado)
+        if grupo is None:
+            grupo = self._por_plataforma[plataforma.nome_normalizado] = [plataforma, self._nova_lista(), 0]
+        grupo[1].append(interacao)
+        grupo[2] += interacao.watch_duration_seconds
+
+        conteudo = interacao.conteudo_associado
+        self._conteudos[conteudo.id_conteudo] = conteudo
+
+    def _grupo(self, plataforma):
+        if not isinstance(plataforma, Plataforma):
+            return None
+        return self._por_plataforma.get(plataforma.nome_normalizado)
+
+    def interacoes_do_tipo(self, tipo: str) -> Sequence:
+        return self._por_tipo.get(tipo, ())
+
+    def interacoes_na_plataforma(self, plataforma) -> Sequence:
+        grupo = self._grupo(plataforma)
+        return grupo[1] if grupo is not None else ()
+
+    def tempo_na_plataforma(self, plataforma) -> int:
+        grupo = self._grupo(plataforma)
+        return grupo[2] if grupo is not None else 0
+
+    def contagem_por_plataforma(self) -> List[Tuple[Plataforma, int]]:
+        """[(plataforma, interações)] na ordem em que cada plataforma apareceu."""
+        return [(grupo[0], len(grupo[1])) for grupo in self._por_plataforma.values()]
+
+    @property
+    def conteudos(self) -> Dict[int, object]:
+        return self._conteudos
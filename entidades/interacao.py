@@ -7,6 +7,10 @@ class Interacao:
     """
     TIPOS_INTERACAO_VALIDOS = {'view_start', 'like', 'share', 'comment'}
     _id_interacao_global = 1
+    # sem __dict__ por instância: relevante com dezenas de milhões de interações
+    __slots__ = ("__id_interacao", "__conteudo_associado", "__id_usuario",
+                 "__timestamp_interacao", "__plataforma_interacao", "__tipo_interacao",
+                 "__watch_duration_seconds", "__comment_text")
 
     def __init__(self,
                  conteudo_associado,
@@ -20,12 +24,29 @@ class Interacao:
         if conteudo_associado is None:
             raise ValueError("Conteúdo associado é obrigatório.")
 
+        id_usuario = Interacao._validar_id_usuario(id_usuario)
+        timestamp = Interacao._validar_timestamp(timestamp_interacao)
+
+        # valida plataforma
+        if plataforma_interacao is None:
+            raise ValueError("Plataforma é obrigatória.")
+
+        tipo_norm = Interacao._validar_tipo(tipo_interacao)
+        duration = Interacao._validar_duracao(watch_duration_seconds)
+
+        self._atribuir(Interacao._reservar_id(), conteudo_associado, id_usuario, timestamp,
+                       plataforma_interacao, tipo_norm, duration, comment_text.strip())
+
+    @staticmethod
+    def _validar_id_usuario(id_usuario) -> int:
         # converte e valida id de usuário
         try:
-            id_usuario = int(id_usuario)
+            return int(id_usuario)
         except (TypeError, ValueError):
             raise ValueError("ID de usuário deve ser um inteiro.")
 
+    @staticmethod
+    def _validar_timestamp(timestamp_interacao) -> datetime:
         # valida e converte timestamp
         if timestamp_interacao is None:
             raise ValueError("Timestamp é obrigatório.")
@@ -38,16 +59,21 @@ class Interacao:
             timestamp = timestamp_interacao
         else:
             raise ValueError("Timestamp deve ser str ISO-8601 ou datetime.")
-        
-        # valida plataforma
-        if plataforma_interacao is None:
-            raise ValueError("Plataforma é obrigatória.")
+        # todos os modos (objetos, colunar, snapshot, SQLite) guardam o horário sem fuso
+        if timestamp.tzinfo is not None:
+            raise ValueError("Timestamp com fuso horário não é suportado. Use horário sem fuso.")
+        return timestamp
 
+    @staticmethod
+    def _validar_tipo(tipo_interacao) -> str:
         # normaliza e valida tipo de interação (exatamente 'view_start', 'like', 'share', 'comment')
         tipo_norm = tipo_interacao.strip().lower()
         if tipo_norm not in Interacao.TIPOS_INTERACAO_VALIDOS:
             raise ValueError(f"Tipo de interação inválido: '{tipo_interacao}'")
+        return tipo_norm
 
+    @staticmethod
+    def _validar_duracao(watch_duration_seconds) -> int:
         # trata watch_duration_seconds faltante ou vazio como 0
         raw = watch_duration_seconds
         if isinstance(raw, str) and not raw.strip():
@@ -60,19 +86,74 @@ class Interacao:
         # garante não-negatividade
         if duration < 0:
             raise ValueError("watch_duration_seconds deve ser ≥ 0.")
-
-        # atribuição de ID sequencial
-        self.__id_interacao = Interacao._id_interacao_global
-        Interacao._id_interacao_global += 1
-
-        # atribuições finais
+        return duration
+
+    @staticmethod
+    def validar_campos(id_usuario,
+                       timestamp_interacao,
+                       tipo_interacao,
+                       watch_duration_seconds=0,
+                       comment_text="") -> tuple:
+        """
+        Aplica as mesmas validações do construtor aos campos que não dependem
+        de Conteudo/Plataforma, sem criar a Interacao nem consumir um ID.
+        Retorna (id_usuario, timestamp, tipo, duracao, comentario) normalizados.
+        """
+        id_usuario = Interacao._validar_id_usuario(id_usuario)
+        timestamp = Interacao._validar_timestamp(timestamp_interacao)
+        tipo_norm = Interacao._validar_tipo(tipo_interacao)
+        duration = Interacao._validar_duracao(watch_duration_seconds)
+        return id_usuario, timestamp, tipo_norm, duration, comment_text.strip()
+
+    @classmethod
+    def de_campos_validados(cls,
+                            conteudo_associado,
+                            plataforma_interacao,
+                            id_usuario: int,
+                            timestamp: datetime,
+                            tipo_interacao: str,
+                            watch_duration_seconds: int,
+                            comment_text: str) -> "Interacao":
+        """
+        Cria a Interacao a partir de campos já normalizados por validar_campos,
+        sem repetir as conversões. Consome o próximo ID sequencial.
+        """
+        if conteudo_associado is None:
+            raise ValueError("Conteúdo associado é obrigatório.")
+        if plataforma_interacao is None:
+            raise ValueError("Plataforma é obrigatória.")
+        interacao = cls.__new__(cls)
+        interacao._atribuir(Interacao._reservar_id(), conteudo_associado, id_usuario, timestamp,
+                            plataforma_interacao, tipo_interacao, watch_duration_seconds, comment_text)
+        return interacao
+
+    @classmethod
+    def _restaurar(cls, id_interacao: int, conteudo_associado, plataforma_interacao,
+                   id_usuario: int, timestamp: datetime, tipo_interacao: str,
+                   watch_duration_seconds: int, comment_text: str) -> "Interacao":
+        """Recria uma interação já registrada (ex.: de um snapshot), mantendo seu ID."""
+        interacao = cls.__new__(cls)
+        interacao._atribuir(id_interacao, conteudo_associado, id_usuario, timestamp,
+                            plataforma_interacao, tipo_interacao, watch_duration_seconds, comment_text)
+        return interacao
+
+    @staticmethod
+    def _reservar_id() -> int:
+        """Consome o próximo ID sequencial."""
+        id_interacao = Interacao._id_interacao_global
+        Interacao._id_interacao_global = id_interacao + 1
+        return id_interacao
+
+    def _atribuir(self, id_interacao, conteudo_associado, id_usuario, timestamp,
+                  plataforma_interacao, tipo_norm, duration, comment_text) -> None:
+        self.__id_interacao = id_interacao
         self.__conteudo_associado = conteudo_associado
         self.__id_usuario = id_usuario
         self.__timestamp_interacao = timestamp
         self.__plataforma_interacao = plataforma_interacao
         self.__tipo_interacao = tipo_norm
         self.__watch_duration_seconds = duration
-        self.__comment_text = comment_text.strip()
+        self.__comment_text = comment_text
 
     @property
     def id_interacao(self):
@@ -0,0 +1,196 @@
+from typing import Dict, Optional, Set
+
+from entidades.sketches import HyperLogLog, KLL
+
+TIPOS_ENGAJAMENTO = frozenset({"like", "share", "comment"})
+
+
+class MetricasConteudo:
+    """
+    Acumuladores das interações de um conteúdo, atualizados em O(1)
+    a cada interação registrada.
+    """
+    __slots__ = ("contagem_por_tipo", "total_engajamento", "tempo_total",
+                 "qtd_tempos_positivos", "tempo_por_usuario")
+
+    def __init__(self):
+        self.contagem_por_tipo: Dict[str, int] = {}
+        self.total_engajamento: int = 0
+        self.tempo_total: int = 0
+        self.qtd_tempos_positivos: int = 0
+        self.tempo_por_usuario: Dict[int, int] = {}   # só durações > 0
+
+    def registrar(self, tipo: str, duracao: int, id_usuario: int) -> None:
+        """Acumula uma interação."""
+        contagem = self.contagem_por_tipo
+        contagem[tipo] = contagem.get(tipo, 0) + 1
+        if tipo in TIPOS_ENGAJAMENTO:
+            self.total_engajamento += 1
+        if duracao > 0:
+            self.tempo_total += duracao
+            self.qtd_tempos_positivos += 1
+            por_usuario = self.tempo_por_usuario
+            por_usuario[id_usuario] = por_usuario.get(id_usuario, 0) + duracao
+
+    @property
+    def media_tempo(self) -> float:
+        if not self.qtd_tempos_positivos:
+            return 0.0
+        return self.tempo_total / self.qtd_tempos_positivos
+
+    def qtd_usuarios_com_tempo(self) -> int:
+        """Usuários distintos com alguma duração > 0."""
+        return len(self.tempo_por_usuario)
+
+    def __repr__(self) -> str:
+        return (f"MetricasConteudo(contagem={self.contagem_por_tipo}, "
+                f"tempo_total={self.tempo_total}, "
+                f"qtd_tempos_positivos={self.qtd_tempos_positivos})")
+
+
+class MetricasAproximadas:
+    """
+    Variante de MetricasConteudo com memória limitada por conteúdo:
+    contagens e somas continuam exatas, mas os usuários distintos ficam em
+    HyperLogLog (erro relativo ≈ 1,6%) e as durações > 0 em um sketch KLL
+    (erro de posto ≈ 1% nos quantis), no lugar do dicionário por usuário.
+    Os sketches de quem tem duração > 0 só são criados na primeira delas
+    (até lá, None), e os HyperLogLog começam esparsos. Acumuladores de
+    conteúdos, plataformas ou processos diferentes podem ser combinados
+    com mesclar.
+    """
+    __slots__ = ("contagem_por_tipo", "total_engajamento", "tempo_total",
+                 "qtd_tempos_positivos", "usuarios", "usuarios_com_tempo", "duracoes", "_k_quantis")
+
+    def __init__(self, precisao_hll: int = 12, k_quantis: int = 200):
+        self.contagem_por_tipo: Dict[str, int] = {}
+        self.total_engajamento: int = 0
+        self.tempo_total: int = 0
+        self.qtd_tempos_positivos: int = 0
+        self.usuarios = HyperLogLog(precisao_hll)             # todos os usuários
+        self.usuarios_com_tempo: Optional[HyperLogLog] = None   # só com duração > 0
+        self.duracoes: Optional[KLL] = None                     # só durações > 0
+        self._k_quantis = k_quantis
+
+    def _criar_sketches_de_tempo(self) -> None:
+        self.usuarios_com_tempo = HyperLogLog(self.usuarios.precisao)
+        self.duracoes = KLL(self._k_quantis)
+
+    def registrar(self, tipo: str, duracao: int, id_usuario: int) -> None:
+        """Acumula uma interação."""
+        contagem = self.contagem_por_tipo
+        contagem[tipo] = contagem.get(tipo, 0) + 1
+        if tipo in TIPOS_ENGAJAMENTO:
+            self.total_engajamento += 1
+        self.usuarios.adicionar(id_usuario)
+        if duracao > 0:
+            self.tempo_total += duracao
+            self.qtd_tempos_positivos += 1
+            if self.duracoes is None:
+                self._criar_sketches_de_tempo()
+            self.usuarios_com_tempo.adicionar(id_usuario)
+            self.duracoes.adicionar(duracao)
+
+    def mesclar(self, outra: "MetricasAproximadas") -> None:
+        """Incorpora os acumuladores de outra instância (ex.: outro shard)."""
+        contagem = self.contagem_por_tipo
+        for tipo, quantidade in outra.contagem_por_tipo.items():
+            contagem[tipo] = contagem.get(tipo, 0) + quantidade
+        self.total_engajamento += outra.total_engajamento
+        self.tempo_total += outra.tempo_total
+        self.qtd_tempos_positivos += outra.qtd_tempos_positivos
+        self.usuarios.mesclar(outra.usuarios)
+        if outra.duracoes is not None:
+            if self.duracoes is None:
+                self._criar_sketches_de_tempo()
+            self.usuarios_com_tempo.mesclar(outra.usuarios_com_tempo)
+            self.duracoes.mesclar(outra.duracoes)
+
+    def quantis(self, quantis) -> Dict[float, float]:
+        """{q: duração} estimados pelo KLL (vazio sem durações > 0)."""
+        return self.duracoes.quantis(quantis) if self.duracoes is not None else {}
+
+    @property
+    def media_tempo(self) -> float:
+        if not self.qtd_tempos_positivos:
+            return 0.0
+        return self.tempo_total / self.qtd_tempos_positivos
+
+    def qtd_usuarios_com_tempo(self) -> int:
+        """Estimativa de usuários distintos com alguma duração > 0."""
+        return len(self.usuarios_com_tempo) if self.usuarios_com_tempo is not None else 0
+
+    def __repr__(self) -> str:
+        return (f"MetricasAproximadas(contagem={self.contagem_por_tipo}, "
+                f"tempo_total={self.tempo_total}, "
+                f"usuarios~{len(self.usuarios)})")
+
+
+class MetricasUsuario:
+    """
+    Contagem das interações de um usuário por tipo, atualizada em O(1) a
+    cada interação registrada. O tempo assistido fica no próprio Usuario.
+    """
+    __slots__ = ("contagem_por_tipo",)
+
+    def __init__(self):
+        self.contagem_por_tipo: Dict[str, int] = {}
+
+    def registrar(self, tipo: str) -> None:
+        """Acumula uma interação."""
+        contagem = self.contagem_por_tipo
+        contagem[tipo] = contagem.get(tipo, 0) + 1
+
+    def __repr__(self) -> str:
+        return f"MetricasUsuario(contagem={self.contagem_por_tipo})"
+
+
+class MetricasPlataforma:
+    """
+    Acumuladores das interações de uma plataforma (rollup), atualizados
+    em O(1) a cada interação registrada: contagens por tipo, tempo
+    assistido e conjuntos de usuários e conteúdos distintos.
+    """
+    __slots__ = ("contagem_por_tipo", "total_engajamento", "tempo_total",
+                 "qtd_tempos_positivos", "usuarios", "conteudos")
+
+    def __init__(self):
+        self.contagem_por_tipo: Dict[str, int] = {}
+        self.total_engajamento: int = 0
+        self.tempo_total: int = 0
+        self.qtd_tempos_positivos: int = 0
+        self.usuarios: Set[int] = set()
+        self.conteudos: Set[int] = set()
+
+    def registrar(self, tipo: str, duracao: int, id_usuario: int, id_conteudo: int) -> None:
+        """Acumula uma interação."""
+        contagem = self.contagem_por_tipo
+        contagem[tipo] = contagem.get(tipo, 0) + 1
+        if tipo in TIPOS_ENGAJAMENTO:
+            self.total_engajamento += 1
+        if duracao > 0:
+            self.tempo_total += duracao
+            self.qtd_tempos_positivos += 1
+        self.usuarios.add(id_usuario)
+        self.conteudos.add(id_conteudo)
+
+    @property
+    def total_interacoes(self) -> int:
+        return sum(self.contagem_por_tipo.values())
+
+    @property
+    def media_tempo(self) -> float:
+        if not self.qtd_tempos_positivos:
+            return 0.0
+        return self.tempo_total / self.qtd_tempos_positivos
+
+    def qtd_usuarios(self) -> int:
+        return len(self.usuarios)
+
+    def qtd_conteudos(self) -> int:
+        return len(self.conteudos)
+
+    def __repr__(self) -> str:
+        return (f"MetricasPlataforma(contagem={self.contagem_por_tipo}, "
+                f"tempo_total={self.tempo_total}, usuarios={len(self.usuarios)}, "
+                f"conteudos={len(self.conteudos)})")
@@ -1,7 +1,12 @@
+import sys
+
+
 class Plataforma:
     """
     Representa uma plataforma onde o conteúdo é consumido ou a interação ocorre.
     """
+    __slots__ = ("__id_plataforma", "__nome_plataforma", "__nome_normalizado")
+
     def __init__(self, nome_plataforma: str, id_plataforma: int = None):
         # Valida e atribui nome via setter
         self.nome_plataforma = nome_plataforma
@@ -18,6 +23,11 @@ class Plataforma:
             raise TypeError("O ID da plataforma deve ser um inteiro ou None.")
         self.__id_plataforma = novo_id
 
+    @property
+    def nome_normalizado(self) -> str:
+        """Nome em minúsculas: a chave usada por __eq__ e __hash__."""
+        return self.__nome_normalizado
+
     @property
     def nome_plataforma(self) -> str:
         return self.__nome_plataforma
@@ -27,6 +37,8 @@ class Plataforma:
         if not novo_nome or not isinstance(novo_nome, str) or not novo_nome.strip():
             raise ValueError("O nome da plataforma não pode ser vazio.")
         self.__nome_plataforma = novo_nome.strip()
+        # chave de __eq__/__hash__, calculada uma vez (plataformas são chaves de dict frequentes)
+        self.__nome_normalizado = sys.intern(self.__nome_plataforma.lower())
 
     def __str__(self) -> str:
         # Retorna apenas o nome, para apresentações amigáveis
@@ -45,9 +57,9 @@ class Plataforma:
         # Compara pelo nome (case-insensitive)
         return (
             isinstance(other, Plataforma)
-            and self.__nome_plataforma.lower() == other.__nome_plataforma.lower()
+            and self.__nome_normalizado == other.__nome_normalizado
         )
 
     def __hash__(self) -> int:
         # Mesma lógica do eq()
-        return hash(self.__nome_plataforma.lower())
+        return hash(self.__nome_normalizado)
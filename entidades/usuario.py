@@ -1,7 +1,13 @@
+from entidades.metricas import MetricasUsuario
+from entidades.armazenamento import ListaInteracoes
+from entidades.indice_usuario import IndiceUsuario, VisaoInteracoes
+
 class Usuario:
     """
     Representa um usuário da plataforma, com suas interações registradas.
     """
+    __slots__ = ("__id_usuario", "__interacoes_realizadas", "__tempo_total", "__metricas", "__indice")
+
     def __init__(self, id_usuario):
         # Converte e valida id_usuario
         try:
@@ -10,6 +16,23 @@ class Usuario:
             raise ValueError("id_usuario deve ser um inteiro.")
         # Lista interna de Interacao
         self.__interacoes_realizadas = []
+        # soma das durações > 0, atualizada a cada interação registrada
+        self.__tempo_total = 0
+        # contagem por tipo, criada na primeira leitura e mantida a partir daí
+        self.__metricas = None
+        # índice por tipo/plataforma/conteúdo, criado na primeira consulta que o usa
+        self.__indice = None
+
+    @classmethod
+    def _restaurar(cls, id_usuario: int, interacoes, tempo_total: int) -> "Usuario":
+        """Recria um usuário já registrado (ex.: de um snapshot), sem refazer validações e somas."""
+        usuario = cls.__new__(cls)
+        usuario.__id_usuario = id_usuario
+        usuario.__interacoes_realizadas = interacoes
+        usuario.__tempo_total = tempo_total
+        usuario.__metricas = None
+        usuario.__indice = None
+        return usuario
 
     @property
     def id_usuario(self) -> int:
@@ -17,49 +40,119 @@ class Usuario:
         return self.__id_usuario
 
     @property
-    def interacoes_realizadas(self) -> list:
-        """Retorna cópia da lista de interações realizadas."""
-        return list(self.__interacoes_realizadas)
+    def interacoes_realizadas(self) -> VisaoInteracoes:
+        """Visão somente leitura das interações realizadas, sem cópia (list(...) para copiar)."""
+        return VisaoInteracoes(self.__interacoes_realizadas)
+
+    @property
+    def interacoes(self) -> VisaoInteracoes:
+        """Visão somente leitura das interações realizadas, sem cópia."""
+        return VisaoInteracoes(self.__interacoes_realizadas)
+
+    @property
+    def _lista_interacoes(self):
+        """Lista interna, sem cópia (uso restrito ao pacote)."""
+        return self.__interacoes_realizadas
+
+    @property
+    def total_interacoes(self) -> int:
+        """Quantidade de interações realizadas, sem copiar a lista."""
+        return len(self.__interacoes_realizadas)
 
     def registrar_interacao(self, interacao) -> None:
         """Adiciona uma interação à lista de interações realizadas."""
         self.__interacoes_realizadas.append(interacao)
+        duracao = interacao.watch_duration_seconds
+        if duracao > 0:
+            self.__tempo_total += duracao
+        if self.__metricas is not None:
+            self.__metricas.registrar(interacao.tipo_interacao)
+        if self.__indice is not None:
+            self.__indice.registrar(interacao)
+
+    def _obter_metricas(self) -> MetricasUsuario:
+        """Retorna a contagem por tipo, construindo-a na primeira chamada."""
+        if self.__metricas is None:
+            metricas = MetricasUsuario()
+            for i in self.__interacoes_realizadas:
+                metricas.registrar(i.tipo_interacao)
+            self.__metricas = metricas
+        return self.__metricas
+
+    def _obter_indice(self) -> IndiceUsuario:
+        """Retorna o índice das interações, construindo-o na primeira chamada."""
+        if self.__indice is None:
+            lista = self.__interacoes_realizadas
+            # no modo colunar os grupos também guardam só posições no armazenamento
+            nova_lista = lista.nova if isinstance(lista, ListaInteracoes) else list
+            self.__indice = IndiceUsuario.construir(lista, nova_lista)
+        return self.__indice
+
+    def contar_interacoes_por_tipo(self, tipo_desejado: str) -> int:
+        """Quantidade de interações do tipo informado, em O(1)."""
+        return self._obter_metricas().contagem_por_tipo.get(tipo_desejado, 0)
+
+    def calcular_tempo_total_consumo(self) -> int:
+        """Soma watch_duration_seconds positivos de todas as interações, em O(1)."""
+        return self.__tempo_total
+
+    def _usar_armazenamento(self, armazenamento) -> None:
+        """
+        Passa a guardar as interações no ArmazenamentoColunar informado,
+        migrando as já registradas.
+        """
+        self.__interacoes_realizadas = armazenamento.nova_lista(self.__interacoes_realizadas)
+        self.__indice = None
+
+    def _definir_interacoes(self, interacoes, tempo_total: int = None) -> None:
+        """
+        Substitui a lista de interações (ex.: ao restaurar um snapshot).
+        Sem tempo_total, a soma das durações é refeita a partir de interacoes.
+        """
+        if tempo_total is None:
+            tempo_total = sum(d for d in (i.watch_duration_seconds for i in interacoes) if d > 0)
+        self.__interacoes_realizadas = interacoes
+        self.__tempo_total = tempo_total
+        self.__metricas = None
+        self.__indice = None
 
     def obter_interacoes_por_tipo(self, tipo_desejado: str) -> list:
         """
-        Filtra e retorna todas as interações cujo tipo coincide com tipo_desejado.
+        Retorna todas as interações cujo tipo coincide com tipo_desejado, em O(k).
         """
-        return [
-            i for i in self.__interacoes_realizadas
-            if i.tipo_interacao == tipo_desejado
-        ]
+        return list(self._obter_indice().interacoes_do_tipo(tipo_desejado))
 
     def obter_conteudos_unicos_consumidos(self) -> set:
         """
         Retorna um set de objetos Conteudo únicos consumidos por este usuário.
         """
-        return {i.conteudo_associado for i in self.__interacoes_realizadas}
+        return set(self._obter_indice().conteudos.values())
+
+    def obter_ids_conteudos_consumidos(self) -> frozenset:
+        """IDs dos conteúdos consumidos por este usuário."""
+        return frozenset(self._obter_indice().conteudos)
+
+    def consumiu_conteudo(self, id_conteudo: int) -> bool:
+        """Indica, em O(1), se o usuário interagiu com o conteúdo."""
+        return id_conteudo in self._obter_indice().conteudos
+
+    def obter_interacoes_na_plataforma(self, plataforma) -> list:
+        """Interações feitas na plataforma informada, em O(k)."""
+        return list(self._obter_indice().interacoes_na_plataforma(plataforma))
 
     def calcular_tempo_total_consumo_plataforma(self, plataforma) -> int:
         """
-        Soma watch_duration_seconds de todas as interações feitas nesta plataforma.
+        Soma watch_duration_seconds de todas as interações feitas nesta plataforma, em O(1).
         """
-        return sum(
-            i.watch_duration_seconds
-            for i in self.__interacoes_realizadas
-            if i.plataforma_interacao == plataforma
-        )
+        return self._obter_indice().tempo_na_plataforma(plataforma)
 
     def plataformas_mais_frequentes(self, top_n=3) -> list:
         """
         Retorna as N plataformas (objetos Plataforma) mais utilizadas pelo usuário.
         """
-        contagem = {}
-        for i in self.__interacoes_realizadas:
-            plat = i.plataforma_interacao
-            contagem[plat] = contagem.get(plat, 0) + 1
+        contagem = self._obter_indice().contagem_por_plataforma()
         # Ordena por frequência decrescente e extrai apenas as plataformas
-        ordenadas = sorted(contagem.items(), key=lambda x: x[1], reverse=True)
+        ordenadas = sorted(contagem, key=lambda x: x[1], reverse=True)
         return [plat for plat, _ in ordenadas[:top_n]]
 
     def __str__(self) -> str:
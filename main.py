@@ -1,5 +1,14 @@
-import csv
+import argparse
+import asyncio
+import contextlib
+import json
+import sys
 from analise.sistema import SistemaAnaliseEngajamento
+from analise.sistema_sqlite import SistemaSQLite
+from analise.exportacao import FORMATOS, RELATORIOS, exportar_relatorios
+from analise.ingestao_incremental import GerenciadorIngestao, expandir_entradas
+from analise.rejeicoes import ColetorRejeicoes
+from analise.servico import ServicoEngajamento
 
 def formatar_tempo(segundos):
     """
@@ -43,13 +52,7 @@ def menu(sistema):
         elif opcao == "2":
             # Mostra só os 5 usuários com mais interações
             print("\n=== TOP-5 USUÁRIOS ===")
-            usuarios = sorted(
-                sistema.listar_usuarios(),
-                key=lambda u: len(u.interacoes_realizadas),
-                reverse=True
-            )[:5]
-            for u in usuarios:
-                total = len(u.interacoes_realizadas)
+            for u, total in sistema.ranking_usuarios(top_n=5):
                 print(f"ID: {u.id_usuario} | Interacoes: {total}")
 
         elif opcao == "3":
@@ -59,10 +62,14 @@ def menu(sistema):
                 print(f"ID: {c.id_conteudo} | Conteudo: {c.nome_conteudo}")
 
         elif opcao == "4":
-            # Mostra todas as plataformas
+            # Compara as plataformas pelos rollups, da que tem mais tempo assistido à que tem menos
             print("\n=== PLATAFORMAS ===")
-            for p in sistema.listar_plataformas():
-                print(f"ID: {p.id_plataforma} | Plataforma: {p.nome_plataforma}")
+            for p in sistema.comparar_plataformas(ordenar_por="tempo_total"):
+                print(f"ID: {p.id_plataforma} | Plataforma: {p.nome_plataforma} | "
+                      f"Interacoes: {p.total_interacoes} ({p.participacao_interacoes}%) | "
+                      f"Engajamento: {p.taxa_engajamento}% | "
+                      f"Tempo: {formatar_tempo(p.tempo_total)} ({p.participacao_tempo}%) | "
+                      f"Usuarios: {p.usuarios_unicos} | Conteudos: {p.conteudos_unicos}")
 
         elif opcao == "5":
             # Nova opção: listar podcasts com tipos de interação
@@ -93,6 +100,7 @@ def menu_metricas(sistema):
         print("4 - Média de tempo de visualização por conteúdo")
         print("5 - Listar comentários por conteúdo")
         print("6 - Top-5 conteúdos por total de interações")
+        print("7 - Buscar comentários")
         print("0 - Voltar ao menu principal")
 
         opcao = input("Escolha uma métrica: ")
@@ -103,67 +111,170 @@ def menu_metricas(sistema):
         # 1) Total de interações por conteúdo
         elif opcao == "1":
             print("\n=== TOTAL DE INTERAÇÕES POR CONTEÚDO ===")
-            for c in sistema.listar_conteudos():
-                total = c.calcular_total_interacoes_engajamento()
-                print(f"{c.nome_conteudo} | Interações: {total}")
+            for linha in sistema.gerar_relatorio_metricas(["total_engajamento"]):
+                print(f"{linha.nome_conteudo} | Interações: {linha.total_engajamento}")
 
         # 2) Contagem por tipo
         elif opcao == "2":
             print("\n=== CONTAGEM POR TIPO DE INTERAÇÃO ===")
-            for c in sistema.listar_conteudos():
-                contagem = c.calcular_contagem_por_tipo_interacao()
-                print(f"\n{c.nome_conteudo}:")
-                for tipo, qtd in contagem.items():
+            for linha in sistema.gerar_relatorio_metricas(["contagem_por_tipo"]):
+                print(f"\n{linha.nome_conteudo}:")
+                for tipo, qtd in linha.contagem_por_tipo.items():
                     print(f"  {tipo.capitalize()}: {qtd}")
 
         # 3) Tempo total de visualização
         elif opcao == "3":
             print("\n=== TEMPO TOTAL DE VISUALIZAÇÃO POR CONTEÚDO ===")
-            for c in sistema.listar_conteudos():
-                tempo = c.calcular_tempo_total_consumo()
-                print(f"{c.nome_conteudo} | Tempo Total: {formatar_tempo(tempo)}")
+            for linha in sistema.gerar_relatorio_metricas(["tempo_total"]):
+                print(f"{linha.nome_conteudo} | Tempo Total: {formatar_tempo(linha.tempo_total)}")
 
         # 4) Média de tempo de visualização
         elif opcao == "4":
             print("\n=== MÉDIA DE TEMPO DE VISUALIZAÇÃO POR CONTEÚDO ===")
-            for c in sistema.listar_conteudos():
-                media = c.calcular_media_tempo_consumo()
-                print(f"{c.nome_conteudo} | Tempo Médio: {formatar_tempo(media)}")
+            for linha in sistema.gerar_relatorio_metricas(["media_tempo"]):
+                print(f"{linha.nome_conteudo} | Tempo Médio: {formatar_tempo(linha.media_tempo)}")
 
         # 5) Listar comentários
         elif opcao == "5":
             print("\n=== COMENTÁRIOS POR CONTEÚDO ===")
-            for c in sistema.listar_conteudos():
-                comentarios = c.listar_comentarios()
-                if comentarios:
-                    print(f"\n{c.nome_conteudo}:")
-                    for texto in comentarios:
+            for linha in sistema.gerar_relatorio_metricas(["comentarios"]):
+                if linha.comentarios:
+                    print(f"\n{linha.nome_conteudo}:")
+                    for texto in linha.comentarios:
                         print(f"  - {texto}")
 
         # 6) Top-5 conteúdos
         elif opcao == "6":
             print("\n=== TOP-5 CONTEÚDOS POR INTERAÇÕES ===")
-            top5 = sorted(
-                sistema.listar_conteudos(),
-                key=lambda c: c.calcular_total_interacoes_engajamento(),
-                reverse=True
-            )[:5]
-            for c in top5:
-                total = c.calcular_total_interacoes_engajamento()
+            for c, total in sistema.ranking_conteudos(top_n=5):
                 print(f"{c.nome_conteudo} | Interações: {total}")
 
+        # 7) Busca nos comentários
+        elif opcao == "7":
+            consulta = input('Termos da busca (frases entre aspas): ')
+            try:
+                resultado = sistema.buscar_comentarios(consulta)
+            except ValueError as e:
+                print(e)
+                continue
+            print(f"\n=== {resultado.total} COMENTÁRIO(S) ENCONTRADO(S) ===")
+            for c in resultado.comentarios:
+                conteudo = sistema.obter_conteudo(c.id_conteudo)
+                print(f"{c.timestamp} | {conteudo.nome_conteudo} | Usuário {c.id_usuario}: {c.comentario}")
+
         else:
             print("Opção inválida. Tente novamente.")
 
-def main():
+def executar_lote(args):
+    """
+    Modo não interativo: ingere os CSVs uma única vez e grava todos os
+    relatórios pedidos em args.saida, sem passar pelo menu. Com
+    args.estado, a ingestão é incremental (ver GerenciadorIngestao); com
+    args.banco, as interações vão para um banco SQLite (ver SistemaSQLite)
+    e os relatórios cobrem tudo o que ele já acumulou.
+    """
+    rejeicoes = ColetorRejeicoes(caminho_quarentena=args.quarentena, exibir_por_categoria=0)
+    if args.estado is not None:
+        # mensagens da ingestão vão para stderr; stdout fica só com o resumo em JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            gerenciador = GerenciadorIngestao(args.estado)
+            ingestao = gerenciador.ingerir(args.entradas, rejeicoes)
+        sistema = gerenciador.sistema
+    else:
+        sistema, ingestao = _ingerir_tudo(args, rejeicoes)
+
+    nomes = list(RELATORIOS) if args.relatorios == ["todos"] else args.relatorios
+    saidas = exportar_relatorios(sistema, nomes, args.saida, args.formato, args.top_n,
+                                 args.processos or None, rejeicoes)
+    if args.banco is not None:
+        sistema.fechar()
+    print(json.dumps({"ingestao": ingestao, "relatorios": saidas}, ensure_ascii=False))
+
+
+def _ingerir_tudo(args, rejeicoes):
+    if args.banco is not None:
+        sistema = SistemaSQLite(args.banco)
+    else:
+        sistema = SistemaAnaliseEngajamento(armazenamento_colunar=True)
+    ingestao = []
+    for caminho in expandir_entradas(args.entradas):
+        with contextlib.redirect_stdout(sys.stderr):
+            if args.processos != 1:
+                resumo = sistema.processar_interacoes_do_csv_paralelo(caminho, args.processos or None,
+                                                                      rejeicoes=rejeicoes)
+            else:
+                resumo = sistema.processar_interacoes_do_csv(caminho, rejeicoes=rejeicoes)
+        ingestao.append({"arquivo": caminho, "linhas": resumo["linhas"],
+                         "rejeitadas": resumo["rejeitadas"], "segundos": round(resumo["segundos"], 3)})
+    return sistema, ingestao
+
+
+def executar_servico(args):
+    """
+    Ingere as entradas (ou parte do snapshot de interacoes_globo.csv, como o
+    menu) e atende consultas HTTP/JSON até ser interrompido (ver ServicoEngajamento).
+    """
+    if args.entradas:
+        sistema, ingestao = _ingerir_tudo(args, ColetorRejeicoes(exibir_por_categoria=0))
+        print(json.dumps({"ingestao": ingestao}, ensure_ascii=False), file=sys.stderr)
+    else:
+        sistema = SistemaAnaliseEngajamento.carregar_ou_processar_csv("interacoes_globo.csv")
+    servico = ServicoEngajamento(sistema, diretorio_ingestao=args.diretorio_ingestao)
+    try:
+        asyncio.run(servico.servir(args.host, args.servir))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servico.fechar()
+
+
+def _argumentos(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Análise de engajamento Globotech. Sem arquivos de entrada, abre o menu interativo.")
+    parser.add_argument("entradas", nargs="*",
+                        help="CSVs de interações, diretórios ou padrões glob (modo em lote)")
+    parser.add_argument("--relatorios", nargs="+", default=["todos"],
+                        choices=["todos", *RELATORIOS], help="relatórios a gerar (padrão: todos)")
+    parser.add_argument("--formato", choices=list(FORMATOS), default="jsonl")
+    parser.add_argument("--saida", default="relatorios", help="diretório dos arquivos gerados")
+    parser.add_argument("--top-n", type=int, default=10, help="tamanho dos rankings")
+    parser.add_argument("--processos", type=int, default=1,
+                        help="processos para ingestão e relatórios (0 = um por CPU)")
+    parser.add_argument("--quarentena", default=None, help="arquivo JSONL com as linhas rejeitadas")
+    parser.add_argument("--estado", default=None,
+                        help="diretório de checkpoint e snapshot: ingere só arquivos novos e trechos acrescentados")
+    parser.add_argument("--banco", default=None,
+                        help="arquivo SQLite onde as interações são gravadas e consultadas (acumula entre execuções)")
+    parser.add_argument("--servir", type=int, default=None, metavar="PORTA",
+                        help="em vez de exportar, atende consultas HTTP/JSON nesta porta")
+    parser.add_argument("--host", default="127.0.0.1", help="endereço do serviço (com --servir)")
+    parser.add_argument("--diretorio-ingestao", default=None, metavar="DIR",
+                        help="diretório de onde POST /ingestao pode ler CSVs (com --servir; sem ele, a rota fica desabilitada)")
+    args = parser.parse_args(argv)
+    if args.estado is not None and args.banco is not None:
+        parser.error("--estado e --banco não podem ser usados juntos.")
+    if args.servir is not None and (args.estado is not None or args.banco is not None):
+        parser.error("--servir não pode ser usado com --estado ou --banco.")
+    return args
+
+
+def main(argv=None):
     """
     Ponto de entrada do script:
-    - Instancia o sistema de análise
-    - Processa o CSV de interações
-    - Inicia o menu de interação com o usuário
+    - Com --servir, atende consultas HTTP/JSON (ver executar_servico)
+    - Com arquivos de entrada, executa o modo em lote (ver executar_lote)
+    - Sem argumentos, instancia o sistema de análise a partir do snapshot
+      do CSV, ou processa o CSV (e grava o snapshot) se ele mudou, e
+      inicia o menu de interação com o usuário
     """
-    sistema = SistemaAnaliseEngajamento()
-    sistema.processar_interacoes_do_csv("interacoes_globo.csv")
+    args = _argumentos(argv)
+    if args.servir is not None:
+        executar_servico(args)
+        return
+    if args.entradas:
+        executar_lote(args)
+        return
+    sistema = SistemaAnaliseEngajamento.carregar_ou_processar_csv("interacoes_globo.csv")
     menu(sistema)
 
 if __name__ == "__main__":
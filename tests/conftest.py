@@ -0,0 +1,134 @@
+import csv
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from analise.rejeicoes import ColetorRejeicoes  # noqa: E402
+from analise.sistema import SistemaAnaliseEngajamento  # noqa: E402
+from entidades.conteudo import Video  # noqa: E402
+
+CSV_GLOBO = os.path.join(RAIZ, "interacoes_globo.csv")
+
+# Defeitos aplicados, em rodízio, a uma a cada 4 linhas de interacoes_globo.csv
+# (colunas: id_conteudo, nome_conteudo, id_usuario, timestamp_interacao,
+#  plataforma, tipo_interacao, watch_duration_seconds, comment_text)
+_DEFEITOS = (
+    lambda v: ["abc"] + v[1:],                                  # id_conteudo inválido
+    lambda v: v[:5] + ["dislike"] + v[6:],                      # tipo desconhecido
+    lambda v: v[:3] + ["ontem"] + v[4:],                        # timestamp inválido
+    lambda v: v[:6] + ["-10"] + v[7:],                          # duração negativa
+    lambda v: v[:4] + ["  "] + v[5:],                           # plataforma vazia
+    lambda v: v[:5],                                            # linha curta
+    lambda v: v[:2] + ["u7"] + v[3:],                           # id_usuario inválido
+    lambda v: v[:4] + [f"  {v[4].upper()} "] + v[5:],           # plataforma com caixa/espaços (válida)
+    lambda v: v[:6] + ["", 'Ótimo, "VAR" polêmico de novo!'],   # sem duração, comentário com aspas (válida)
+    lambda v: v + ["extra"],                                    # coluna a mais
+)
+
+
+def _escrever_csv_sujo(destino: str) -> None:
+    with open(CSV_GLOBO, newline="", encoding="utf-8") as f:
+        leitor = csv.reader(f)
+        cabecalho = next(leitor)
+        linhas = list(leitor)
+    with open(destino, "w", newline="", encoding="utf-8") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(cabecalho)
+        for n, valores in enumerate(linhas):
+            escritor.writerow(valores)
+            if n % 4 == 3:
+                escritor.writerow(_DEFEITOS[(n // 4) % len(_DEFEITOS)](list(valores)))
+
+
+@pytest.fixture(scope="session")
+def csv_globo() -> str:
+    return CSV_GLOBO
+
+
+@pytest.fixture(scope="session")
+def csv_sujo(tmp_path_factory) -> str:
+    destino = str(tmp_path_factory.mktemp("dados") / "interacoes_sujas.csv")
+    _escrever_csv_sujo(destino)
+    return destino
+
+
+@pytest.fixture(scope="session", params=["globo", "sujo"])
+def csv_entrada(request, csv_globo, csv_sujo) -> str:
+    """Os dois CSVs de referência: o do repositório e uma versão com linhas inválidas."""
+    return csv_globo if request.param == "globo" else csv_sujo
+
+
+def processar(caminho: str, paralelo: bool = False, **opcoes) -> SistemaAnaliseEngajamento:
+    """Sistema com o CSV ingerido (sem mensagens de rejeição no console)."""
+    sistema = SistemaAnaliseEngajamento(**opcoes)
+    rejeicoes = ColetorRejeicoes(exibir_por_categoria=0)
+    if paralelo:
+        sistema.processar_interacoes_do_csv_paralelo(caminho, processos=2, tamanho_fatia_bytes=2048,
+                                                     rejeicoes=rejeicoes)
+    else:
+        sistema.processar_interacoes_do_csv(caminho, rejeicoes=rejeicoes)
+    return sistema
+
+
+def retrato(sistema) -> dict:
+    """
+    Estado observável do sistema pela API pública: cadastros, métricas por
+    conteúdo e usuário, rankings, relatórios, comparação e rollups de
+    plataformas.
+    IDs de interação entram pela posição na ordem dos IDs (o contador é
+    global ao processo, então os valores variam entre sistemas).
+    """
+    interacoes = list(sistema.iterar_interacoes())
+    posicoes = {id_interacao: n for n, id_interacao in enumerate(sorted(i.id_interacao for i in interacoes))}
+
+    def interacao(i):
+        return (posicoes[i.id_interacao], i.conteudo_associado.id_conteudo, i.id_usuario, i.timestamp_interacao,
+                i.plataforma_interacao.nome_plataforma, i.tipo_interacao, i.watch_duration_seconds,
+                i.comment_text)
+
+    conteudos = []
+    for c in sistema.listar_conteudos():
+        conteudos.append((
+            c.id_conteudo, c.nome_conteudo, type(c).__name__,
+            c.calcular_total_interacoes_engajamento(), c.calcular_contagem_por_tipo_interacao(),
+            c.calcular_tempo_total_consumo(), c.calcular_media_tempo_consumo(), c.listar_comentarios(),
+            c.calcular_percentual_medio_assistido() if isinstance(c, Video) else None,
+            sorted(map(interacao, c._interacoes)),
+        ))
+    usuarios = []
+    for u in sistema.listar_usuarios():
+        usuarios.append((
+            u.id_usuario, u.total_interacoes, u.calcular_tempo_total_consumo(),
+            [interacao(i) for i in u.interacoes_realizadas],
+            sorted(u.obter_ids_conteudos_consumidos()),
+            [p.nome_plataforma for p in u.plataformas_mais_frequentes()],
+        ))
+    return {
+        "plataformas": [(p.id_plataforma, p.nome_plataforma) for p in sistema.listar_plataformas()],
+        "conteudos": conteudos,
+        "usuarios": usuarios,
+        "interacoes": sorted(map(interacao, interacoes)),
+        "ranking_conteudos": [(c.id_conteudo, n) for c, n in sistema.ranking_conteudos(5)],
+        "ranking_usuarios": [(u.id_usuario, n) for u, n in sistema.ranking_usuarios(5)],
+        "relatorio": sistema.gerar_relatorio_metricas(),
+        "plataformas_comparadas": sistema.comparar_plataformas(),
+        "rollups": {id_plataforma: (m.contagem_por_tipo, m.total_engajamento, m.tempo_total,
+                                    m.qtd_tempos_positivos, m.usuarios, m.conteudos)
+                    for id_plataforma, m in sistema.rollups_plataformas().items()},
+    }
+
+
+@pytest.fixture(scope="session")
+def referencia():
+    """retrato() do sistema em modo de objetos (a referência), por CSV."""
+    retratos = {}
+
+    def obter(caminho: str) -> dict:
+        if caminho not in retratos:
+            retratos[caminho] = retrato(processar(caminho))
+        return retratos[caminho]
+    return obter
@@ -0,0 +1,99 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from analise.rejeicoes import ColetorRejeicoes
+from analise.sistema import SistemaAnaliseEngajamento
+from entidades.armazenamento import ArmazenamentoColunar, InteracaoColunar, ListaInteracoes, para_epoch
+
+from conftest import processar, retrato
+
+
+def test_modo_colunar_equivale_ao_modo_de_objetos(csv_entrada, referencia):
+    sistema = processar(csv_entrada, armazenamento_colunar=True)
+    assert isinstance(sistema.armazenamento, ArmazenamentoColunar)
+    assert retrato(sistema) == referencia(csv_entrada)
+
+
+def test_visoes_colunares_refletem_as_colunas(csv_sujo):
+    objetos = processar(csv_sujo)
+    colunar = processar(csv_sujo, armazenamento_colunar=True)
+    armazenamento = colunar.armazenamento
+    assert len(armazenamento) == sum(1 for _ in objetos.iterar_interacoes())
+
+    originais = sorted(objetos.iterar_interacoes(), key=lambda i: i.id_interacao)
+    visoes = list(colunar.iterar_interacoes())
+    base_obj, base_col = originais[0].id_interacao, visoes[0].id_interacao
+    for original, visao in zip(originais, visoes):
+        assert isinstance(visao, InteracaoColunar)
+        assert visao.id_interacao - base_col == original.id_interacao - base_obj
+        assert visao.conteudo_associado is colunar.obter_conteudo(original.conteudo_associado.id_conteudo)
+        assert (visao.plataforma_interacao.id_plataforma, visao.plataforma_interacao.nome_plataforma) == (
+            original.plataforma_interacao.id_plataforma, original.plataforma_interacao.nome_plataforma)
+        assert (visao.id_usuario, visao.timestamp_interacao, visao.tipo_interacao,
+                visao.watch_duration_seconds, visao.comment_text) == (
+            original.id_usuario, original.timestamp_interacao, original.tipo_interacao,
+            original.watch_duration_seconds, original.comment_text)
+
+    # visões da mesma linha são iguais; entidades guardam só posições
+    assert armazenamento.interacao(0) == visoes[0]
+    assert hash(armazenamento.interacao(0)) == hash(visoes[0])
+    assert armazenamento.interacao(0) != visoes[1]
+    conteudo = colunar.listar_conteudos()[0]
+    assert isinstance(conteudo._interacoes, ListaInteracoes)
+    assert conteudo._interacoes[0] == next(iter(conteudo._interacoes))
+
+
+def test_lista_interacoes_aceita_interacao_externa(csv_globo):
+    objetos = processar(csv_globo)
+    colunar = processar(csv_globo, armazenamento_colunar=True)
+    original = next(objetos.iterar_interacoes())
+    lista = colunar.armazenamento.nova_lista([original])
+    assert len(colunar.armazenamento) == sum(1 for _ in objetos.iterar_interacoes()) + 1
+    copia = lista[0]
+    assert (copia.id_interacao, copia.id_usuario, copia.tipo_interacao, copia.comment_text) == (
+        original.id_interacao, original.id_usuario, original.tipo_interacao, original.comment_text)
+    # a mesma interação em outra lista (ex.: a do usuário) não é gravada de novo
+    outra = colunar.armazenamento.nova_lista([original, original])
+    assert len(colunar.armazenamento) == sum(1 for _ in objetos.iterar_interacoes()) + 1
+    assert outra[0] == outra[1] == copia
+
+
+def test_interacoes_realizadas_sem_copia(csv_globo):
+    for sistema in (processar(csv_globo), processar(csv_globo, armazenamento_colunar=True)):
+        usuario = sistema.listar_usuarios()[0]
+        visao = usuario.interacoes_realizadas
+        antes = len(visao)
+        assert list(visao) == list(usuario.interacoes) and visao[0] == usuario.interacoes[0]
+        usuario.registrar_interacao(visao[0])
+        assert len(visao) == antes + 1   # reflete o registro feito depois
+        assert not hasattr(visao, "append")
+
+
+def test_metricas_conteudos_iguais_as_das_interacoes(csv_entrada):
+    for opcoes in ({}, {"armazenamento_colunar": True}, {"metricas_aproximadas": True}):
+        sistema = processar(csv_entrada, **opcoes)
+        esperado = {c.id_conteudo: {} for c in sistema.listar_conteudos()}
+        for i in sistema.iterar_interacoes():
+            contagem = esperado[i.conteudo_associado.id_conteudo]
+            contagem[i.tipo_interacao] = contagem.get(i.tipo_interacao, 0) + 1
+        tabela = sistema.calcular_metricas_conteudos()
+        assert {id_conteudo: m.contagem_por_tipo for id_conteudo, m in tabela.items()} == esperado
+        assert all(m is sistema.obter_conteudo(id_conteudo)._obter_metricas() for id_conteudo, m in tabela.items())
+
+
+def test_timestamp_com_fuso_rejeitado_em_todos_os_modos(tmp_path):
+    caminho = tmp_path / "fuso.csv"
+    caminho.write_text(
+        "id_conteudo,nome_conteudo,id_usuario,timestamp_interacao,plataforma,tipo_interacao,"
+        "watch_duration_seconds,comment_text\n"
+        "1,Jogo,10,2024-01-01T10:00:00,Globoplay,like,0,\n"
+        "1,Jogo,11,2024-01-01T10:00:00+03:00,Globoplay,like,0,\n", encoding="utf-8")
+    for colunar in (False, True):
+        rejeicoes = ColetorRejeicoes(exibir_por_categoria=0)
+        sistema = SistemaAnaliseEngajamento(armazenamento_colunar=colunar)
+        sistema.processar_interacoes_do_csv(str(caminho), rejeicoes=rejeicoes)
+        assert rejeicoes.total == 1
+        assert [i.timestamp_interacao for i in sistema.iterar_interacoes()] == [datetime(2024, 1, 1, 10)]
+    with pytest.raises(ValueError, match="fuso"):
+        para_epoch(datetime(2024, 1, 1, tzinfo=timezone.utc))
@@ -0,0 +1,116 @@
+import gc
+import weakref
+from datetime import datetime
+
+import pytest
+
+from analise.rejeicoes import ColetorRejeicoes
+from entidades.cache_metricas import CACHE_METRICAS, CacheMetricas
+from entidades.conteudo import Conteudo, Video
+from entidades.interacao import Interacao
+from entidades.plataforma import Plataforma
+
+from conftest import processar, retrato
+
+
+@pytest.fixture(autouse=True)
+def _cache_sem_limite():
+    """Os testes contam acertos do cache global; um orçamento pequeno configurado antes os afetaria."""
+    limite = CACHE_METRICAS.limite_bytes
+    CACHE_METRICAS.configurar(64 * 1024 * 1024)
+    yield
+    CACHE_METRICAS.configurar(limite)
+
+
+def _comentar(conteudo, texto, id_usuario=1, duracao=0):
+    conteudo.adicionar_interacao(Interacao(conteudo, id_usuario, datetime(2024, 1, 1, 12), Plataforma("Globoplay"),
+                                           "comment", duracao, texto))
+
+
+def test_nova_interacao_invalida_so_o_conteudo_alterado():
+    video, outro = Video(1, "Jogo", 5400), Video(2, "Novela", 3600)
+    _comentar(video, "primeiro")
+    _comentar(outro, "outro")
+    assert video.listar_comentarios() == ["primeiro"]
+    assert outro.listar_comentarios() == ["outro"]
+    acertos = CACHE_METRICAS.acertos
+    assert video.listar_comentarios() == ["primeiro"]
+    assert CACHE_METRICAS.acertos == acertos + 1
+
+    versao = video._versao
+    _comentar(video, "segundo", id_usuario=2, duracao=60)
+    assert video._versao > versao
+    assert video.listar_comentarios() == ["primeiro", "segundo"]
+    assert video.estimar_usuarios_unicos() == 2
+    assert video.quantis_tempo_consumo() == {0.5: 60, 0.95: 60}
+    acertos = CACHE_METRICAS.acertos
+    assert outro.listar_comentarios() == ["outro"]
+    assert CACHE_METRICAS.acertos == acertos + 1
+
+
+def test_resultado_copiado_e_troca_de_modo_invalida():
+    conteudo = Conteudo(3, "Artigo")
+    _comentar(conteudo, "texto", duracao=30)
+    conteudo.listar_comentarios().append("alterado fora")
+    conteudo.quantis_tempo_consumo()[0.5] = -1
+    assert conteudo.listar_comentarios() == ["texto"]
+    assert conteudo.quantis_tempo_consumo() == {0.5: 30, 0.95: 30}
+
+    versao = conteudo._versao
+    conteudo.usar_metricas_aproximadas()
+    assert conteudo._versao > versao
+    assert conteudo.estimar_usuarios_unicos() == 1
+    # argumentos não hasheáveis seguem sem cache
+    assert conteudo.quantis_tempo_consumo([0.5]) == {0.5: 30}
+
+
+def test_memoizacao_acompanha_a_ingestao(csv_globo, csv_sujo):
+    sistema = processar(csv_globo, armazenamento_colunar=True)
+    retrato(sistema)   # memoiza as métricas de todos os conteúdos
+    sistema.processar_interacoes_do_csv(csv_sujo, rejeicoes=ColetorRejeicoes(exibir_por_categoria=0))
+    referencia = processar(csv_globo)
+    referencia.processar_interacoes_do_csv(csv_sujo, rejeicoes=ColetorRejeicoes(exibir_por_categoria=0))
+    assert retrato(sistema) == retrato(referencia)
+
+
+def test_entradas_descartadas_quando_o_conteudo_e_coletado(csv_globo):
+    sistema = processar(csv_globo)
+    conteudos = sistema.listar_conteudos()
+    for c in conteudos:
+        c.listar_comentarios()
+        c.estimar_usuarios_unicos()
+    ids = {id(c) for c in conteudos}
+    referencias = [weakref.ref(c) for c in conteudos]
+    assert ids <= set(CACHE_METRICAS._chaves_por_dono)
+    bytes_antes = CACHE_METRICAS.bytes_usados
+
+    del sistema, conteudos, c
+    gc.collect()
+    assert all(r() is None for r in referencias)
+    assert not ids & set(CACHE_METRICAS._chaves_por_dono)
+    assert not any(chave[0] in ids for chave in CACHE_METRICAS._entradas)
+    assert CACHE_METRICAS.bytes_usados < bytes_antes
+
+
+def test_orcamento_descarta_as_menos_usadas():
+    cache = CacheMetricas(limite_bytes=2000)
+    valor = "x" * 300
+    for n in range(3):
+        cache.guardar((n, "m", (), ()), 0, valor)
+    assert cache.obter((0, "m", (), ()), 0) == (True, valor)
+    cache.guardar((3, "m", (), ()), 0, valor)
+    assert cache.bytes_usados <= cache.limite_bytes
+    assert cache.obter((0, "m", (), ()), 0)[0]           # usada há pouco: permanece
+    assert not cache.obter((1, "m", (), ()), 0)[0]       # a menos usada saiu
+    assert cache.descartes >= 1
+
+    cache.guardar((4, "m", (), ()), 0, "y" * 5000)       # maior que o orçamento: não entra
+    assert not cache.obter((4, "m", (), ()), 0)[0]
+    assert not cache.obter((0, "m", (), ()), 1)[0]       # versão diferente: descartada
+    assert (0, "m", (), ()) not in cache._entradas
+
+    cache.configurar(600)
+    assert cache.bytes_usados <= 600 and len(cache) == 1
+    cache.limpar()
+    assert (len(cache), cache.bytes_usados) == (0, 0)
+
@@ -0,0 +1,47 @@
+import pytest
+
+from analise.coconsumo import MotorCoconsumo
+
+from conftest import processar
+
+
+def _audiencias(sistema, tipos=None):
+    audiencias = {c.id_conteudo: set() for c in sistema.listar_conteudos()}
+    for i in sistema.iterar_interacoes():
+        if tipos is None or i.tipo_interacao in tipos:
+            audiencias[i.conteudo_associado.id_conteudo].add(i.id_usuario)
+    return audiencias
+
+
+@pytest.mark.parametrize("armazenamento_colunar", [False, True])
+@pytest.mark.parametrize("tipos", [None, ("view_start",)])
+def test_sobreposicoes_iguais_as_de_conjuntos(csv_entrada, armazenamento_colunar, tipos):
+    sistema = processar(csv_entrada, armazenamento_colunar=armazenamento_colunar)
+    motor = sistema.coconsumo(tipos)
+    audiencias = _audiencias(sistema, tipos)
+    ids = sorted(audiencias)
+    assert sorted(motor.conteudos()) == ids
+    for id_a in ids:
+        assert set(motor.usuarios(id_a)) == audiencias[id_a]
+        assert motor.audiencia(id_a) == len(audiencias[id_a])
+        for id_b in ids:
+            comum = len(audiencias[id_a] & audiencias[id_b])
+            uniao = len(audiencias[id_a] | audiencias[id_b])
+            assert motor.sobreposicao(id_a, id_b) == comum
+            assert motor.jaccard(id_a, id_b) == (comum / uniao if uniao else 0.0)
+    assert motor.matriz_sobreposicao() == {
+        (a, b): len(audiencias[a] & audiencias[b]) for n, a in enumerate(ids) for b in ids[n + 1:]
+        if audiencias[a] & audiencias[b]}
+    alvo = ids[0]
+    esperado = sorted(((b, len(audiencias[alvo] & audiencias[b])) for b in ids
+                       if b != alvo and audiencias[alvo] & audiencias[b]), key=lambda r: r[1], reverse=True)
+    assert [(b, comum) for b, comum, _ in motor.tambem_assistiram(alvo, top_n=len(ids))] == esperado
+
+
+def test_conteudo_desconhecido_ou_sem_audiencia():
+    motor = MotorCoconsumo({1: [10, 11, 10], 2: [], 3: [11, 12]})
+    assert list(motor.usuarios(1)) == [10, 11]
+    assert (motor.audiencia(2), motor.audiencia(99)) == (0, 0)
+    assert motor.sobreposicao(1, 99) == motor.sobreposicao(2, 3) == 0
+    assert motor.tambem_assistiram(99) == [] and motor.tambem_assistiram(1) == [(3, 1, 1 / 3)]
+    assert motor.matriz_sobreposicao() == {(1, 3): 1}
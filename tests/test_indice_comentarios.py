@@ -0,0 +1,93 @@
+from datetime import datetime
+
+import pytest
+
+from analise.indice_comentarios import interpretar_consulta, tokenizar
+from analise.rejeicoes import ColetorRejeicoes
+from analise.sistema import SistemaAnaliseEngajamento
+
+from conftest import processar
+
+CONSULTAS = ["muito", "ANALISE", "otimo", '"polemico de novo"', '"de novo polemico"', '"var polemico"',
+             'podcast "futebol"', 'que "jogaço', "inexistente"]
+
+
+def _forca_bruta(sistema, consulta, ids_conteudos=None, ids_plataformas=None, inicio=None, fim=None):
+    """IDs das interações que casam com a consulta, do mais recente ao mais antigo."""
+    clausulas = [" ".join(c) for c in interpretar_consulta(consulta)]
+    encontradas = []
+    for i in sistema.iterar_interacoes():
+        texto = f" {' '.join(tokenizar(i.comment_text))} "
+        if not i.comment_text or not all(f" {clausula} " in texto for clausula in clausulas):
+            continue
+        if ids_conteudos is not None and i.conteudo_associado.id_conteudo not in ids_conteudos:
+            continue
+        if ids_plataformas is not None and i.plataforma_interacao.id_plataforma not in ids_plataformas:
+            continue
+        if inicio is not None and i.timestamp_interacao < inicio:
+            continue
+        if fim is not None and i.timestamp_interacao >= fim:
+            continue
+        encontradas.append((i.timestamp_interacao, i.id_interacao))
+    return [id_interacao for _, id_interacao in sorted(encontradas, reverse=True)]
+
+
+def _conferir(sistema):
+    conteudos = {c.id_conteudo for c in sistema.listar_conteudos()[::2]}
+    plataformas = {sistema.listar_plataformas()[0].id_plataforma}
+    filtros = [{}, {"ids_conteudos": conteudos}, {"ids_plataformas": plataformas},
+               {"inicio": datetime(2024, 1, 1), "fim": datetime(2025, 6, 1)}]
+    for consulta in CONSULTAS:
+        for filtro in filtros:
+            esperado = _forca_bruta(sistema, consulta, **filtro)
+            resultado = sistema.buscar_comentarios(consulta, tamanho_pagina=max(len(esperado), 1), **filtro)
+            assert resultado.total == len(esperado), (consulta, filtro)
+            assert [c.id_interacao for c in resultado.comentarios] == esperado, (consulta, filtro)
+            assert sum(resultado.por_conteudo.values()) == sum(resultado.por_plataforma.values()) == len(esperado)
+    assert len(sistema.indice_comentarios) == sum(1 for i in sistema.iterar_interacoes() if i.comment_text)
+
+
+def test_termos_sem_acentos_e_frases():
+    assert tokenizar("Ótimas DICAS, financeiras!") == ("otimas", "dicas", "financeiras")
+    assert interpretar_consulta('gol "VAR polêmico" juiz') == [("gol",), ("var", "polemico"), ("juiz",)]
+    assert interpretar_consulta('que "jogaço') == [("que",), ("jogaco",)]   # aspas sem par
+    assert interpretar_consulta('"" !!') == []
+
+
+@pytest.mark.parametrize("armazenamento_colunar", [False, True])
+def test_busca_igual_a_forca_bruta(csv_entrada, armazenamento_colunar):
+    sistema = processar(csv_entrada, armazenamento_colunar=armazenamento_colunar)
+    _conferir(sistema)
+    # a frase exige os termos consecutivos e na ordem
+    assert sistema.buscar_comentarios('"polemico de novo"').total > 0
+    assert sistema.buscar_comentarios('"de novo polemico"').total == 0
+    assert sistema.buscar_comentarios("novo polemico de").total == sistema.buscar_comentarios(
+        '"polemico de novo"').total
+
+
+@pytest.mark.parametrize("armazenamento_colunar", [False, True])
+def test_busca_apos_snapshot_e_novas_interacoes(csv_globo, csv_sujo, tmp_path, armazenamento_colunar):
+    caminho = str(tmp_path / "sistema.snapshot")
+    processar(csv_globo, armazenamento_colunar=armazenamento_colunar).salvar_snapshot(caminho)
+    carregado = SistemaAnaliseEngajamento.carregar_snapshot(caminho)
+    _conferir(carregado)
+    antes = carregado.buscar_comentarios('"var polemico"').total
+    carregado.processar_interacoes_do_csv(csv_sujo, rejeicoes=ColetorRejeicoes(exibir_por_categoria=0))
+    _conferir(carregado)
+    assert carregado.buscar_comentarios('"var polemico"').total > antes
+
+
+def test_paginacao(csv_sujo):
+    sistema = processar(csv_sujo)
+    completo = sistema.buscar_comentarios("que", tamanho_pagina=1000)
+    assert completo.total > 3
+    paginas = [sistema.buscar_comentarios("que", pagina=n, tamanho_pagina=3)
+               for n in range(1, completo.total // 3 + 2)]
+    assert [c for p in paginas for c in p.comentarios] == completo.comentarios
+    assert all(p.total == completo.total and p.por_conteudo == completo.por_conteudo for p in paginas)
+    assert sistema.buscar_comentarios("que", pagina=completo.total + 1, tamanho_pagina=1).comentarios == []
+    for argumentos in ({"pagina": 0}, {"tamanho_pagina": 0}):
+        with pytest.raises(ValueError):
+            sistema.buscar_comentarios("que", **argumentos)
+    with pytest.raises(ValueError):
+        sistema.buscar_comentarios(' "" ')
@@ -0,0 +1,109 @@
+import os
+
+import pytest
+
+from analise.ingestao_incremental import GerenciadorIngestao
+from analise.rejeicoes import ColetorRejeicoes
+from analise.sistema import SistemaAnaliseEngajamento
+
+from conftest import retrato
+
+
+def _ingerir(gerenciador, entradas):
+    return gerenciador.ingerir(entradas, rejeicoes=ColetorRejeicoes(exibir_por_categoria=0),
+                               tamanho_fatia_bytes=2048)
+
+
+def _dividir(caminho_csv):
+    """Conteúdo do CSV e um ponto de corte no meio de uma linha."""
+    with open(caminho_csv, "rb") as f:
+        dados = f.read()
+    corte = dados.index(b"\n", len(dados) // 2) + 10
+    return dados, corte
+
+
+def test_execucoes_incrementais_equivalem_a_uma_unica(csv_entrada, referencia, tmp_path):
+    dados, corte = _dividir(csv_entrada)
+    arquivo = tmp_path / "entrada" / "interacoes.csv"
+    arquivo.parent.mkdir()
+    arquivo.write_bytes(dados[:corte])
+    estado = str(tmp_path / "estado")
+
+    primeira = _ingerir(GerenciadorIngestao(estado), [str(arquivo.parent)])
+    assert [(r["situacao"], r["arquivo"]) for r in primeira] == [("novo", str(arquivo))]
+    # a linha incompleta do fim fica para a próxima execução
+    assert primeira[0]["bytes"] == dados.rindex(b"\n", 0, corte) + 1 - (dados.index(b"\n") + 1)
+
+    with open(arquivo, "ab") as f:
+        f.write(dados[corte:])
+    gerenciador = GerenciadorIngestao(estado)
+    segunda = _ingerir(gerenciador, [str(arquivo)])
+    assert segunda[0]["situacao"] == "acrescimo"
+    assert primeira[0]["linhas"] + segunda[0]["linhas"] == dados.count(b"\n") - 1
+    assert retrato(gerenciador.sistema) == referencia(csv_entrada)
+
+    recarregado = GerenciadorIngestao(estado)
+    terceira = _ingerir(recarregado, [str(arquivo)])
+    assert terceira[0]["situacao"] == "sem_mudancas" and terceira[0]["linhas"] == 0
+    assert retrato(recarregado.sistema) == referencia(csv_entrada)
+
+
+def test_rejeicoes_com_a_linha_do_arquivo_entre_execucoes(csv_sujo, tmp_path):
+    dados, corte = _dividir(csv_sujo)
+    arquivo = tmp_path / "interacoes.csv"
+    arquivo.write_bytes(dados[:corte])
+    estado = str(tmp_path / "estado")
+    numeros = []
+    for execucao in range(2):
+        if execucao:
+            with open(arquivo, "ab") as f:
+                f.write(dados[corte:])
+        rejeicoes = ColetorRejeicoes(exibir_por_categoria=0, amostras_por_categoria=1000)
+        GerenciadorIngestao(estado).ingerir([str(arquivo)], rejeicoes=rejeicoes, tamanho_fatia_bytes=2048)
+        numeros += [e["numero_linha"] for exemplos in rejeicoes.exemplos.values() for e in exemplos]
+
+    sequencial = ColetorRejeicoes(exibir_por_categoria=0, amostras_por_categoria=1000)
+    SistemaAnaliseEngajamento().processar_interacoes_do_csv(csv_sujo, rejeicoes=sequencial)
+    assert sorted(numeros) == sorted(e["numero_linha"] for exemplos in sequencial.exemplos.values()
+                                     for e in exemplos)
+
+
+@pytest.mark.parametrize("reescrita", ["encolhido", "inicio_alterado"])
+def test_arquivo_reescrito_nao_e_reprocessado(csv_globo, tmp_path, reescrita):
+    dados, corte = _dividir(csv_globo)
+    arquivo = tmp_path / "interacoes.csv"
+    arquivo.write_bytes(dados)
+    gerenciador = GerenciadorIngestao()
+    assert _ingerir(gerenciador, [str(arquivo)])[0]["situacao"] == "novo"
+    antes = retrato(gerenciador.sistema)
+
+    if reescrita == "encolhido":
+        arquivo.write_bytes(dados[:corte])
+    else:
+        # o arquivo cresceu como num acréscimo, mas a primeira linha de dados mudou
+        inicio = dados.index(b"\n") + 1
+        arquivo.write_bytes(dados[:inicio] + b"9" + dados[inicio + 1:] + dados[inicio:])
+    resultado = _ingerir(gerenciador, [str(arquivo)])
+    assert (resultado[0]["situacao"], resultado[0]["linhas"], resultado[0]["bytes"]) == ("reescrito", 0, 0)
+    assert retrato(gerenciador.sistema) == antes
+
+
+def test_varios_arquivos_e_estado_inconsistente(csv_globo, csv_sujo, tmp_path):
+    entrada = tmp_path / "entrada"
+    entrada.mkdir()
+    for nome, origem in (("a.csv", csv_globo), ("b.csv", csv_sujo)):
+        with open(origem, "rb") as f:
+            (entrada / nome).write_bytes(f.read())
+    (entrada / "vazio.csv").write_bytes(b"")
+    estado = tmp_path / "estado"
+
+    resultado = _ingerir(GerenciadorIngestao(str(estado)), [str(entrada / "*.csv")])
+    assert [(os.path.basename(r["arquivo"]), r["situacao"]) for r in resultado] == [
+        ("a.csv", "novo"), ("b.csv", "novo"), ("vazio.csv", "sem_mudancas")]
+    assert resultado[1]["rejeitadas"] > 0
+
+    # snapshot gravado fora do gerenciador: o checkpoint não corresponde mais a ele
+    snapshot = estado / GerenciadorIngestao.ARQUIVO_SNAPSHOT
+    snapshot.write_bytes(snapshot.read_bytes() + b"\0")
+    with pytest.raises(ValueError):
+        GerenciadorIngestao(str(estado))
@@ -0,0 +1,84 @@
+import csv
+import json
+
+import pytest
+
+from analise.ingestao_paralela import dividir_csv
+from analise.rejeicoes import ColetorRejeicoes
+from analise.sistema import SistemaAnaliseEngajamento
+
+from conftest import processar, retrato
+
+
+@pytest.mark.parametrize("armazenamento_colunar", [False, True])
+def test_ingestao_paralela_equivale_a_sequencial(csv_entrada, referencia, armazenamento_colunar):
+    sistema = processar(csv_entrada, paralelo=True, armazenamento_colunar=armazenamento_colunar)
+    assert retrato(sistema) == referencia(csv_entrada)
+
+
+def test_rejeicoes_iguais_as_da_ingestao_sequencial(csv_sujo):
+    resumos = []
+    for paralelo in (False, True):
+        sistema = SistemaAnaliseEngajamento()
+        rejeicoes = ColetorRejeicoes(exibir_por_categoria=0)
+        if paralelo:
+            resumo = sistema.processar_interacoes_do_csv_paralelo(csv_sujo, processos=2, tamanho_fatia_bytes=1024,
+                                                                  rejeicoes=rejeicoes)
+        else:
+            resumo = sistema.processar_interacoes_do_csv(csv_sujo, rejeicoes=rejeicoes)
+        resumos.append((resumo["linhas"], resumo["rejeitadas"], resumo["rejeicoes"]))
+    assert resumos[0] == resumos[1]
+    assert resumos[0][1] > 0
+
+
+def _linhas_rejeitadas(caminho_quarentena):
+    with open(caminho_quarentena, encoding="utf-8") as f:
+        return [json.loads(linha) for linha in f]
+
+
+def test_rejeicoes_com_a_linha_do_arquivo(csv_sujo, tmp_path):
+    # linhas em branco deslocam a linha do arquivo em relação à contagem de registros
+    with open(csv_sujo, encoding="utf-8") as f:
+        linhas = f.read().splitlines()
+    entrada = tmp_path / "com_vazias.csv"
+    entrada.write_text("\n".join(linha if n % 7 else linha + "\n" for n, linha in enumerate(linhas, 1)) + "\n",
+                       encoding="utf-8")
+    fisicas = entrada.read_text(encoding="utf-8").split("\n")
+
+    numeros = {}
+    for modo in ("sequencial", "instrumentada", "paralela", "fluxo"):
+        quarentena = str(tmp_path / f"{modo}.jsonl")
+        rejeicoes = ColetorRejeicoes(quarentena, exibir_por_categoria=0)
+        sistema = SistemaAnaliseEngajamento()
+        if modo == "paralela":
+            sistema.processar_interacoes_do_csv_paralelo(str(entrada), processos=2, tamanho_fatia_bytes=1024,
+                                                         rejeicoes=rejeicoes)
+        elif modo == "fluxo":
+            with open(entrada, newline="", encoding="utf-8") as f:
+                sistema.consumir_fluxo(csv.DictReader(f), rejeicoes=rejeicoes)
+        else:
+            if modo == "instrumentada":
+                sistema.habilitar_instrumentacao()
+            sistema.processar_interacoes_do_csv(str(entrada), rejeicoes=rejeicoes)
+        rejeitadas = _linhas_rejeitadas(quarentena)
+        for r in rejeitadas:
+            if r["linha"] is None:   # rejeitada depois da preparação, sem a linha original
+                continue
+            valores = next(csv.reader([fisicas[r["numero_linha"] - 1]]))
+            assert valores[:3] == [r["linha"]["id_conteudo"], r["linha"]["nome_conteudo"], r["linha"]["id_usuario"]]
+        numeros[modo] = [r["numero_linha"] for r in rejeitadas]
+    assert len(set(map(tuple, numeros.values()))) == 1
+    assert numeros["sequencial"][-1] > len(linhas)   # passou das linhas em branco
+
+
+def test_fatias_cobrem_o_arquivo_em_linhas_inteiras(csv_globo):
+    cabecalho, fatias = dividir_csv(csv_globo, 1000)
+    assert cabecalho[0] == "id_conteudo"
+    assert len(fatias) > 1
+    with open(csv_globo, "rb") as f:
+        conteudo = f.read()
+    assert fatias[0][0] == conteudo.index(b"\n") + 1
+    assert fatias[-1][1] == len(conteudo)
+    for (_, fim), (inicio, _) in zip(fatias, fatias[1:]):
+        assert fim == inicio
+        assert conteudo[fim - 1:fim] == b"\n"
@@ -0,0 +1,89 @@
+import csv
+
+import pytest
+
+from analise.rejeicoes import ColetorRejeicoes
+from analise.sistema import SistemaAnaliseEngajamento
+from entidades.armazenamento import TIPOS_INTERACAO
+from entidades.metricas import MetricasPlataforma
+
+from conftest import processar
+
+
+def _agregar_plataformas_colunas(armazenamento):
+    """Oráculo dos rollups: group-by por id_plataforma em uma passada sobre as colunas."""
+    tabela = {}
+    tipos = TIPOS_INTERACAO
+    # código interno da plataforma -> acumuladores do id_plataforma correspondente
+    por_codigo = []
+    for plataforma in armazenamento._lista_plataformas:
+        m = tabela.get(plataforma.id_plataforma)
+        if m is None:
+            m = tabela[plataforma.id_plataforma] = MetricasPlataforma()
+        por_codigo.append(m)
+    for codigo_plataforma, id_conteudo, id_usuario, codigo_tipo, duracao in zip(armazenamento._plataformas,
+                                                                                 armazenamento._conteudos,
+                                                                                 armazenamento._usuarios,
+                                                                                 armazenamento._tipos,
+                                                                                 armazenamento._duracoes):
+        por_codigo[codigo_plataforma].registrar(tipos[codigo_tipo], duracao, id_usuario, id_conteudo)
+    return tabela
+
+
+def _agregar_plataformas_interacoes(interacoes):
+    """Mesma agregação de _agregar_plataformas_colunas, a partir de objetos com a API de Interacao."""
+    tabela = {}
+    for i in interacoes:
+        id_plataforma = i.plataforma_interacao.id_plataforma
+        m = tabela.get(id_plataforma)
+        if m is None:
+            m = tabela[id_plataforma] = MetricasPlataforma()
+        m.registrar(i.tipo_interacao, i.watch_duration_seconds, i.id_usuario, i.conteudo_associado.id_conteudo)
+    return tabela
+
+
+def _valores(rollups, ordem_dos_tipos=False):
+    return {id_plataforma: (list(m.contagem_por_tipo.items()) if ordem_dos_tipos else m.contagem_por_tipo,
+                            m.total_engajamento, m.tempo_total, m.qtd_tempos_positivos, m.usuarios, m.conteudos)
+            for id_plataforma, m in rollups.items()}
+
+
+@pytest.mark.parametrize("armazenamento_colunar", [False, True])
+@pytest.mark.parametrize("ingestao", ["sequencial", "paralela", "fluxo"])
+def test_rollups_iguais_a_agregacao_das_interacoes(csv_entrada, armazenamento_colunar, ingestao):
+    if ingestao == "fluxo":
+        sistema = SistemaAnaliseEngajamento(armazenamento_colunar=armazenamento_colunar)
+        with open(csv_entrada, newline="", encoding="utf-8") as f:
+            sistema.consumir_fluxo(csv.DictReader(f), rejeicoes=ColetorRejeicoes(exibir_por_categoria=0))
+    else:
+        sistema = processar(csv_entrada, paralelo=ingestao == "paralela",
+                            armazenamento_colunar=armazenamento_colunar)
+    rollups = sistema.rollups_plataformas()
+    assert _valores(rollups) == _valores(_agregar_plataformas_interacoes(sistema.iterar_interacoes()))
+    if armazenamento_colunar:
+        # na ordem de ingestão, como o group-by sobre as colunas
+        assert (_valores(rollups, ordem_dos_tipos=True)
+                == _valores(_agregar_plataformas_colunas(sistema.armazenamento), ordem_dos_tipos=True))
+    assert sistema.rollups_plataformas() is rollups
+
+
+def test_rollups_continuam_apos_carregar_snapshot(csv_globo, csv_sujo, tmp_path):
+    caminho = str(tmp_path / "sistema.snapshot")
+    processar(csv_globo).salvar_snapshot(caminho)
+    carregado = SistemaAnaliseEngajamento.carregar_snapshot(caminho)
+    carregado.processar_interacoes_do_csv(csv_sujo, rejeicoes=ColetorRejeicoes(exibir_por_categoria=0))
+    assert (_valores(carregado.rollups_plataformas())
+            == _valores(_agregar_plataformas_interacoes(carregado.iterar_interacoes())))
+
+
+def test_comparar_plataformas_filtra_e_ordena(csv_sujo):
+    sistema = processar(csv_sujo)
+    todas = sistema.comparar_plataformas()
+    nomes = {linha.nome_plataforma for linha in todas}
+    assert nomes == {p.nome_plataforma for p in sistema.listar_plataformas()}
+    escolhidas = sorted(nomes)[:2]
+    filtradas = sistema.comparar_plataformas(escolhidas)
+    assert {linha.nome_plataforma for linha in filtradas} == set(escolhidas)
+    ordenadas = sistema.comparar_plataformas(ordenar_por="tempo_total")
+    assert [linha.tempo_total for linha in ordenadas] == sorted((linha.tempo_total for linha in todas),
+                                                                 reverse=True)
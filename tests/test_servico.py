@@ -0,0 +1,198 @@
+import asyncio
+import json
+import os
+import shutil
+import socket
+
+import pytest
+
+from analise import servico
+from analise.rejeicoes import ColetorRejeicoes
+from analise.servico import CacheResultados, ServicoEngajamento
+
+from conftest import processar
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _http(porta, metodo, caminho, corpo=None):
+    leitor, escritor = await asyncio.open_connection("127.0.0.1", porta)
+    dados = corpo if isinstance(corpo, bytes) else (b"" if corpo is None else json.dumps(corpo).encode())
+    escritor.write(f"{metodo} {caminho} HTTP/1.1\r\nHost: teste\r\nContent-Length: {len(dados)}\r\n\r\n"
+                   .encode() + dados)
+    await escritor.drain()
+    resposta = await leitor.read()
+    escritor.close()
+    cabecalho, _, conteudo = resposta.partition(b"\r\n\r\n")
+    return int(cabecalho.split()[1]), json.loads(conteudo)
+
+
+def _json(valor):
+    """Valor como chega ao cliente (tuplas viram listas, chaves viram str)."""
+    return json.loads(json.dumps(valor, ensure_ascii=False))
+
+
+def _com_servico(servico_, corpo):
+    """Executa corpo(porta) com o serviço ouvindo em uma porta livre."""
+    async def principal():
+        porta = _porta_livre()
+        tarefa = asyncio.ensure_future(servico_.servir("127.0.0.1", porta))
+        for _ in range(100):
+            try:
+                _, escritor = await asyncio.open_connection("127.0.0.1", porta)
+                escritor.close()
+                break
+            except OSError:
+                await asyncio.sleep(0.01)
+        try:
+            return await corpo(porta)
+        finally:
+            tarefa.cancel()
+    try:
+        return asyncio.run(principal())
+    finally:
+        servico_.fechar()
+
+
+def test_rotas_equivalem_as_consultas_diretas(csv_entrada):
+    sistema = processar(csv_entrada, armazenamento_colunar=True)
+    referencia = processar(csv_entrada)
+    conteudo = referencia.listar_conteudos()[0].id_conteudo
+    usuario = referencia.listar_usuarios()[0].id_usuario
+
+    async def corpo(porta):
+        respostas = {}
+        for rota in ("/conteudos/top?n=3", "/conteudos/top?n=5&tipo=video", f"/conteudos/{conteudo}",
+                     f"/usuarios/{usuario}", "/plataformas", "/plataformas?ordenar_por=tempo_total",
+                     "/comentarios?q=gol&tamanho=5", "/status"):
+            respostas[rota] = await _http(porta, "GET", rota)
+        respostas["repetida"] = await _http(porta, "GET", "/conteudos/top?n=3")
+        for rota in ("/conteudos/999999", "/usuarios/999999", "/conteudos/top?n=0", "/conteudos/abc", "/nada"):
+            respostas[rota] = await _http(porta, "GET", rota)
+        respostas["DELETE"] = await _http(porta, "DELETE", "/status")
+        return respostas
+
+    servico_ = ServicoEngajamento(sistema)
+    r = _com_servico(servico_, corpo)
+    assert r["/conteudos/top?n=3"] == (200, _json(servico._top_conteudos(referencia, 3)))
+    assert r["/conteudos/top?n=5&tipo=video"] == (200, _json(servico._top_conteudos(referencia, 5, "video")))
+    assert r[f"/conteudos/{conteudo}"] == (200, _json(servico._metricas_conteudo(referencia, conteudo)))
+    assert r[f"/usuarios/{usuario}"] == (200, _json(servico._atividade_usuario(referencia, usuario)))
+    assert r["/plataformas"] == (200, _json(servico._estatisticas_plataformas(referencia)))
+    assert r["/plataformas?ordenar_por=tempo_total"] == (
+        200, _json(servico._estatisticas_plataformas(referencia, "tempo_total")))
+    comentarios = _json(servico._buscar_comentarios(referencia, "gol", tamanho_pagina=5))
+    for c in comentarios["comentarios"] + r["/comentarios?q=gol&tamanho=5"][1]["comentarios"]:
+        del c["id_interacao"]   # contador global de IDs
+    assert r["/comentarios?q=gol&tamanho=5"] == (200, comentarios)
+    situacao, status = r["/status"]
+    assert situacao == 200 and status["versao_dados"] == sistema.versao_dados
+    assert {k: status[k] for k in ("conteudos", "usuarios", "plataformas")} == servico._contagens(referencia)
+    assert r["repetida"] == r["/conteudos/top?n=3"]
+    assert servico_.cache.acertos >= 1
+    assert [r[rota][0] for rota in ("/conteudos/999999", "/usuarios/999999", "/conteudos/top?n=0",
+                                    "/conteudos/abc", "/nada", "DELETE")] == [404, 404, 400, 400, 404, 405]
+
+
+def test_n_e_tamanho_limitados_a_max_itens(csv_globo):
+    async def corpo(porta):
+        return [await _http(porta, "GET", rota)
+                for rota in ("/conteudos/top?n=5", "/conteudos/top?n=6", "/comentarios?q=gol&tamanho=5",
+                             "/comentarios?q=gol&tamanho=6", "/comentarios?q=gol&tamanho=0")]
+    respostas = _com_servico(ServicoEngajamento(processar(csv_globo), max_itens=5), corpo)
+    assert [situacao for situacao, _ in respostas] == [200, 400, 200, 400, 400]
+    assert respostas[1][1] == {"erro": "n deve estar entre 1 e 5."}
+    with pytest.raises(ValueError):
+        ServicoEngajamento(processar(csv_globo), max_itens=0)
+
+
+def test_ingestao_restrita_ao_diretorio(csv_globo, csv_sujo, tmp_path):
+    diretorio = tmp_path / "ingestao"
+    (diretorio / "sub").mkdir(parents=True)
+    shutil.copy(csv_sujo, diretorio / "sub" / "novas.csv")
+    (tmp_path / "segredo.csv").write_text("id_conteudo\n1\n", encoding="utf-8")
+    os.symlink(tmp_path, diretorio / "fora")
+    sistema = processar(csv_globo, armazenamento_colunar=True)
+
+    async def corpo(porta):
+        respostas = {}
+        antes = await _http(porta, "GET", "/conteudos/top?n=5")
+        for caminho in ("../segredo.csv", str(tmp_path / "segredo.csv"), "sub/../../segredo.csv",
+                        "fora/segredo.csv", "", "sub/nao_existe.csv", "sub"):
+            respostas[caminho] = await _http(porta, "POST", "/ingestao", {"caminho": caminho})
+        respostas["corpo_invalido"] = await _http(porta, "POST", "/ingestao", [1])
+        respostas["json_invalido"] = await _http(porta, "POST", "/ingestao", b"{")
+        respostas["ok"] = await _http(porta, "POST", "/ingestao", {"caminho": "sub/novas.csv"})
+        depois = await _http(porta, "GET", "/conteudos/top?n=5")
+        return antes, respostas, depois
+
+    servico_ = ServicoEngajamento(sistema, CacheResultados(capacidade=8), diretorio_ingestao=str(diretorio))
+    antes, r, depois = _com_servico(servico_, corpo)
+    assert [r[c][0] for c in ("../segredo.csv", str(tmp_path / "segredo.csv"), "sub/../../segredo.csv",
+                              "fora/segredo.csv", "")] == [403] * 5
+    assert r["sub/nao_existe.csv"] == (404, {"erro": "Arquivo não encontrado: sub/nao_existe.csv"})
+    assert r["sub"][0] == 404
+    assert r["corpo_invalido"][0] == r["json_invalido"][0] == 400
+    assert str(tmp_path) not in json.dumps(list(r.values()))
+
+    referencia = processar(csv_globo)
+    referencia.processar_interacoes_do_csv(csv_sujo, rejeicoes=ColetorRejeicoes(exibir_por_categoria=0))
+    situacao, resultado = r["ok"]
+    assert situacao == 200
+    assert resultado["arquivo"] == "sub/novas.csv"
+    assert resultado["rejeitadas"] == sum(resultado["rejeicoes"].values()) > 0
+    assert resultado["versao_dados"] == sistema.versao_dados
+    # a versão mudou: o top em cache antes da ingestão não é reaproveitado
+    assert antes == (200, _json(servico._top_conteudos(processar(csv_globo), 5)))
+    assert depois == (200, _json(servico._top_conteudos(referencia, 5)))
+
+
+def test_ingestao_desabilitada_sem_diretorio(csv_globo):
+    async def corpo(porta):
+        return await _http(porta, "POST", "/ingestao", {"caminho": "interacoes_globo.csv"})
+    assert _com_servico(ServicoEngajamento(processar(csv_globo)), corpo)[0] == 403
+
+
+def test_cache_resultados_lru_ttl_e_versao():
+    agora = [0.0]
+    cache = CacheResultados(capacidade=2, ttl_segundos=10, relogio=lambda: agora[0])
+    cache.guardar("a", 1, "A")
+    cache.guardar("b", 1, "B")
+    assert cache.obter("a", 1) == (True, "A")
+    cache.guardar("c", 1, "C")                      # descarta "b", o menos usado
+    assert cache.obter("b", 1) == (False, None)
+    assert cache.obter("a", 2) == (False, None)     # outra versão dos dados
+    assert cache.obter("a", 1) == (False, None)     # removida ao ser encontrada desatualizada
+    agora[0] = 10.0
+    assert cache.obter("c", 1) == (False, None)     # expirou
+    assert cache.estatisticas()["descartes"] == 1 and len(cache) == 0
+    with pytest.raises(ValueError):
+        CacheResultados(capacidade=0)
+
+
+def test_consultas_simultaneas_calculadas_uma_vez(csv_globo, monkeypatch):
+    chamadas = []
+
+    def contagens(sistema):
+        chamadas.append(sistema.versao_dados)
+        return {"conteudos": len(sistema.listar_conteudos())}
+    monkeypatch.setitem(servico.CONSULTAS, "contagens", contagens)
+    sistema = processar(csv_globo)
+    servico_ = ServicoEngajamento(sistema)
+
+    async def principal():
+        primeiras = await asyncio.gather(*[servico_.consultar("contagens") for _ in range(10)])
+        await servico_.consultar("contagens")
+        await servico_.ingerir(csv_globo)
+        return primeiras, await servico_.consultar("contagens")
+    try:
+        primeiras, depois = asyncio.run(principal())
+    finally:
+        servico_.fechar()
+    assert all(r is primeiras[0] for r in primeiras)
+    assert depois == primeiras[0]
+    assert len(chamadas) == 2 and chamadas[0] != chamadas[1]
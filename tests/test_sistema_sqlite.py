@@ -0,0 +1,133 @@
+import time
+
+import pytest
+
+from analise.rejeicoes import ColetorRejeicoes
+from analise.sistema import SistemaAnaliseEngajamento
+from analise.sistema_sqlite import ConteudoSQL, SistemaSQLite, UsuarioSQL
+
+from conftest import processar
+
+
+@pytest.fixture
+def sistemas(csv_entrada, tmp_path):
+    referencia = processar(csv_entrada)
+    sqlite = SistemaSQLite(str(tmp_path / "interacoes.db"), tamanho_buffer=50)
+    sqlite.processar_interacoes_do_csv(csv_entrada, rejeicoes=ColetorRejeicoes(exibir_por_categoria=0))
+    yield referencia, sqlite
+    sqlite.fechar()
+
+
+def _interacoes(sistema):
+    interacoes = sorted(sistema.iterar_interacoes(), key=lambda i: i.id_interacao)
+    return [(i.conteudo_associado.id_conteudo, i.id_usuario, i.timestamp_interacao,
+             i.plataforma_interacao.id_plataforma, i.tipo_interacao, i.watch_duration_seconds, i.comment_text)
+            for i in interacoes]
+
+
+def _ids(ranking):
+    return [(getattr(registro, "id_conteudo", None) or registro.id_usuario, total) for registro, total in ranking]
+
+
+def test_consultas_iguais_as_do_sistema_em_memoria(sistemas):
+    referencia, sqlite = sistemas
+    assert _interacoes(sqlite) == _interacoes(referencia)
+    assert sqlite.gerar_relatorio_metricas() == referencia.gerar_relatorio_metricas()
+    assert sqlite.comparar_plataformas() == referencia.comparar_plataformas()
+    assert ([(p.id_plataforma, p.nome_plataforma) for p in sqlite.listar_plataformas()]
+            == [(p.id_plataforma, p.nome_plataforma) for p in referencia.listar_plataformas()])
+    for top_n in (None, 3):
+        assert _ids(sqlite.ranking_usuarios(top_n)) == _ids(referencia.ranking_usuarios(top_n))
+        for tipo in (None, "video", "podcast", "artigo"):
+            assert _ids(sqlite.ranking_conteudos(top_n, tipo)) == _ids(referencia.ranking_conteudos(top_n, tipo))
+
+    for conteudo, _ in sqlite.ranking_conteudos(3):
+        assert isinstance(conteudo, ConteudoSQL)
+        esperado = referencia.obter_conteudo(conteudo.id_conteudo)
+        assert (conteudo.nome_conteudo, conteudo.tipo_conteudo) == (esperado.nome_conteudo,
+                                                                     type(esperado).__name__.lower())
+    for conteudo in sqlite.listar_conteudos():
+        esperado = referencia.obter_conteudo(conteudo.id_conteudo)
+        assert conteudo.calcular_contagem_por_tipo_interacao() == esperado.calcular_contagem_por_tipo_interacao()
+        assert conteudo.calcular_tempo_total_consumo() == esperado.calcular_tempo_total_consumo()
+    unico = sqlite.obter_conteudo(referencia.listar_conteudos()[-1].id_conteudo)
+    assert (unico.calcular_total_interacoes_engajamento()
+            == referencia.listar_conteudos()[-1].calcular_total_interacoes_engajamento())
+    assert sqlite.obter_conteudo(-1) is None
+
+
+def test_usuarios_com_totais_agregados(sistemas):
+    referencia, sqlite = sistemas
+    usuarios = sqlite.listar_usuarios()
+    assert [u.id_usuario for u in usuarios] == [u.id_usuario for u in referencia.listar_usuarios()]
+    for usuario in usuarios:
+        assert isinstance(usuario, UsuarioSQL)
+        esperado = referencia.obter_usuario(usuario.id_usuario)
+        assert usuario == sqlite.obter_usuario(usuario.id_usuario)
+        assert (usuario.total_interacoes, usuario.tempo_total_consumo) == (
+            esperado.total_interacoes, esperado.calcular_tempo_total_consumo())
+    assert sqlite.obter_usuario(-1) is None
+
+
+def test_consultas_por_intervalo(sistemas):
+    referencia, sqlite = sistemas
+    momentos = sorted(i.timestamp_interacao for i in referencia.iterar_interacoes())
+    inicio, fim = momentos[0], momentos[-1]
+    meio = inicio + (fim - inicio) / 3
+    for de, ate in ((inicio, fim), (meio, fim), (inicio, meio), (fim, inicio)):
+        assert (sqlite.engajamento_por_conteudo_no_intervalo(de, ate)
+                == referencia.engajamento_por_conteudo_no_intervalo(de, ate))
+        assert sqlite.tempo_por_plataforma_por_hora(de, ate) == referencia.tempo_por_plataforma_por_hora(de, ate)
+        for usuario in referencia.listar_usuarios()[:10]:
+            assert (sqlite.tempo_consumo_usuario_no_intervalo(usuario.id_usuario, de, ate)
+                    == referencia.tempo_consumo_usuario_no_intervalo(usuario.id_usuario, de, ate))
+
+
+def test_usuario_enfileirado_uma_vez_por_sessao(csv_globo, tmp_path):
+    sqlite = SistemaSQLite(str(tmp_path / "interacoes.db"), tamanho_buffer=10 ** 6)
+    enfileirados = []
+    descarregar = sqlite._descarregar
+
+    def espiar():
+        enfileirados.extend(sqlite._pendentes["usuarios"])
+        descarregar()
+    sqlite._descarregar = espiar
+    sqlite.processar_interacoes_do_csv(csv_globo, rejeicoes=ColetorRejeicoes(exibir_por_categoria=0))
+    assert sorted(enfileirados) == sorted({(u.id_usuario,) for u in sqlite.listar_usuarios()})
+    sqlite.fechar()
+
+
+def test_recursos_em_memoria_indisponiveis(sistemas):
+    _, sqlite = sistemas
+    for nome in ("salvar_snapshot", "estatisticas_aproximadas", "sketches_plataformas",
+                 "indice_temporal", "indice_comentarios", "buscar_comentarios"):
+        assert not hasattr(sqlite, nome)
+    with pytest.raises(AttributeError, match="buscar_comentarios"):
+        sqlite.buscar_comentarios("gol")
+
+
+def test_banco_reaberto_continua_a_ingestao(csv_globo, csv_sujo, tmp_path):
+    caminho = str(tmp_path / "interacoes.db")
+    with SistemaSQLite(caminho) as sqlite:
+        sqlite.processar_interacoes_do_csv(csv_globo, rejeicoes=ColetorRejeicoes(exibir_por_categoria=0))
+    with SistemaSQLite(caminho) as sqlite:
+        sqlite.processar_interacoes_do_csv(csv_sujo, rejeicoes=ColetorRejeicoes(exibir_por_categoria=0))
+        referencia = processar(csv_globo)
+        referencia.processar_interacoes_do_csv(csv_sujo, rejeicoes=ColetorRejeicoes(exibir_por_categoria=0))
+        assert _interacoes(sqlite) == _interacoes(referencia)
+        assert sqlite.gerar_relatorio_metricas() == referencia.gerar_relatorio_metricas()
+        assert _ids(sqlite.ranking_usuarios(5)) == _ids(referencia.ranking_usuarios(5))
+
+
+def test_etapas_da_instrumentacao_nao_se_sobrepoem(csv_globo, tmp_path):
+    for sistema in (SistemaAnaliseEngajamento(), SistemaSQLite(str(tmp_path / "interacoes.db"))):
+        sistema.habilitar_instrumentacao()
+        inicio = time.perf_counter()
+        sistema.processar_interacoes_do_csv(csv_globo, tamanho_lote=7,
+                                            rejeicoes=ColetorRejeicoes(exibir_por_categoria=0))
+        parede = time.perf_counter() - inicio
+        etapas = sistema.relatorio_instrumentacao()["etapas"]
+        assert {"leitura_csv", "preparacao_linha", "conteudo", "classificacao_conteudo"} <= set(etapas)
+        assert sum(e["segundos"] for e in etapas.values()) <= parede
+    assert etapas["gravacao_banco"]["chamadas"] > 0
+    sistema.fechar()
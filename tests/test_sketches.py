@@ -0,0 +1,134 @@
+import math
+import random
+
+import pytest
+
+from entidades.metricas import MetricasAproximadas
+from entidades.sketches import KLL, HyperLogLog, mesclar_todos
+
+from conftest import processar
+
+
+def _posto(valores_ordenados, valor) -> float:
+    """Fração dos valores ≤ valor."""
+    return sum(1 for v in valores_ordenados if v <= valor) / len(valores_ordenados)
+
+
+def test_hyperloglog_dentro_do_erro_e_mesclavel():
+    partes = [HyperLogLog() for _ in range(4)]
+    for n in range(100_000):
+        partes[n % 4].adicionar(n)
+        partes[(n + 1) % 4].adicionar(n)   # repetidos entre partes não contam duas vezes
+    uniao = mesclar_todos(partes, HyperLogLog())
+    assert abs(len(uniao) - 100_000) / 100_000 < 3 * uniao.erro_relativo
+    pequeno = HyperLogLog()
+    for n in range(50):
+        pequeno.adicionar(f"u{n}")
+        pequeno.adicionar(f"u{n}")
+    assert pequeno.esparso and len(pequeno) == 50   # ainda esparso: contagem exata
+    with pytest.raises(ValueError):
+        uniao.mesclar(HyperLogLog(precisao=10))
+
+
+def test_hyperloglog_promovido_de_esparso_para_denso():
+    hll, denso = HyperLogLog(), HyperLogLog()
+    for n in range(64):
+        hll.adicionar(n)
+    assert hll.esparso and len(hll) == 64
+    hll.adicionar(64)                                 # passou do limite: registradores
+    assert not hll.esparso and abs(len(hll) - 65) < 3 * hll.erro_relativo * 65
+    for n in range(1000, 3000):
+        denso.adicionar(n)
+    esparso = HyperLogLog()
+    esparso.adicionar(5)
+    esparso.mesclar(denso)                            # esparso recebendo denso
+    denso.mesclar(hll)                                # denso recebendo denso
+    hll.mesclar(esparso)
+    assert not esparso.esparso
+    assert abs(len(hll) - 2065) < 3 * hll.erro_relativo * 2065
+    assert abs(len(esparso) - 2001) < 3 * esparso.erro_relativo * 2001
+
+
+def test_kll_dentro_do_erro_de_posto_e_mesclavel():
+    rnd = random.Random(7)
+    valores = [rnd.expovariate(1 / 600) for _ in range(50_000)]
+    partes = [KLL(semente=s) for s in range(3)]
+    for n, valor in enumerate(valores):
+        partes[n % 3].adicionar(valor)
+    kll = mesclar_todos(partes, KLL())
+    assert len(kll) == len(valores)
+    ordenados = sorted(valores)
+    for q, estimado in kll.quantis((0.1, 0.5, 0.9, 0.99)).items():
+        assert abs(_posto(ordenados, estimado) - q) < 0.02
+    assert kll.quantis((0.0, 1.0)) == {0.0: ordenados[0], 1.0: ordenados[-1]}
+    assert KLL().quantis((0.5,)) == {}
+
+
+def test_metricas_aproximadas_mantem_contagens_exatas(csv_entrada):
+    exato = processar(csv_entrada)
+    aproximado = processar(csv_entrada, metricas_aproximadas=True)
+    assert aproximado.metricas_aproximadas
+    for c in aproximado.listar_conteudos():
+        assert c.metricas_aproximadas
+        referencia = exato.obter_conteudo(c.id_conteudo)
+        assert c.calcular_contagem_por_tipo_interacao() == referencia.calcular_contagem_por_tipo_interacao()
+        assert c.calcular_total_interacoes_engajamento() == referencia.calcular_total_interacoes_engajamento()
+        assert c.calcular_tempo_total_consumo() == referencia.calcular_tempo_total_consumo()
+        assert c.calcular_media_tempo_consumo() == referencia.calcular_media_tempo_consumo()
+        assert c.listar_comentarios() == referencia.listar_comentarios()
+        # poucos usuários: o HyperLogLog segue esparso, com contagem exata
+        assert c.estimar_usuarios_unicos() == referencia.estimar_usuarios_unicos()
+        # poucas durações: o KLL ainda não compactou, quantis exatos
+        assert c.quantis_tempo_consumo() == referencia.quantis_tempo_consumo()
+    assert aproximado.gerar_relatorio_metricas() == exato.gerar_relatorio_metricas()
+
+
+def test_sketches_de_tempo_criados_na_primeira_duracao():
+    metricas, outra = MetricasAproximadas(), MetricasAproximadas()
+    metricas.registrar("like", 0, 1)
+    assert metricas.duracoes is None and metricas.usuarios_com_tempo is None
+    assert (metricas.qtd_usuarios_com_tempo(), metricas.quantis((0.5,))) == (0, {})
+    outra.registrar("view_start", 30, 2)
+    metricas.mesclar(outra)
+    assert metricas.qtd_usuarios_com_tempo() == 1 and metricas.quantis((0.5,)) == {0.5: 30}
+    assert len(metricas.usuarios) == 2
+
+
+def test_alternar_modo_do_conteudo(csv_globo):
+    sistema = processar(csv_globo)
+    conteudo = sistema.listar_conteudos()[0]
+    usuarios, quantis = conteudo.estimar_usuarios_unicos(), conteudo.quantis_tempo_consumo()
+    conteudo.usar_metricas_aproximadas()
+    assert conteudo.metricas_aproximadas
+    assert (conteudo.estimar_usuarios_unicos(), conteudo.quantis_tempo_consumo()) == (usuarios, quantis)
+    conteudo.usar_metricas_aproximadas(False)
+    assert not conteudo.metricas_aproximadas
+    assert conteudo.estimar_usuarios_unicos() == usuarios
+
+
+@pytest.mark.parametrize("metricas_aproximadas", [False, True])
+def test_estatisticas_aproximadas_combinam_conteudos_e_plataformas(csv_entrada, metricas_aproximadas):
+    sistema = processar(csv_entrada, metricas_aproximadas=metricas_aproximadas)
+    interacoes = list(sistema.iterar_interacoes())
+
+    def esperado(filtro):
+        selecionadas = [i for i in interacoes if filtro(i)]
+        duracoes = sorted(i.watch_duration_seconds for i in selecionadas if i.watch_duration_seconds > 0)
+        return len({i.id_usuario for i in selecionadas}), duracoes
+
+    def conferir(estatisticas, filtro):
+        usuarios, duracoes = esperado(filtro)
+        assert abs(estatisticas["usuarios_unicos"] - usuarios) <= math.ceil(
+            3 * estatisticas["erro_relativo_usuarios"] * usuarios)
+        for q, valor in estatisticas["quantis"].items():
+            assert valor == duracoes[max(math.ceil(q * len(duracoes)), 1) - 1]
+
+    conferir(sistema.estatisticas_aproximadas(), lambda i: True)
+    ids = [c.id_conteudo for c in sistema.listar_conteudos()[:3]]
+    conferir(sistema.estatisticas_aproximadas(ids_conteudos=ids),
+             lambda i: i.conteudo_associado.id_conteudo in ids)
+    nome = sistema.listar_plataformas()[0].nome_plataforma
+    conferir(sistema.estatisticas_aproximadas(nomes_plataformas=[nome]),
+             lambda i: i.plataforma_interacao.nome_plataforma == nome)
+    with pytest.raises(ValueError):
+        sistema.estatisticas_aproximadas(ids_conteudos=ids, nomes_plataformas=[nome])
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from analise import snapshot
+from analise.rejeicoes import ColetorRejeicoes
+from analise.sistema import SistemaAnaliseEngajamento
+
+from conftest import processar, retrato
+
+MODOS = [(False, False), (True, False), (False, True), (True, True)]
+
+
+@pytest.mark.parametrize("armazenamento_colunar,metricas_aproximadas", MODOS)
+def test_snapshot_restaura_o_sistema(csv_entrada, referencia, tmp_path, armazenamento_colunar,
+                                     metricas_aproximadas):
+    sistema = processar(csv_entrada, armazenamento_colunar=armazenamento_colunar,
+                        metricas_aproximadas=metricas_aproximadas)
+    caminho = str(tmp_path / "sistema.snapshot")
+    sistema.salvar_snapshot(caminho, csv_entrada)
+
+    carregado = SistemaAnaliseEngajamento.carregar_snapshot(caminho, csv_entrada)
+    assert carregado is not None
+    assert (carregado.armazenamento is not None) == armazenamento_colunar
+    assert carregado.metricas_aproximadas == metricas_aproximadas
+    assert retrato(carregado) == retrato(sistema)
+    if not metricas_aproximadas:
+        assert retrato(carregado) == referencia(csv_entrada)
+
+
+@pytest.mark.parametrize("armazenamento_colunar", [False, True])
+def test_ingestao_continua_apos_carregar(csv_globo, csv_sujo, tmp_path, armazenamento_colunar):
+    caminho = str(tmp_path / "sistema.snapshot")
+    processar(csv_globo, armazenamento_colunar=armazenamento_colunar).salvar_snapshot(caminho)
+    carregado = SistemaAnaliseEngajamento.carregar_snapshot(caminho)
+    versao = carregado.versao_dados
+    carregado.processar_interacoes_do_csv(csv_sujo, rejeicoes=ColetorRejeicoes(exibir_por_categoria=0))
+    assert carregado.versao_dados != versao
+
+    continuo = processar(csv_globo, armazenamento_colunar=armazenamento_colunar)
+    continuo.processar_interacoes_do_csv(csv_sujo, rejeicoes=ColetorRejeicoes(exibir_por_categoria=0))
+    assert retrato(carregado) == retrato(continuo)
+
+
+def test_regravar_sobre_o_arquivo_mapeado(csv_sujo, tmp_path):
+    caminho = str(tmp_path / "sistema.snapshot")
+    original = processar(csv_sujo, armazenamento_colunar=True)
+    original.salvar_snapshot(caminho)
+    carregado = SistemaAnaliseEngajamento.carregar_snapshot(caminho)
+    carregado.salvar_snapshot(caminho)
+    assert retrato(carregado) == retrato(original)
+    assert retrato(SistemaAnaliseEngajamento.carregar_snapshot(caminho)) == retrato(original)
+
+
+def test_snapshot_invalido_ou_desatualizado(csv_globo, tmp_path):
+    origem = tmp_path / "interacoes.csv"
+    with open(csv_globo, "rb") as f:
+        origem.write_bytes(f.read())
+    caminho = str(tmp_path / "sistema.snapshot")
+    processar(str(origem)).salvar_snapshot(caminho, str(origem), calcular_hash=True)
+    assert snapshot.snapshot_valido(caminho, str(origem), verificar_hash=True)
+
+    # mesmo tamanho e mtime, conteúdo diferente: só o hash percebe
+    info = os.stat(origem)
+    dados = bytearray(origem.read_bytes())
+    dados[-2:-1] = b"9" if dados[-2:-1] != b"9" else b"8"
+    origem.write_bytes(bytes(dados))
+    os.utime(origem, ns=(info.st_atime_ns, info.st_mtime_ns))
+    assert snapshot.snapshot_valido(caminho, str(origem))
+    assert SistemaAnaliseEngajamento.carregar_snapshot(caminho, str(origem), verificar_hash=True) is None
+
+    with open(origem, "ab") as f:
+        f.write(b"\n")
+    assert SistemaAnaliseEngajamento.carregar_snapshot(caminho, str(origem)) is None
+
+    with open(caminho, "r+b") as f:
+        f.write(b"XXXX")
+    assert SistemaAnaliseEngajamento.carregar_snapshot(caminho) is None
+    assert SistemaAnaliseEngajamento.carregar_snapshot(str(tmp_path / "inexistente")) is None
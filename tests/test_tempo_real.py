@@ -0,0 +1,15 @@
+from analise.tempo_real import acompanhar_csv
+
+
+def test_acompanhar_csv_para_sem_cabecalho_completo(tmp_path):
+    for texto in ("", "id_conteudo,id_usu"):
+        caminho = tmp_path / "fluxo.csv"
+        caminho.write_text(texto, encoding="utf-8")
+        assert list(acompanhar_csv(str(caminho), intervalo=0.01, ocioso_max=0.05)) == []
+
+
+def test_acompanhar_csv_entrega_linhas_completas(tmp_path):
+    caminho = tmp_path / "fluxo.csv"
+    caminho.write_text("a,b\n1,x\n2,y\n3,", encoding="utf-8")   # a última ainda sendo escrita
+    assert list(acompanhar_csv(str(caminho), intervalo=0.01, ocioso_max=0.05)) == [
+        {"a": "1", "b": "x"}, {"a": "2", "b": "y"}]